@@ -1,46 +1,119 @@
-from flask import Flask, jsonify, send_from_directory
+import time
+
+_import_started = time.perf_counter()
+
+import os
+from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
-from flask_swagger_ui import get_swaggerui_blueprint
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import Config
-from app.extensions import db  
+from app.extensions import (
+    admission_control, db, password_hasher, request_metrics, response_compression, schedule_cache, schedule_events
+)
+from app.utils.compression import send_static_file
+from app.utils.db_routing import init_replicas
+from app.utils.json_provider import init_json_provider
+from app.utils.query_diagnostics import init_query_diagnostics
+from app.utils.recurrence import init_expansion_cache
+from app.utils.startup import StartupTimer
+from app.utils.validators import ScheduleRules
 from app.routes.auth import auth_bp
 
+_import_seconds = time.perf_counter() - _import_started
+
 jwt = JWTManager()
 
-def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
+def init_migrate(app):
+    """Register Flask-Migrate (the `flask db` commands). Not needed to serve requests."""
+    from flask_migrate import Migrate
 
-    db.init_app(app)
-    jwt.init_app(app)
-    migrate = Migrate(app, db)
+    return Migrate(app, db, directory=os.path.join(os.path.dirname(__file__), "migrations"))
 
-    from app.routes.main import main_bp
-    from app.routes.classes import classes_bp
-    from app.routes.schedule import schedule_bp
+
+def init_swagger(app):
+    """Register the Swagger UI blueprint serving the API docs."""
+    from flask_swagger_ui import get_swaggerui_blueprint
 
     swaggerui_blueprint = get_swaggerui_blueprint(
         app.config["SWAGGER_URL"],
         app.config["API_URL"]
     )
-
-    app.register_blueprint(main_bp)
-    app.register_blueprint(classes_bp, url_prefix='/api')
-    app.register_blueprint(schedule_bp, url_prefix='/api')
-    app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(swaggerui_blueprint, url_prefix=app.config["SWAGGER_URL"])
 
-    with app.app_context():
-        from app import models  
+
+def create_app(test_config=None):
+    timer = StartupTimer()
+    timer.add("imports", _import_seconds)
+
+    with timer.phase("config"):
+        # /static is served by send_static below, precompressed.
+        app = Flask(__name__, static_folder=None)
+        app.config.from_object(Config)
+        if test_config:
+            app.config.update(test_config)
+        app.extensions["startup_timer"] = timer
+        init_json_provider(app)
+        if app.config["PROXY_FIX_X_FOR"]:
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
+    with timer.phase("extensions"):
+        db.init_app(app)
+        init_replicas(app)
+        jwt.init_app(app)
+        schedule_cache.init_app(app)
+        schedule_events.init_app(app)
+        password_hasher.init_app(app)
+        request_metrics.init_app(app)
+        # After the metrics hook, so rejected requests are still counted.
+        admission_control.init_app(app)
+        # Registered after the metrics hook so that runs last and records compressed sizes.
+        response_compression.init_app(app)
+        init_query_diagnostics(app)
+        init_expansion_cache(app)
+        app.extensions["schedule_rules"] = ScheduleRules(app.config["SESSION_RULES"])
+
+    if app.config["MIGRATE_ENABLED"]:
+        with timer.phase("migrate"):
+            init_migrate(app)
+
+    with timer.phase("blueprints"):
+        from app.routes.main import main_bp
+        from app.routes.classes import classes_bp
+        from app.routes.schedule import schedule_bp
+        from app.routes.professors import professors_bp
+        from app.routes.availability import availability_bp
+        from app.routes.series import series_bp
+
+        app.register_blueprint(main_bp)
+        app.register_blueprint(classes_bp, url_prefix='/api')
+        app.register_blueprint(schedule_bp, url_prefix='/api')
+        app.register_blueprint(professors_bp, url_prefix='/api')
+        app.register_blueprint(availability_bp, url_prefix='/api')
+        app.register_blueprint(series_bp, url_prefix='/api')
+        app.register_blueprint(auth_bp, url_prefix="/auth")
+        if app.config["METRICS_ENABLED"]:
+            from app.routes.metrics import metrics_bp
+
+            app.register_blueprint(metrics_bp)
+
+    if app.config["SWAGGER_ENABLED"]:
+        with timer.phase("swagger"):
+            init_swagger(app)
+
+    with timer.phase("models"):
+        with app.app_context():
+            from app import models
 
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({"error": "Resource not found. Please check your URL."}), 404
-    
-    @app.route('/static/<path:path>')
-    def send_static(path):
-        return send_from_directory('static', path)
+
+    @app.route('/static/<path:filename>', endpoint='static')
+    def send_static(filename):
+        return send_static_file(os.path.join(app.root_path, 'static'), filename)
+
+    if app.config["STARTUP_TIMING_REPORT"]:
+        app.logger.warning("create_app timings:\n%s", timer.report())
 
     return app
-    
+
@@ -1,20 +1,199 @@
+import json
 import os
+import tempfile
+
 from dotenv import load_dotenv
 
+# Variables already set in the environment win over the .env file.
 load_dotenv(verbose=True)
 
+# "serve" is the lean mode used by the gunicorn workers: no Flask-Migrate and no
+# Swagger UI unless explicitly enabled. "full" loads everything.
+APP_MODE = os.getenv("APP_MODE", "full")
+
+
+def env_flag(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def engine_options(prefix):
+    """
+    SQLAlchemy engine/pool options read from <prefix>POOL_SIZE, <prefix>MAX_OVERFLOW,
+    <prefix>POOL_TIMEOUT, <prefix>POOL_RECYCLE and <prefix>POOL_PRE_PING.
+    Only the variables that are set are passed on, so SQLite keeps its own pool defaults.
+    """
+    options = {}
+    for option, cast in (("pool_size", int), ("max_overflow", int), ("pool_timeout", float), ("pool_recycle", int)):
+        value = os.getenv(prefix + option.upper())
+        if value is not None:
+            options[option] = cast(value)
+    if os.getenv(prefix + "POOL_PRE_PING") is not None:
+        options["pool_pre_ping"] = env_flag(prefix + "POOL_PRE_PING", False)
+    return options
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///local.db") 
     
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "20ce36a79a8887f6023e73dd4a6ec49c1031e65ea31ea6dd6570e35dd87752e1")
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False  
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options("SQLALCHEMY_")
+    # Optional read replicas (comma-separated URIs) for the read-only routes, with their own pool options
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if uri.strip()]
+    SQLALCHEMY_REPLICA_ENGINE_OPTIONS = engine_options("SQLALCHEMY_REPLICA_")
+    # After a write, this worker reads from the primary for this long to hide replication lag
+    SQLALCHEMY_REPLICA_STICKY_SECONDS = float(os.getenv("SQLALCHEMY_REPLICA_STICKY_SECONDS", 2.0))
     FLASK_ENV = os.getenv("FLASK_ENV", "development")
     SWAGGER_URL = os.getenv("SWAGGER_URL", "/api-docs")  
     API_URL = os.getenv("API_URL", "/static/swagger.yaml")  
 
-    if FLASK_ENV == "production":
-        if not SQLALCHEMY_DATABASE_URI: 
-            raise ValueError("SQLALCHEMY_DATABASE_URI must be defined in production")
+    APP_MODE = APP_MODE
+    # Flask-Migrate is only needed by the `flask db` commands, Swagger UI only for the docs
+    MIGRATE_ENABLED = env_flag("MIGRATE_ENABLED", APP_MODE != "serve")
+    SWAGGER_ENABLED = env_flag("SWAGGER_ENABLED", APP_MODE != "serve")
+    # Request metrics served at /metrics. Set METRICS_DIR to a directory shared by the
+    # gunicorn workers so /metrics adds up all of them instead of just the one answering.
+    # Off by default: /metrics has no authentication, so only expose it to the scraper.
+    METRICS_ENABLED = env_flag("METRICS_ENABLED", False)
+    METRICS_DIR = os.getenv("METRICS_DIR") or None
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+    # Add a Server-Timing header (db, serialize, total) to every response
+    SERVER_TIMING_ENABLED = env_flag("SERVER_TIMING_ENABLED", False)
+    # Diagnostics: log statements slower than SLOW_QUERY_THRESHOLD_MS (with parameters and route)
+    # and requests that repeat one statement more than N_PLUS_ONE_THRESHOLD times
+    QUERY_DIAGNOSTICS_ENABLED = env_flag("QUERY_DIAGNOSTICS_ENABLED", False)
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+    # Log the per-phase create_app timings at start-up
+    STARTUP_TIMING_REPORT = env_flag("STARTUP_TIMING_REPORT", False)
+    # Budget in seconds for importing the app package and running create_app in serve mode
+    STARTUP_TIME_BUDGET = float(os.getenv("STARTUP_TIME_BUDGET", 1.5))
+
+    # Password hashing: werkzeug method string (e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000").
+    # Stored hashes made with other parameters are rehashed on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Hashes running at once per worker, and seconds to wait for a free slot before answering 503
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "2"))
+
+    # Admission control, checked before the view runs. Token buckets per endpoint and client
+    # (JWT subject, else client IP): {"<endpoint>": {"limit": requests, "period": seconds}}, where
+    # "default" covers every endpoint not listed. Override with a JSON object in RATE_LIMITS.
+    # Off by default: behind a proxy every client shares the proxy's IP until PROXY_FIX_X_FOR is set,
+    # and with MemoryStore each worker counts separately.
+    RATE_LIMIT_ENABLED = env_flag("RATE_LIMIT_ENABLED", False)
+    RATE_LIMITS = json.loads(os.getenv("RATE_LIMITS", "null")) or {
+        "auth.login": {"limit": 10, "period": 60},
+        "auth.register": {"limit": 5, "period": 60},
+        "classes.create_class": {"limit": 60, "period": 60},
+        "classes.bulk_create_classes": {"limit": 5, "period": 60},
+        "series.create": {"limit": 30, "period": 60}
+    }
+    # Bucket store: MemoryStore (per worker) or SQLiteStore (shared by the workers on a host)
+    RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "app.utils.admission.MemoryStore")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_SQLITE_PATH = os.getenv(
+        "RATE_LIMIT_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "whatsnext-rate-limits.db")
+    )
+    RATE_LIMIT_PRUNE_INTERVAL = float(os.getenv("RATE_LIMIT_PRUNE_INTERVAL", "60"))
+    # Requests handled at once per worker before new ones get a 503 (0 disables), and its Retry-After.
+    # Exempt endpoints (streams hold their request for minutes and have their own cap) are not counted.
+    MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "0"))
+    LOAD_SHEDDING_RETRY_AFTER = float(os.getenv("LOAD_SHEDDING_RETRY_AFTER", "1"))
+    ADMISSION_EXEMPT_ENDPOINTS = [
+        endpoint.strip()
+        for endpoint in os.getenv("ADMISSION_EXEMPT_ENDPOINTS", "schedule.stream_schedule,metrics.metrics").split(",")
+        if endpoint.strip()
+    ]
+    # Number of proxies in front of the app whose X-Forwarded-For is trusted for the client IP
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", "0"))
+
+    # JSON encoder: "auto" (orjson when installed), "orjson" or "stdlib"
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+    # Keyset pagination for GET /api/classes
+    CLASSES_PAGE_SIZE = int(os.getenv("CLASSES_PAGE_SIZE", "100"))
+    CLASSES_MAX_PAGE_SIZE = int(os.getenv("CLASSES_MAX_PAGE_SIZE", "500"))
+
+    # Schedule rules per session type (weekday 0 is Monday); override with a JSON object in SESSION_RULES
+    SESSION_RULES = json.loads(os.getenv("SESSION_RULES", "null")) or {
+        "class": {
+            "weekdays": [0, 1, 2, 3],
+            "start": "10:00",
+            "end": "12:00",
+            "weekday_message": "Regular classes can only be scheduled from Monday to Thursday.",
+            "time_message": "Regular classes must be scheduled between 10:00 and 12:00 Chile Time."
+        },
+        "qa": {
+            "weekdays": [4],
+            "weekday_message": "Q&A sessions are typically scheduled on Fridays."
+        },
+        "demo": {
+            "weekdays": [4],
+            "weekday_message": "Demo sessions are typically scheduled on Fridays."
+        }
+    }
+
+    # Overlap checks: "global" (no two sessions overlap) or "professor" (per professor)
+    SESSION_CONFLICT_SCOPE = os.getenv("SESSION_CONFLICT_SCOPE", "global")
+
+    # POST /api/classes/bulk
+    BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "100000"))
+    BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+
+    # Response compression: gzip (brotli when installed) for bodies of at least COMPRESSION_MIN_SIZE bytes,
+    # with compressed bodies cached by ETag
+    COMPRESSION_ENABLED = env_flag("COMPRESSION_ENABLED", True)
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+    COMPRESSION_CACHE_MAX_ENTRIES = int(os.getenv("COMPRESSION_CACHE_MAX_ENTRIES", "256"))
+    # Cache-Control max-age for /static files (the Swagger spec); they are revalidated with ETags after that
+    STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "86400"))
+
+    # GET /api/classes/changes: changes per sync page
+    CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", "500"))
+    CHANGES_MAX_PAGE_SIZE = int(os.getenv("CHANGES_MAX_PAGE_SIZE", "5000"))
+
+    # Serialized GET /api/schedule payloads, one entry per date
+    SCHEDULE_CACHE_BACKEND = os.getenv("SCHEDULE_CACHE_BACKEND", "app.utils.cache.LRUCache")
+    SCHEDULE_CACHE_MAX_ENTRIES = int(os.getenv("SCHEDULE_CACHE_MAX_ENTRIES", "512"))
+
+    # GET /api/schedule/stream: change notifications (PollingBroker also sees other workers' writes),
+    # open streams per worker process, heartbeat and reconnect timings
+    SCHEDULE_EVENTS_BACKEND = os.getenv("SCHEDULE_EVENTS_BACKEND", "app.utils.events.PollingBroker")
+    SCHEDULE_EVENTS_POLL_INTERVAL = float(os.getenv("SCHEDULE_EVENTS_POLL_INTERVAL", "1.0"))
+    SCHEDULE_STREAM_MAX_CONNECTIONS = int(os.getenv("SCHEDULE_STREAM_MAX_CONNECTIONS", "100"))
+    SCHEDULE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("SCHEDULE_STREAM_HEARTBEAT_SECONDS", "15"))
+    # Streams are closed after this long; clients reconnect with Last-Event-ID
+    SCHEDULE_STREAM_MAX_SECONDS = float(os.getenv("SCHEDULE_STREAM_MAX_SECONDS", "300"))
+    SCHEDULE_STREAM_RETRY_MS = int(os.getenv("SCHEDULE_STREAM_RETRY_MS", "3000"))
+
+    # GET /api/schedule?from=&to=: maximum number of days per request
+    SCHEDULE_MAX_RANGE_DAYS = int(os.getenv("SCHEDULE_MAX_RANGE_DAYS", "31"))
+
+    # GET /api/classes/export: rows fetched from the database per chunk
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+    # /api/classes/search page size, offset and query length limits
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+    SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+    SEARCH_MAX_OFFSET = int(os.getenv("SEARCH_MAX_OFFSET", "1000"))
+    SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+    # Longest from/to range accepted by the professor timetable and stats endpoints
+    PROFESSOR_MAX_RANGE_DAYS = int(os.getenv("PROFESSOR_MAX_RANGE_DAYS", "366"))
+
+    # Recurring series: longest start_date..end_date span, and expanded windows kept per process
+    SERIES_MAX_DAYS = int(os.getenv("SERIES_MAX_DAYS", "366"))
+    SERIES_EXPANSION_CACHE_SIZE = int(os.getenv("SERIES_EXPANSION_CACHE_SIZE", "256"))
+
+    # The gunicorn workers (serve mode) never fall back to the local database or the public default key.
+    if FLASK_ENV == "production" or APP_MODE == "serve":
+        if not os.getenv("SQLALCHEMY_DATABASE_URI"):
+            raise ValueError("SQLALCHEMY_DATABASE_URI must be defined in production and serve mode")
         if JWT_SECRET_KEY == "20ce36a79a8887f6023e73dd4a6ec49c1031e65ea31ea6dd6570e35dd87752e1":
-            raise ValueError("JWT_SECRET_KEY must be defined in production")
\ No newline at end of file
+            raise ValueError("JWT_SECRET_KEY must be defined in production and serve mode")
\ No newline at end of file
@@ -1,6 +1,14 @@
-from flask import request, jsonify
+from flask import current_app, request, jsonify
 from flask_jwt_extended import create_access_token
+from app.extensions import password_hasher
 from app.models import db, User
+from app.utils.hashing import HashingOverloaded
+
+
+def _overloaded_response():
+    response = jsonify({"message": "The server is busy. Please try again shortly."})
+    response.headers["Retry-After"] = str(max(1, round(current_app.config["PASSWORD_HASH_QUEUE_TIMEOUT"])))
+    return response, 503
 
 
 def register_user():
@@ -14,7 +22,12 @@ def register_user():
     if User.query.filter_by(email=email).first():
         return jsonify({"message": "User already exists."}), 400
 
-    new_user = User(email=email, password=password)
+    try:
+        password_hash = password_hasher.hash(password)
+    except HashingOverloaded:
+        return _overloaded_response()
+
+    new_user = User(email=email, password_hash=password_hash)
     db.session.add(new_user)
     db.session.commit()
 
@@ -27,8 +40,20 @@ def login_user():
     password = data.get("password")
 
     user = User.query.filter_by(email=email).first()
-    if not user or not user.check_password(password):
-        return jsonify({"message": "Invalid email or password."}), 401
+    try:
+        if not user or not password_hasher.verify(user.password_hash, password):
+            return jsonify({"message": "Invalid email or password."}), 401
+    except HashingOverloaded:
+        return _overloaded_response()
+
+    # Upgrade hashes made with other parameters while the plain password is at hand.
+    # Under load this is skipped and retried on a later login.
+    if password_hasher.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_hasher.hash(password)
+            db.session.commit()
+        except HashingOverloaded:
+            pass
 
     token = create_access_token(identity=str(user.id))
 
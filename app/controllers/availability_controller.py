@@ -0,0 +1,74 @@
+from datetime import timedelta
+from app.extensions import db
+from app.models import ClassSession
+from app.utils.recurrence import expand_series
+from app.utils.serializers import format_date
+
+MINUTES_PER_DAY = 24 * 60
+# A session must end by 23:59, since 24:00 is not a valid end time.
+LAST_MINUTE = MINUTES_PER_DAY - 1
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+def _format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def get_booked_intervals(start_date, end_date, professor_id=None):
+    """
+    Return the booked (date, start_time, end_time) intervals between two dates (inclusive),
+    sorted by date and start time, with one range query on the (date, start_time) index.
+    Occurrences of recurring series are booked too.
+    With professor_id, only that professor's sessions are returned.
+    """
+    query = db.session.query(ClassSession.date, ClassSession.start_time, ClassSession.end_time).filter(
+        ClassSession.date.between(start_date, end_date)
+    )
+    if professor_id is not None:
+        query = query.filter(ClassSession.professor_id == professor_id)
+    booked = query.order_by(ClassSession.date, ClassSession.start_time).all()
+    occurrences = [
+        (occurrence.date, occurrence.start_time, occurrence.end_time)
+        for occurrence in expand_series(start_date, end_date, professor_id)
+    ]
+    if occurrences:
+        booked = sorted(booked + occurrences, key=lambda interval: (interval[0], interval[1]))
+    return booked
+
+def find_open_slots(start_date, end_date, window, duration, booked):
+    """
+    Sweep the days from start_date to end_date once, together with the booked
+    intervals (sorted by date and start time), and return the open intervals
+    of at least 'duration' minutes inside the rule window.
+    'window' is (weekdays, start, end) from ScheduleRules.window; None means unconstrained.
+    Returns a list of {"date", "start", "end"} dicts in chronological order.
+    """
+    weekdays, window_start, window_end = window
+    open_from = _minutes(window_start) if window_start is not None else 0
+    open_until = _minutes(window_end) if window_end is not None else LAST_MINUTE
+
+    slots = []
+    position = 0
+    day = start_date
+    while day <= end_date:
+        # Skip the bookings of days before this one (none, when sorted), then walk this day's.
+        day_bookings = []
+        while position < len(booked) and booked[position][0] <= day:
+            if booked[position][0] == day:
+                day_bookings.append(booked[position])
+            position += 1
+        if weekdays is None or day.weekday() in weekdays:
+            cursor = open_from
+            for _, booked_start, booked_end in day_bookings:
+                start, end = _minutes(booked_start), _minutes(booked_end)
+                if start > cursor:
+                    slots.append((day, cursor, min(start, open_until)))
+                cursor = max(cursor, end)
+            slots.append((day, cursor, open_until))
+        day += timedelta(days=1)
+
+    return [
+        {"date": format_date(day), "start": _format_minutes(start), "end": _format_minutes(end)}
+        for day, start, end in slots
+        if end - start >= duration
+    ]
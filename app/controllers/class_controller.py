@@ -1,35 +1,64 @@
-from flask import abort, jsonify
-from datetime import datetime
-from app.extensions import db
-from app.models import ClassSession
-from app.utils.validators import is_valid_session_schedule
+from flask import abort, current_app, jsonify
+from app.extensions import db, schedule_cache, schedule_events
+from app.models import ClassSession, SeriesException
+from app.utils.search import index_sessions, needs_index_sync, unindex_sessions
+from app.utils.changes import next_change_seq, pending_change_seq, record_deletions, stamp_pending
+from app.utils.recurrence import find_series_conflicts
+from app.utils.conflicts import find_batch_conflicts, find_conflicts, lock_schedule_day, lock_schedule_days
+from app.utils.validators import SessionInput, get_schedule_rules
 from app.utils.response_formatter import success_response, error_response
 
+
+def _conflict_scope(professor_id):
+    """Return the professor to restrict overlap checks to, or None for a global check."""
+    if current_app.config["SESSION_CONFLICT_SCOPE"] == "professor":
+        return professor_id
+    return None
+
+
+def _conflict_response(conflicts, series_conflicts=()):
+    return error_response(
+        "The session overlaps existing class sessions.",
+        409,
+        {"conflicting_session_ids": conflicts, "conflicting_series_ids": list(series_conflicts)}
+    )
+
 def create_class_session(data):
     """
     Create a new class session after validating schedule constraints.
     """
-    valid, message = is_valid_session_schedule(
-        data["session_type"],
-        data["date"],
-        data["start_time"],
-        data["end_time"]
-    )
+    session_input, message = SessionInput.from_dict(data)
+    if session_input is None:
+        return error_response(message, 400)
+    valid, message = get_schedule_rules().check(session_input)
     if not valid:
         return error_response(message, 400)
     
     try:
-        new_session = ClassSession(
-            title=data["title"],
-            description=data.get("description", ""),
-            date=datetime.strptime(data["date"], "%d-%m-%Y").date(),
-            start_time=datetime.strptime(data["start_time"], "%H:%M").time(),
-            end_time=datetime.strptime(data["end_time"], "%H:%M").time(),
-            professor_id=data["professor_id"],
-            session_type=data["session_type"]
+        new_session = ClassSession(**session_input.values())
+        lock_schedule_day(new_session.date)
+        conflicts = find_conflicts(
+            new_session.date,
+            new_session.start_time,
+            new_session.end_time,
+            professor_id=_conflict_scope(new_session.professor_id)
         )
+        series_conflicts = find_series_conflicts(
+            new_session.date,
+            new_session.start_time,
+            new_session.end_time,
+            professor_id=_conflict_scope(new_session.professor_id)
+        )
+        if conflicts or series_conflicts:
+            db.session.rollback()
+            return _conflict_response(conflicts, series_conflicts)
+        new_session.change_seq = next_change_seq()
         db.session.add(new_session)
+        db.session.flush()
+        index_sessions([(new_session.id, new_session.title, new_session.description)], replace=False)
         db.session.commit()
+        schedule_cache.invalidate(new_session.date)
+        schedule_events.publish(new_session.date)
         return success_response("Class session created successfully.", {"id": new_session.id}, 201)
     except Exception as e:
         db.session.rollback()
@@ -38,32 +67,52 @@ def create_class_session(data):
 def update_class_session(session_id, data):
     """
     Update an existing class session after validating any changes in schedule.
+    Fields missing from 'data' keep their stored values.
     """
-    session = db.session.get(ClassSession, session_id)
+    # A locking read: unlike a plain read, it does not fix the MySQL snapshot before the date locks.
+    session = db.session.get(ClassSession, session_id, with_for_update=True)
     if session is None:
         abort(404, description="Class session not found for update.")
-    date_str = data.get("date", session.date.isoformat())
-    start_time_str = data.get("start_time", session.start_time.strftime("%H:%M"))
-    end_time_str = data.get("end_time", session.end_time.strftime("%H:%M"))
-    session_type = data.get("session_type", session.session_type)
-    
-    valid, message = is_valid_session_schedule(session_type, date_str, start_time_str, end_time_str)
+    session_input, message = SessionInput.from_dict(data, defaults=SessionInput.from_model(session))
+    if session_input is None:
+        return error_response(message, 400)
+    valid, message = get_schedule_rules().check(session_input)
     if not valid:
         return error_response(message, 400)
     
     try:
-        session.title = data.get("title", session.title)
-        session.description = data.get("description", session.description)
-        if "date" in data:
-            session.date = datetime.strptime(data["date"], "%d-%m-%Y").date()
-        if "start_time" in data:
-            session.start_time = datetime.strptime(data["start_time"], "%H:%M").time()
-        if "end_time" in data:
-            session.end_time = datetime.strptime(data["end_time"], "%H:%M").time()
-        session.professor_id = data.get("professor_id", session.professor_id)
-        session.session_type = session_type
-        
+        old_date = session.date
+        with db.session.no_autoflush:
+            for field, value in session_input.values().items():
+                setattr(session, field, value)
+            session.version = session.version + 1
+
+            # Lock both dates in a fixed order so two moves in opposite directions cannot deadlock.
+            for day in sorted({old_date, session.date}):
+                lock_schedule_day(day)
+            conflicts = find_conflicts(
+                session.date,
+                session.start_time,
+                session.end_time,
+                professor_id=_conflict_scope(session.professor_id),
+                exclude_id=session.id
+            )
+            series_conflicts = find_series_conflicts(
+                session.date,
+                session.start_time,
+                session.end_time,
+                professor_id=_conflict_scope(session.professor_id)
+            )
+        if conflicts or series_conflicts:
+            db.session.rollback()
+            return _conflict_response(conflicts, series_conflicts)
+
+        with db.session.no_autoflush:
+            session.change_seq = next_change_seq()
+        index_sessions([(session.id, session.title, session.description)])
         db.session.commit()
+        schedule_cache.invalidate(old_date, session.date)
+        schedule_events.publish(old_date, session.date)
         return success_response("Class session updated successfully.", {"id": session.id}, 200)
     except Exception as e:
         db.session.rollback()
@@ -71,15 +120,103 @@ def update_class_session(session_id, data):
 
 def delete_class_session(session_id):
     """
-    Delete a class session.
+    Delete a class session. If it replaced a moved series occurrence, that occurrence stays cancelled.
     """
-    session = db.session.get(ClassSession, session_id)
+    session = db.session.get(ClassSession, session_id, with_for_update=True)
     if session is None:
         abort(404, description="Class session not found for deletion.")
     try:
+        session_date = session.date
+        lock_schedule_day(session_date)
+        unindex_sessions([session.id])
+        db.session.query(SeriesException).filter(SeriesException.session_id == session.id).update(
+            {"session_id": None}, synchronize_session=False
+        )
+        record_deletions([session.id], next_change_seq())
         db.session.delete(session)
         db.session.commit()
+        schedule_cache.invalidate(session_date)
+        schedule_events.publish(session_date)
         return success_response("Class session deleted successfully.", {}, 200)
     except Exception as e:
         db.session.rollback()
         return error_response("An error occurred while deleting the class session.", 500)
+
+def bulk_create_class_sessions(rows, mode, errors=None):
+    """
+    Create many class sessions in a single transaction.
+    'rows' is a list of (row_number, data) pairs. In "atomic" mode any invalid row
+    rejects the whole import; in "best_effort" mode invalid rows are skipped.
+    Errors are reported per row either way.
+    """
+    errors = list(errors or [])
+    parsed_rows = []
+    for row, data in rows:
+        session_input, message = SessionInput.from_dict(data)
+        if session_input is None:
+            errors.append({"row": row, "error": message})
+        else:
+            parsed_rows.append((row, session_input))
+
+    valid_rows = []
+    messages = get_schedule_rules().check_batch([session_input for _, session_input in parsed_rows])
+    for (row, session_input), message in zip(parsed_rows, messages):
+        if message:
+            errors.append({"row": row, "error": message})
+        else:
+            valid_rows.append((row, session_input.values()))
+
+    if errors and mode == "atomic":
+        errors.sort(key=lambda error: error["row"])
+        return error_response("No class sessions were created.", 400, {"errors": errors})
+
+    try:
+        lock_schedule_days(values["date"] for _, values in valid_rows)
+        conflicts = find_batch_conflicts(
+            [(row, values["date"], values["start_time"], values["end_time"], values["professor_id"])
+             for row, values in valid_rows],
+            per_professor=current_app.config["SESSION_CONFLICT_SCOPE"] == "professor"
+        )
+        for row, conflict in conflicts.items():
+            errors.append({
+                "row": row,
+                "error": "The session overlaps existing class sessions.",
+                "conflicting_session_ids": conflict["session_ids"],
+                "conflicting_series_ids": conflict["series_ids"],
+                "conflicting_rows": conflict["rows"]
+            })
+        errors.sort(key=lambda error: error["row"])
+        if conflicts and mode == "atomic":
+            db.session.rollback()
+            return error_response("No class sessions were created.", 409, {"errors": errors})
+
+        to_insert = [values for row, values in valid_rows if row not in conflicts]
+        if not to_insert:
+            db.session.rollback()
+            return error_response("No class sessions were created.", 400, {"errors": errors})
+        placeholder = pending_change_seq()
+        for values in to_insert:
+            values["change_seq"] = placeholder
+        chunk_size = current_app.config["BULK_INSERT_CHUNK_SIZE"]
+        insert = ClassSession.__table__.insert()
+        sync_index = needs_index_sync()
+        if sync_index:
+            insert = insert.returning(ClassSession.id, ClassSession.title, ClassSession.description)
+        for start in range(0, len(to_insert), chunk_size):
+            result = db.session.execute(insert, to_insert[start:start + chunk_size])
+            if sync_index:
+                index_sessions(result.all(), replace=False)
+        stamp_pending(placeholder)
+        db.session.commit()
+        dates = {values["date"] for values in to_insert}
+        schedule_cache.invalidate(*dates)
+        schedule_events.publish(*dates)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while importing class sessions.", 500)
+
+    return success_response(
+        "Bulk import completed.",
+        {"created": len(to_insert), "failed": len(errors), "errors": errors},
+        201
+    )
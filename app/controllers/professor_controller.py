@@ -0,0 +1,77 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app.extensions import db
+from app.models import ClassSession
+from app.utils.pagination import keyset_after
+from app.utils.recurrence import expand_series, merge_page
+from app.utils.serializers import format_date, session_columns
+from app.utils.sql_functions import minutes_between, week_start
+
+PROFESSOR_KEYSET = (ClassSession.date, ClassSession.start_time, ClassSession.id)
+
+def get_professor_sessions(professor_id, start_date, end_date, fields, limit, position=None):
+    """
+    Retrieve up to limit + 1 of a professor's sessions, including occurrences of
+    their series, between two dates (inclusive), ordered by date and start time,
+    after the keyset 'position' if given. Returns (keyset, values, series_id)
+    tuples as merge_page does; the extra one tells whether there is a next page.
+    Stored sessions are served by the (professor_id, date) index.
+    """
+    keyset = list(PROFESSOR_KEYSET)
+    query = (
+        db.session.query(*keyset, *session_columns(fields))
+        .filter(ClassSession.professor_id == professor_id, ClassSession.date.between(start_date, end_date))
+        .order_by(*keyset)
+    )
+    if position is not None:
+        query = query.filter(keyset_after(keyset, position))
+    occurrences = expand_series(start_date, end_date, professor_id)
+    return merge_page(query.limit(limit + 1).all(), position, fields, limit, occurrences=occurrences)
+
+def get_professor_stats(professor_id, start_date, end_date):
+    """
+    Count a professor's sessions and scheduled minutes per week and session type
+    between two dates (inclusive): stored sessions with a single GROUP BY in the
+    database, occurrences of their series as they are expanded.
+    Weeks start on Monday and are listed in order.
+    """
+    week = week_start(ClassSession.date).label("week_start")
+    rows = (
+        db.session.query(
+            week,
+            ClassSession.session_type,
+            db.func.count(ClassSession.id),
+            db.func.coalesce(db.func.sum(minutes_between(ClassSession.start_time, ClassSession.end_time)), 0),
+        )
+        .filter(ClassSession.professor_id == professor_id, ClassSession.date.between(start_date, end_date))
+        .group_by(week, ClassSession.session_type)
+        .order_by(week, ClassSession.session_type)
+        .all()
+    )
+
+    totals = defaultdict(lambda: [0, 0])  # (week, session_type) -> [sessions, minutes]
+    for week_date, session_type, sessions, minutes in rows:
+        totals[week_date, session_type] = [sessions, int(minutes)]
+    for occurrence in expand_series(start_date, end_date, professor_id):
+        total = totals[occurrence.date - timedelta(days=occurrence.date.weekday()), occurrence.session_type]
+        total[0] += 1
+        total[1] += (datetime.combine(occurrence.date, occurrence.end_time)
+                     - datetime.combine(occurrence.date, occurrence.start_time)) // timedelta(minutes=1)
+
+    weeks = {}
+    for (week_date, session_type), (sessions, minutes) in sorted(totals.items()):
+        entry = weeks.setdefault(week_date, {"week_start": format_date(week_date), "sessions": 0, "minutes": 0,
+                                             "session_types": {}})
+        entry["session_types"][session_type] = {"sessions": sessions, "minutes": minutes}
+        entry["sessions"] += sessions
+        entry["minutes"] += minutes
+
+    weeks = list(weeks.values())
+    return {
+        "professor_id": professor_id,
+        "from": format_date(start_date),
+        "to": format_date(end_date),
+        "sessions": sum(entry["sessions"] for entry in weeks),
+        "minutes": sum(entry["minutes"] for entry in weeks),
+        "weeks": weeks,
+    }
@@ -1,15 +1,88 @@
 from datetime import datetime
-from app.models import ClassSession
+from app.extensions import db
+from app.models import ClassSession, ScheduleDay
+from app.utils.serializers import session_columns
 
-def get_schedule_for_date(date_str):
+def parse_schedule_date(date_str):
     """
-    Retrieve class sessions for the specified date.
-    Returns a tuple: (sessions, error_message).
+    Parse a DD-MM-YYYY date.
+    Returns a tuple: (date, error_message).
     """
     try:
-        query_date = datetime.strptime(date_str, "%d-%m-%Y").date()
+        return datetime.strptime(date_str, "%d-%m-%Y").date(), ""
     except ValueError:
         return None, "Invalid date format. Use DD-MM-YYYY."
-    
-    sessions = ClassSession.query.filter_by(date=query_date).all()
-    return sessions, ""
+
+def parse_date_range(start_str, end_str, max_days):
+    """
+    Parse an inclusive 'from'/'to' pair of DD-MM-YYYY dates spanning at most max_days.
+    Returns a tuple: (start_date, end_date, error_message).
+    """
+    start_date, message = parse_schedule_date(start_str)
+    if start_date is None:
+        return None, None, f"'from': {message}"
+    end_date, message = parse_schedule_date(end_str)
+    if end_date is None:
+        return None, None, f"'to': {message}"
+    if end_date < start_date:
+        return None, None, "'to' must not be before 'from'."
+    if (end_date - start_date).days + 1 > max_days:
+        return None, None, f"The date range cannot span more than {max_days} days."
+    return start_date, end_date, ""
+
+def get_schedule_version(query_date):
+    """
+    Return the version of a date's schedule; it changes on every write to that date.
+    Dates that were never written to are at version 0.
+    """
+    version = db.session.query(ScheduleDay.version).filter(ScheduleDay.date == query_date).scalar()
+    return version or 0
+
+def get_schedules_version():
+    """
+    Return a number that grows on every write to any date.
+    Versions only ever increase, so their sum does too.
+    """
+    return db.session.query(db.func.coalesce(db.func.sum(ScheduleDay.version), 0)).scalar()
+
+def get_schedule_range_version(start_date, end_date):
+    """
+    Return a number that grows on every write to any date in [start_date, end_date].
+    """
+    return db.session.query(db.func.coalesce(db.func.sum(ScheduleDay.version), 0)).filter(
+        ScheduleDay.date.between(start_date, end_date)
+    ).scalar()
+
+def get_schedule_for_date(date_str):
+    """
+    Retrieve class sessions for the specified date as row tuples of SESSION_FIELDS.
+    Returns a tuple: (sessions, error_message).
+    """
+    query_date, message = parse_schedule_date(date_str)
+    if query_date is None:
+        return None, message
+    return get_schedule_for_day(query_date), ""
+
+def get_schedule_for_day(query_date):
+    """
+    Retrieve class sessions on an already parsed date as row tuples of SESSION_FIELDS,
+    ordered by start time.
+    """
+    return (
+        db.session.query(*session_columns())
+        .filter(ClassSession.date == query_date)
+        .order_by(ClassSession.start_time, ClassSession.id)
+        .all()
+    )
+
+def get_schedule_for_range(start_date, end_date):
+    """
+    Retrieve class sessions between two dates (inclusive) as row tuples of SESSION_FIELDS,
+    ordered by date and start time. Uses a single range query.
+    """
+    return (
+        db.session.query(*session_columns())
+        .filter(ClassSession.date.between(start_date, end_date))
+        .order_by(ClassSession.date, ClassSession.start_time, ClassSession.id)
+        .all()
+    )
@@ -0,0 +1,287 @@
+from flask import abort, current_app
+from app.extensions import db, schedule_cache, schedule_events
+from app.models import ClassSession, SeriesException, SessionSeries
+from app.utils.changes import next_change_seq, record_deletions
+from app.utils.conflicts import find_batch_conflicts, find_conflicts, lock_schedule_days
+from app.utils.recurrence import find_series_conflicts
+from app.utils.response_formatter import success_response, error_response
+from app.utils.search import index_sessions, unindex_sessions
+from app.utils.serializers import format_date, format_time
+from app.utils.validators import FORMAT_ERROR, SeriesInput, SessionInput, get_schedule_rules, parse_date
+
+
+def _per_professor():
+    return current_app.config["SESSION_CONFLICT_SCOPE"] == "professor"
+
+
+def _get_series_or_404(series_id, for_update=False):
+    """
+    Writers pass for_update=True: a locking read does not fix the MySQL snapshot,
+    so their conflict checks, run after lock_schedule_days, see the latest sessions.
+    """
+    series = db.session.get(SessionSeries, series_id, with_for_update=for_update)
+    if series is None:
+        abort(404, description="Session series not found.")
+    return series
+
+
+def _parse_occurrence_date(series, date_str):
+    """
+    Return (date, None), or (None, error response): 400 if the date is malformed,
+    404 if the series does not run on it.
+    """
+    try:
+        day = parse_date(date_str)
+    except ValueError:
+        return None, error_response(FORMAT_ERROR, 400)
+    if day not in SeriesInput.from_model(series).occurrence_dates():
+        return None, error_response("The series has no occurrence on that date.", 404)
+    return day, None
+
+
+def _exception_dates(series_id):
+    """Dates of the series' cancelled or moved occurrences."""
+    return {
+        day for day, in db.session.query(SeriesException.occurrence_date).filter(SeriesException.series_id == series_id)
+    }
+
+
+def _series_conflicts(series_input, exclude_series_id=None, skip_dates=()):
+    """
+    Check every occurrence of a series, except those on skip_dates (cancelled or
+    moved), against sessions and other series in one batch.
+    Returns a list of {"date", "conflicting_session_ids", "conflicting_series_ids"} dicts.
+    """
+    candidates = [
+        (day, day, series_input.start_time, series_input.end_time, series_input.professor_id)
+        for day in series_input.occurrence_dates() if day not in skip_dates
+    ]
+    conflicts = find_batch_conflicts(candidates, per_professor=_per_professor(), exclude_series_id=exclude_series_id)
+    return [
+        {"date": format_date(day), "conflicting_session_ids": conflict["session_ids"],
+         "conflicting_series_ids": conflict["series_ids"]}
+        for day, conflict in sorted(conflicts.items())
+    ]
+
+
+def serialize_series(series):
+    exceptions = db.session.query(SeriesException).filter(
+        SeriesException.series_id == series.id
+    ).order_by(SeriesException.occurrence_date).all()
+    series_input = SeriesInput.from_model(series)
+    return {
+        "id": series.id,
+        "title": series.title,
+        "description": series.description,
+        "start_date": format_date(series.start_date),
+        "end_date": format_date(series.end_date),
+        "weekdays": sorted(series_input.weekdays),
+        "start_time": format_time(series.start_time),
+        "end_time": format_time(series.end_time),
+        "professor_id": series.professor_id,
+        "session_type": series.session_type,
+        "occurrences": len(series_input.occurrence_dates()) - len(exceptions),
+        "exceptions": [
+            {"date": format_date(exception.occurrence_date), "moved_to_session_id": exception.session_id}
+            for exception in exceptions
+        ],
+    }
+
+
+def get_series(series_id):
+    """
+    Retrieve a series with its exceptions.
+    """
+    return success_response("Session series retrieved.", serialize_series(_get_series_or_404(series_id)), 200)
+
+
+def create_series(data):
+    """
+    Create a recurring session series after validating every weekday against the
+    schedule rules and every occurrence against existing sessions and series.
+    A whole term is one row; occurrences are expanded when schedules are read.
+    """
+    series_input, message = SeriesInput.from_dict(data, max_days=current_app.config["SERIES_MAX_DAYS"])
+    if series_input is None:
+        return error_response(message, 400)
+    valid, message = series_input.check_rules()
+    if not valid:
+        return error_response(message, 400)
+    dates = series_input.occurrence_dates()
+    if not dates:
+        return error_response("The series has no occurrences between start_date and end_date.", 400)
+
+    try:
+        lock_schedule_days(dates)
+        conflicts = _series_conflicts(series_input)
+        if conflicts:
+            db.session.rollback()
+            return error_response("The series overlaps existing sessions.", 409, {"conflicts": conflicts})
+        series = SessionSeries(**series_input.values())
+        db.session.add(series)
+        db.session.commit()
+        schedule_cache.invalidate(*dates)
+        schedule_events.publish(*dates)
+        return success_response("Session series created successfully.", {"id": series.id, "occurrences": len(dates)}, 201)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while creating the session series.", 500)
+
+
+def update_series(series_id, data):
+    """
+    Update a whole series. Fields missing from 'data' keep their stored values.
+    Exceptions stay attached to their dates.
+    """
+    series = _get_series_or_404(series_id, for_update=True)
+    current = SeriesInput.from_model(series)
+    series_input, message = SeriesInput.from_dict(data, defaults=current, max_days=current_app.config["SERIES_MAX_DAYS"])
+    if series_input is None:
+        return error_response(message, 400)
+    valid, message = series_input.check_rules()
+    if not valid:
+        return error_response(message, 400)
+    dates = series_input.occurrence_dates()
+    if not dates:
+        return error_response("The series has no occurrences between start_date and end_date.", 400)
+
+    try:
+        affected = set(current.occurrence_dates()) | set(dates)
+        lock_schedule_days(affected)
+        conflicts = _series_conflicts(series_input, exclude_series_id=series.id, skip_dates=_exception_dates(series.id))
+        if conflicts:
+            db.session.rollback()
+            return error_response("The series overlaps existing sessions.", 409, {"conflicts": conflicts})
+        for field, value in series_input.values().items():
+            setattr(series, field, value)
+        series.version = series.version + 1
+        db.session.commit()
+        schedule_cache.invalidate(*affected)
+        schedule_events.publish(*affected)
+        return success_response("Session series updated successfully.", {"id": series.id, "occurrences": len(dates)}, 200)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while updating the session series.", 500)
+
+
+def delete_series(series_id):
+    """
+    Delete a series and its exceptions. Sessions that replaced moved occurrences are kept.
+    """
+    series = _get_series_or_404(series_id, for_update=True)
+    try:
+        dates = SeriesInput.from_model(series).occurrence_dates()
+        lock_schedule_days(dates)
+        db.session.query(SeriesException).filter(SeriesException.series_id == series.id).delete()
+        db.session.delete(series)
+        db.session.commit()
+        schedule_cache.invalidate(*dates)
+        schedule_events.publish(*dates)
+        return success_response("Session series deleted successfully.", {}, 200)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while deleting the session series.", 500)
+
+
+def change_occurrence(series_id, date_str, data):
+    """
+    Cancel one occurrence ({"cancelled": true}) or move it: the occurrence is
+    cancelled and replaced by a one-off session with the given changes
+    (date, start_time, end_time, title, ...), validated like any new session.
+    """
+    series = _get_series_or_404(series_id, for_update=True)
+    day, error = _parse_occurrence_date(series, date_str)
+    if error is not None:
+        return error
+    if not isinstance(data, dict):
+        return error_response("Request body must be a JSON object.", 400)
+
+    replacement = None
+    if not data.get("cancelled"):
+        occurrence = SeriesInput.from_model(series).first_occurrence_input()
+        occurrence = SessionInput(**dict(occurrence.values(), date=day))
+        replacement, message = SessionInput.from_dict(data, defaults=occurrence)
+        if replacement is None:
+            return error_response(message, 400)
+        valid, message = get_schedule_rules().check(replacement)
+        if not valid:
+            return error_response(message, 400)
+
+    try:
+        affected = {day} | ({replacement.date} if replacement else set())
+        lock_schedule_days(affected)
+        if db.session.get(SeriesException, (series.id, day)) is not None:
+            db.session.rollback()
+            return error_response("That occurrence was already cancelled or moved.", 409)
+        exception = SeriesException(series_id=series.id, occurrence_date=day)
+        db.session.add(exception)
+        db.session.flush()
+        if replacement is not None:
+            professor_id = replacement.professor_id if _per_professor() else None
+            conflicts = find_conflicts(replacement.date, replacement.start_time, replacement.end_time, professor_id)
+            series_conflicts = find_series_conflicts(
+                replacement.date, replacement.start_time, replacement.end_time, professor_id
+            )
+            if conflicts or series_conflicts:
+                db.session.rollback()
+                return error_response(
+                    "The session overlaps existing class sessions.", 409,
+                    {"conflicting_session_ids": conflicts, "conflicting_series_ids": series_conflicts}
+                )
+            session = ClassSession(**replacement.values(), change_seq=next_change_seq())
+            db.session.add(session)
+            db.session.flush()
+            index_sessions([(session.id, session.title, session.description)], replace=False)
+            exception.session_id = session.id
+        db.session.commit()
+        schedule_cache.invalidate(*affected)
+        schedule_events.publish(*affected)
+        if replacement is None:
+            return success_response("Occurrence cancelled.", {"series_id": series.id}, 200)
+        return success_response("Occurrence moved.", {"series_id": series.id, "session_id": exception.session_id}, 200)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while changing the occurrence.", 500)
+
+
+def restore_occurrence(series_id, date_str):
+    """
+    Undo a cancellation or move: the occurrence takes place again and the session that replaced it is deleted.
+    """
+    series = _get_series_or_404(series_id, for_update=True)
+    day, error = _parse_occurrence_date(series, date_str)
+    if error is not None:
+        return error
+    exception = db.session.get(SeriesException, (series.id, day), with_for_update=True)
+    if exception is None:
+        abort(404, description="That occurrence was not cancelled or moved.")
+
+    try:
+        replacement = None
+        if exception.session_id:
+            replacement = db.session.get(ClassSession, exception.session_id, with_for_update=True)
+        affected = {day} | ({replacement.date} if replacement else set())
+        lock_schedule_days(affected)
+        if replacement is not None:
+            unindex_sessions([replacement.id])
+            db.session.delete(replacement)
+        db.session.delete(exception)
+        db.session.flush()
+        professor_id = series.professor_id if _per_professor() else None
+        conflicts = find_conflicts(day, series.start_time, series.end_time, professor_id)
+        series_conflicts = find_series_conflicts(day, series.start_time, series.end_time, professor_id, series.id)
+        if conflicts or series_conflicts:
+            db.session.rollback()
+            return error_response(
+                "The occurrence overlaps sessions scheduled since it was cancelled.", 409,
+                {"conflicting_session_ids": conflicts, "conflicting_series_ids": series_conflicts}
+            )
+        if replacement is not None:
+            record_deletions([replacement.id], next_change_seq())
+        db.session.commit()
+        schedule_cache.invalidate(*affected)
+        schedule_events.publish(*affected)
+        return success_response("Occurrence restored.", {"series_id": series.id}, 200)
+    except Exception as e:
+        db.session.rollback()
+        return error_response("An error occurred while restoring the occurrence.", 500)
@@ -1,3 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
+from app.utils.admission import AdmissionControl
+from app.utils.cache import ScheduleCache
+from app.utils.compression import ResponseCompression
+from app.utils.db_routing import RoutingSession
+from app.utils.events import ScheduleEvents
+from app.utils.hashing import PasswordHasher
+from app.utils.metrics import RequestMetrics
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+schedule_cache = ScheduleCache()
+schedule_events = ScheduleEvents()
+password_hasher = PasswordHasher()
+request_metrics = RequestMetrics()
+response_compression = ResponseCompression()
+admission_control = AdmissionControl()
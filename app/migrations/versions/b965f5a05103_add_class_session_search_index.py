@@ -0,0 +1,43 @@
+"""Add class session full-text search index
+
+Revision ID: b965f5a05103
+Revises: 55816ebbad99
+Create Date: 2026-10-18 10:20:11.402113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b965f5a05103'
+down_revision = '55816ebbad99'
+branch_labels = None
+depends_on = None
+
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS class_sessions_fts USING fts5("
+            "title, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        op.execute(
+            "INSERT INTO class_sessions_fts (rowid, title, description) "
+            "SELECT id, title, coalesce(description, '') FROM class_sessions"
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        op.execute("CREATE FULLTEXT INDEX ix_class_sessions_fulltext ON class_sessions (title, description)")
+    elif dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_class_sessions_fulltext ON class_sessions USING gin (({POSTGRES_DOCUMENT}))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS class_sessions_fts")
+    else:
+        op.drop_index('ix_class_sessions_fulltext', table_name='class_sessions')
@@ -1,5 +1,10 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-from app.extensions import db
+from datetime import datetime, timezone
+from app.extensions import db, password_hasher
+
+
+def utcnow():
+    """The current UTC time as a naive datetime, the way DateTime columns store it."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 class User(db.Model):
@@ -9,15 +14,24 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
 
-    def __init__(self, email, password):
+    def __init__(self, email, password=None, password_hash=None):
+        # A plaintext password is hashed like at registration: PASSWORD_HASH_METHOD, bounded by the hashing pool.
         self.email = email
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hash if password_hash is not None else password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
 class ClassSession(db.Model):
     __tablename__ = 'class_sessions'
+    __table_args__ = (
+        # Daily schedule lookups (and their ordering by start time)
+        db.Index('ix_class_sessions_date_start_time', 'date', 'start_time'),
+        # Per-professor lookups by date
+        db.Index('ix_class_sessions_professor_id_date', 'professor_id', 'date'),
+        # GET /api/classes/changes: rows changed after a sync token
+        db.Index('ix_class_sessions_change_seq_id', 'change_seq', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -28,6 +42,103 @@ class ClassSession(db.Model):
     professor_id = db.Column(db.Integer, nullable=False)
     # Session types: "class", "qa", "demo"
     session_type = db.Column(db.String(20), nullable=False, default='class')
+    # Incremented on every update; used to build the session's ETag
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    # Change sequence number of the last write (see app.utils.changes); 0 for rows never written through the API
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
     
     def __repr__(self):
         return f"<ClassSession {self.title} on {self.date} ({self.session_type})>"
+
+
+class ScheduleDay(db.Model):
+    """
+    One row per date that has ever been written to. Every write to a date bumps
+    its version inside the writer's transaction, which serializes concurrent
+    writers for the same date across processes.
+    """
+    __tablename__ = 'schedule_days'
+
+    date = db.Column(db.Date, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<ScheduleDay {self.date} v{self.version}>"
+
+
+class ClassSessionTombstone(db.Model):
+    """
+    Left behind by a deleted class session so GET /api/classes/changes can
+    report the deletion to clients that synced before it.
+    """
+    __tablename__ = 'class_session_tombstones'
+    __table_args__ = (
+        db.Index('ix_class_session_tombstones_change_seq_id', 'change_seq', 'id'),
+    )
+
+    # The deleted session's id
+    id = db.Column(db.Integer, primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    change_seq = db.Column(db.BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<ClassSessionTombstone {self.id} #{self.change_seq}>"
+
+
+class ChangeCounter(db.Model):
+    """
+    Named counters bumped inside writers' transactions. The row stays locked
+    until the writer commits, so numbers become visible in the order they were taken.
+    """
+    __tablename__ = 'change_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ChangeCounter {self.name}={self.value}>"
+
+
+class SessionSeries(db.Model):
+    """
+    A recurring session: one occurrence on every selected weekday from
+    start_date to end_date (inclusive). Occurrences are not stored; they are
+    expanded for the requested window when schedules are read.
+    """
+    __tablename__ = 'session_series'
+    __table_args__ = (
+        # Series overlapping a date window
+        db.Index('ix_session_series_start_date_end_date', 'start_date', 'end_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.String(200))
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    # Bit n set means the series runs on weekday n (Monday is 0)
+    weekdays = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    professor_id = db.Column(db.Integer, nullable=False)
+    session_type = db.Column(db.String(20), nullable=False, default='class')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    def __repr__(self):
+        return f"<SessionSeries {self.title} {self.start_date}..{self.end_date}>"
+
+
+class SeriesException(db.Model):
+    """
+    An occurrence of a series that does not take place as planned. A moved
+    occurrence points to the one-off ClassSession that replaces it.
+    """
+    __tablename__ = 'session_series_exceptions'
+
+    series_id = db.Column(db.Integer, db.ForeignKey('session_series.id', ondelete='CASCADE'), primary_key=True)
+    occurrence_date = db.Column(db.Date, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('class_sessions.id', ondelete='SET NULL'))
+
+    def __repr__(self):
+        return f"<SeriesException {self.series_id} {self.occurrence_date}>"
@@ -0,0 +1,48 @@
+from flask import Blueprint, current_app, request, jsonify
+from app.controllers.availability_controller import find_open_slots, get_booked_intervals
+from app.controllers.schedule_controller import get_schedule_range_version, parse_date_range
+from app.utils.conditional import make_etag, not_modified, query_fingerprint
+from app.utils.db_routing import read_only
+from app.utils.response_formatter import error_response
+from app.utils.validators import get_schedule_rules
+
+availability_bp = Blueprint('availability', __name__)
+
+@availability_bp.route('/availability', methods=['GET'])
+@read_only
+def get_availability():
+    """
+    List the open intervals where a session of the given type and duration can be scheduled.
+    Query parameters: ?from=DD-MM-YYYY&to=DD-MM-YYYY&session_type=class&duration=60[&professor_id=N]
+    Intervals respect the session type's weekdays and hours and skip booked sessions.
+    professor_id is required when SESSION_CONFLICT_SCOPE is "professor", and then only
+    that professor's sessions are treated as booked.
+    """
+    start_date, end_date, message = parse_date_range(
+        request.args.get("from", ""), request.args.get("to", ""), current_app.config["SCHEDULE_MAX_RANGE_DAYS"]
+    )
+    if start_date is None:
+        return error_response(message, 400)
+    session_type = request.args.get("session_type", "").strip().lower()
+    if not session_type:
+        return error_response("Query parameter 'session_type' is required.", 400)
+    duration = request.args.get("duration", "60")
+    if not duration.isdigit() or not 1 <= int(duration) <= 24 * 60:
+        return error_response("Invalid duration. It must be a number of minutes between 1 and 1440.", 400)
+    professor_id = request.args.get("professor_id")
+    if professor_id is not None and not professor_id.isdigit():
+        return error_response("Invalid professor_id. It must be an integer.", 400)
+    per_professor = current_app.config["SESSION_CONFLICT_SCOPE"] == "professor"
+    if per_professor and professor_id is None:
+        return error_response("Query parameter 'professor_id' is required when conflicts are checked per professor.", 400)
+
+    etag = make_etag("availability", query_fingerprint(), get_schedule_range_version(start_date, end_date))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    booked = get_booked_intervals(start_date, end_date, int(professor_id) if per_professor else None)
+    slots = find_open_slots(start_date, end_date, get_schedule_rules().window(session_type), int(duration), booked)
+    response = jsonify(slots)
+    response.set_etag(etag)
+    return response, 200
@@ -1,59 +1,291 @@
-from flask import Blueprint, request, abort, jsonify
+import csv
+import io
+from flask import Blueprint, Response, current_app, request, abort, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required 
 from datetime import datetime
+from sqlalchemy import select
 from app.models import ClassSession
 from app.extensions import db
-from app.controllers.class_controller import create_class_session, update_class_session, delete_class_session
+from app.controllers.class_controller import (
+    create_class_session, update_class_session, delete_class_session, bulk_create_class_sessions
+)
 from app.utils.response_formatter import success_response, error_response
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_after, parse_limit, parse_fields
+from app.utils.changes import current_change_seq, decode_change_token, encode_change_token, get_changes
+from app.utils.db_routing import read_only
+from app.utils.metrics import timing
+from app.utils.recurrence import merge_page
+from app.utils.search import search_available, search_sessions, search_terms
+from app.utils.conditional import make_etag, not_modified, query_fingerprint
+from app.controllers.schedule_controller import get_schedules_version, parse_schedule_date
+from app.utils.serializers import (
+    SESSION_FIELDS, compile_session_formatter, compile_session_serializer, serialize_sessions, session_columns
+)
 
 classes_bp = Blueprint('classes', __name__)
 
 @classes_bp.route('/classes', methods=['GET'])
+@read_only
 def get_classes():
-    """Retrieve all class sessions."""
-    sessions = ClassSession.query.all()
-    sessions_list = [{
-        "id": s.id,
-        "title": s.title,
-        "description": s.description,
-        "date": s.date.strftime("%d-%m-%Y"),
-        "start_time": s.start_time.strftime("%H:%M"),
-        "end_time": s.end_time.strftime("%H:%M"),
-        "professor_id": s.professor_id,
-        "session_type": s.session_type
-    } for s in sessions]
-    return jsonify(sessions_list), 200
+    """
+    Retrieve class sessions ordered by date and start time, one page at a time.
+    Occurrences of recurring series are included, with their series_id.
+    Query parameters: ?limit=N&cursor=<next_cursor>&fields=id,title,...
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Supports If-None-Match; the ETag changes whenever any session is written.
+    """
+    limit, message = parse_limit(
+        request.args.get("limit"),
+        current_app.config["CLASSES_PAGE_SIZE"],
+        current_app.config["CLASSES_MAX_PAGE_SIZE"]
+    )
+    if limit is None:
+        return error_response(message, 400)
+    fields, message = parse_fields(request.args.get("fields"), SESSION_FIELDS)
+    if fields is None:
+        return error_response(message, 400)
+
+    version = get_schedules_version()
+    etag = make_etag("classes", query_fingerprint(), version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    # The keyset columns are always selected so the next cursor can be built.
+    keyset = [ClassSession.date, ClassSession.start_time, ClassSession.id]
+    columns = keyset + session_columns(fields)
+    query = db.session.query(*columns).order_by(*keyset)
+
+    position = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return error_response("Invalid cursor.", 400)
+        query = query.filter(keyset_after(keyset, position))
+
+    # Occurrences of recurring series are merged in; they are never stored as rows.
+    page = merge_page(query.limit(limit + 1).all(), position, fields, limit, version)
+    with timing("serialize"):
+        serialize = compile_session_serializer(tuple(fields))
+        sessions_list = [
+            serialize(values) if series_id is None else dict(serialize(values), series_id=series_id)
+            for _, values, series_id in page[:limit]
+        ]
+        response = jsonify(sessions_list)
+    if len(page) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(*page[limit - 1][0])
+    response.set_etag(etag)
+    return response, 200
+
+@classes_bp.route('/classes/export', methods=['GET'])
+@read_only
+def export_classes():
+    """
+    Stream every class session as NDJSON or CSV.
+    Query parameter: ?format=ndjson (default) or ?format=csv
+    Rows are read from the database in chunks and written out as they arrive.
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return error_response("Invalid format. Use 'ndjson' or 'csv'.", 400)
+
+    stmt = (
+        select(*session_columns())
+        .order_by(ClassSession.date, ClassSession.start_time, ClassSession.id)
+        .execution_options(yield_per=current_app.config["EXPORT_CHUNK_SIZE"])
+    )
+    format_row = compile_session_formatter()
+    serialize = compile_session_serializer()
+    dumps = current_app.json.dumps
+
+    def generate():
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(SESSION_FIELDS)
+            yield buffer.getvalue()
+        result = db.session.execute(stmt)
+        for rows in result.partitions():
+            if export_format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(format_row(row) for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(dumps(serialize(row)) + "\n" for row in rows)
+        result.close()
+
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=class_sessions.{export_format}"
+    return response
+
+@classes_bp.route('/classes/search', methods=['GET'])
+@read_only
+def search_classes():
+    """
+    Full-text search over session titles and descriptions, best matches first.
+    Every word must match, as a prefix of a word in the title or description.
+    Query parameters: ?q=<text>&from=DD-MM-YYYY&to=DD-MM-YYYY&session_type=<type>&limit=N&offset=N
+    """
+    if not search_available():
+        return error_response("Full-text search is not available on this database.", 501)
+    terms = search_terms(request.args.get("q", ""), current_app.config["SEARCH_MAX_TERMS"])
+    if not terms:
+        return error_response("Query parameter 'q' must contain at least one searchable word.", 400)
+    limit, message = parse_limit(
+        request.args.get("limit"),
+        current_app.config["SEARCH_PAGE_SIZE"],
+        current_app.config["SEARCH_MAX_PAGE_SIZE"]
+    )
+    if limit is None:
+        return error_response(message, 400)
+    max_offset = current_app.config["SEARCH_MAX_OFFSET"]
+    offset = request.args.get("offset", "0")
+    if not offset.isdigit() or int(offset) > max_offset:
+        return error_response(f"Invalid offset. It must be an integer between 0 and {max_offset}.", 400)
+
+    filters = []
+    if "from" in request.args:
+        start_date, message = parse_schedule_date(request.args["from"])
+        if start_date is None:
+            return error_response(f"'from': {message}", 400)
+        filters.append(ClassSession.date >= start_date)
+    if "to" in request.args:
+        end_date, message = parse_schedule_date(request.args["to"])
+        if end_date is None:
+            return error_response(f"'to': {message}", 400)
+        filters.append(ClassSession.date <= end_date)
+    if request.args.get("session_type"):
+        filters.append(ClassSession.session_type == request.args["session_type"].lower())
+
+    etag = make_etag("search", query_fingerprint(), get_schedules_version())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    rows = search_sessions(terms, session_columns(), filters, limit, int(offset))
+    response = jsonify(serialize_sessions(rows))
+    response.set_etag(etag)
+    return response, 200
+
+@classes_bp.route('/classes/changes', methods=['GET'])
+@read_only
+def get_changes_since():
+    """
+    Sessions created, updated or deleted after a sync token, oldest change first.
+    Query parameters: ?since=<next_token>&limit=N (without 'since', every current session)
+    Upserts carry the full session and its updated_at; deletions only the id.
+    Keep calling with next_token while has_more is true.
+    Only stored sessions are tracked: occurrences of recurring series are not in the feed.
+    """
+    limit, message = parse_limit(
+        request.args.get("limit"),
+        current_app.config["CHANGES_PAGE_SIZE"],
+        current_app.config["CHANGES_MAX_PAGE_SIZE"]
+    )
+    if limit is None:
+        return error_response(message, 400)
+    position = None
+    if request.args.get("since"):
+        position = decode_change_token(request.args["since"])
+        if position is None:
+            return error_response("Invalid sync token.", 400)
+
+    high_water = current_change_seq()
+    etag = make_etag("changes", query_fingerprint(), high_water)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    changes = get_changes(position, session_columns() + [ClassSession.updated_at], limit, high_water)
+    serialize = compile_session_serializer()
+    items = []
+    for _, session_id, row in changes[:limit]:
+        if row is None:
+            items.append({"id": session_id, "deleted": True})
+        else:
+            items.append(dict(serialize(row[:-1]), updated_at=row[-1].isoformat() + "Z", deleted=False))
+    has_more = len(changes) > limit
+    if has_more:
+        next_token = encode_change_token(*changes[limit - 1][:2])
+    else:
+        # Everything up to high_water has been returned.
+        next_token = encode_change_token(high_water)
+    response = jsonify({"changes": items, "next_token": next_token, "has_more": has_more})
+    response.set_etag(etag)
+    return response, 200
 
 @classes_bp.route('/classes/<int:id>', methods=['GET'])
+@read_only
 def get_class(id):
-    """Retrieve a specific class session by ID."""
-    session = db.session.get(ClassSession, id)
-    if session is None:
+    """
+    Retrieve a specific class session by ID.
+    Supports If-None-Match; the ETag is decided from the row's change_seq alone,
+    which every write moves forward, so a deleted and re-created id never reuses one.
+    """
+    change_seq = db.session.query(ClassSession.change_seq).filter(ClassSession.id == id).scalar()
+    if change_seq is None:
+        abort(404, description="Class session not found.")
+    cached = not_modified(make_etag("session", id, change_seq))
+    if cached is not None:
+        return cached
+
+    row = db.session.query(ClassSession.change_seq, *session_columns()).filter(ClassSession.id == id).first()
+    if row is None:
         abort(404, description="Class session not found.")
-    session_data = {
-        "id": session.id,
-        "title": session.title,
-        "description": session.description,
-        "date": session.date.strftime("%d-%m-%Y"),
-        "start_time": session.start_time.strftime("%H:%M"),
-        "end_time": session.end_time.strftime("%H:%M"),
-        "professor_id": session.professor_id,
-        "session_type": session.session_type
-    }
-    return jsonify(session_data), 200
+    response = jsonify(compile_session_serializer()(row[1:]))
+    response.set_etag(make_etag("session", id, row[0]))
+    return response, 200
 
 @classes_bp.route('/classes', methods=['POST'])
 @jwt_required()
 def create_class():
     """Create a new class session."""
     data = request.get_json()
-    required_fields = ["title", "date", "start_time", "end_time", "professor_id", "session_type"]
-    for field in required_fields:
-        if field not in data:
-            return error_response(f"Missing required field: {field}", 400)
-    
     return create_class_session(data)
 
+@classes_bp.route('/classes/bulk', methods=['POST'])
+@jwt_required()
+def bulk_create_classes():
+    """
+    Create many class sessions in one transaction.
+    Body: a JSON array of sessions, or one session per line with Content-Type application/x-ndjson.
+    Query parameter: ?mode=atomic (default, all or nothing) or ?mode=best_effort (skip invalid rows).
+    """
+    mode = request.args.get("mode", "atomic")
+    if mode not in ("atomic", "best_effort"):
+        return error_response("Invalid mode. Use 'atomic' or 'best_effort'.", 400)
+
+    max_rows = current_app.config["BULK_IMPORT_MAX_ROWS"]
+    errors = []
+    if request.mimetype == "application/x-ndjson":
+        # Rows are numbered by line so errors point at the offending line. The body is read
+        # line by line, so only the parsed rows are held in memory, not the raw body as well.
+        rows = []
+        for index, line in enumerate(request.stream):
+            if len(rows) + len(errors) > max_rows:
+                break
+            if not line.strip():
+                continue
+            try:
+                rows.append((index, current_app.json.loads(line)))
+            except ValueError:
+                errors.append({"row": index, "error": "Invalid JSON."})
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return error_response("Request body must be a JSON array or NDJSON stream of class sessions.", 400)
+        rows = list(enumerate(data))
+
+    if len(rows) + len(errors) > max_rows:
+        return error_response(f"Too many rows. The maximum per request is {max_rows}.", 413)
+    if not rows and not errors:
+        return error_response("Request body contains no class sessions.", 400)
+
+    return bulk_create_class_sessions(rows, mode, errors)
+
 @classes_bp.route('/classes/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_class(id):
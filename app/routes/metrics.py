@@ -0,0 +1,11 @@
+from flask import Blueprint, current_app
+from app.extensions import request_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics for every worker: request latency, response size and SQL usage per route.
+    """
+    return current_app.response_class(request_metrics.render(), mimetype="text/plain; version=0.0.4")
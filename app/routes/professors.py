@@ -0,0 +1,82 @@
+from flask import Blueprint, current_app, request, jsonify
+from app.controllers.professor_controller import get_professor_sessions, get_professor_stats
+from app.controllers.schedule_controller import get_schedule_range_version, parse_date_range
+from app.utils.conditional import make_etag, not_modified, query_fingerprint
+from app.utils.db_routing import read_only
+from app.utils.pagination import decode_cursor, encode_cursor, parse_fields, parse_limit
+from app.utils.response_formatter import error_response
+from app.utils.serializers import SESSION_FIELDS, compile_session_serializer
+
+professors_bp = Blueprint('professors', __name__)
+
+def _parse_range():
+    return parse_date_range(
+        request.args.get("from", ""), request.args.get("to", ""), current_app.config["PROFESSOR_MAX_RANGE_DAYS"]
+    )
+
+@professors_bp.route('/professors/<int:professor_id>/sessions', methods=['GET'])
+@read_only
+def get_sessions(professor_id):
+    """
+    Retrieve a professor's sessions between two dates, ordered by date and start time, one page at a time.
+    Occurrences of the professor's recurring series are included, with their series_id.
+    Query parameters: ?from=DD-MM-YYYY&to=DD-MM-YYYY&limit=N&cursor=<next_cursor>&fields=id,title,...
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    start_date, end_date, message = _parse_range()
+    if start_date is None:
+        return error_response(message, 400)
+    limit, message = parse_limit(
+        request.args.get("limit"),
+        current_app.config["CLASSES_PAGE_SIZE"],
+        current_app.config["CLASSES_MAX_PAGE_SIZE"]
+    )
+    if limit is None:
+        return error_response(message, 400)
+    fields, message = parse_fields(request.args.get("fields"), SESSION_FIELDS)
+    if fields is None:
+        return error_response(message, 400)
+    position = None
+    if request.args.get("cursor"):
+        position = decode_cursor(request.args["cursor"])
+        if position is None:
+            return error_response("Invalid cursor.", 400)
+
+    etag = make_etag("professor", professor_id, query_fingerprint(), get_schedule_range_version(start_date, end_date))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    page = get_professor_sessions(professor_id, start_date, end_date, fields, limit, position)
+    serialize = compile_session_serializer(tuple(fields))
+    response = jsonify([
+        serialize(values) if series_id is None else dict(serialize(values), series_id=series_id)
+        for _, values, series_id in page[:limit]
+    ])
+    if len(page) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(*page[limit - 1][0])
+    response.set_etag(etag)
+    return response, 200
+
+@professors_bp.route('/professors/<int:professor_id>/stats', methods=['GET'])
+@read_only
+def get_stats(professor_id):
+    """
+    Weekly load of a professor between two dates: session counts and scheduled minutes per session type,
+    occurrences of recurring series included.
+    Query parameters: ?from=DD-MM-YYYY&to=DD-MM-YYYY
+    The ETag covers series writes too: they bump the versions of every date they touch.
+    """
+    start_date, end_date, message = _parse_range()
+    if start_date is None:
+        return error_response(message, 400)
+
+    etag = make_etag("professor-stats", professor_id, query_fingerprint(),
+                     get_schedule_range_version(start_date, end_date))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    response = jsonify(get_professor_stats(professor_id, start_date, end_date))
+    response.set_etag(etag)
+    return response, 200
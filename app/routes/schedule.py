@@ -1,33 +1,162 @@
-from flask import Blueprint, request, jsonify
+import time
+from datetime import timedelta
+from flask import Blueprint, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required
-from datetime import datetime
-from app.models import ClassSession
+from app.controllers.schedule_controller import (
+    get_schedule_for_day, get_schedule_for_range, get_schedule_range_version, get_schedule_version,
+    parse_date_range, parse_schedule_date
+)
+from app.extensions import db, schedule_cache, schedule_events
+from app.utils.db_routing import read_only
+from app.utils.metrics import timing
+from app.utils.conditional import make_etag, not_modified
+from app.utils.events import StreamLimitReached
+from app.utils.recurrence import cached_expansion, merge_schedule
+from app.utils.serializers import format_date
 
 schedule_bp = Blueprint('schedule', __name__)
 
 @schedule_bp.route('/schedule', methods=['GET'])
+@read_only
 def get_schedule():
     """
-    Retrieve the schedule for a given date.
-    Query parameter: ?date=-DD-MM-YYYY
+    Retrieve the schedule for a given date, or for a range of dates.
+    Query parameters: ?date=DD-MM-YYYY
+                      ?from=DD-MM-YYYY&to=DD-MM-YYYY[&group_by=day]
+    Sessions, including occurrences of recurring series, are sorted by date and start time.
+    Serialized single-date schedules are cached; X-Cache tells whether this one was.
+    Supports If-None-Match with an ETag built from the dates' versions.
     """
+    if "date" not in request.args and ("from" in request.args or "to" in request.args):
+        return get_schedule_range()
+
     date_str = request.args.get('date')
     if not date_str:
         return jsonify({"error": "Date query parameter is required (DD-MM-YYYY)."}), 400
+
+    query_date, message = parse_schedule_date(date_str)
+    if query_date is None:
+        return jsonify({"error": message}), 400
+
+    # Read the version before the rows, so a cached payload is never older than its version.
+    version = get_schedule_version(query_date)
+    etag = make_etag("schedule", query_date.isoformat(), version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    payload, cache_status = _schedule_payload(query_date, version)
+    response = current_app.response_class(payload, mimetype="application/json")
+    response.headers["X-Cache"] = cache_status
+    response.set_etag(etag)
+    return response, 200
+
+def _schedule_payload(query_date, version):
+    """
+    Serialized schedule of one date at 'version', from the cache when possible.
+    Returns a tuple: (payload, "HIT" or "MISS").
+    """
+    payload = schedule_cache.get(query_date, version)
+    if payload is not None:
+        return payload, "HIT"
+    sessions = get_schedule_for_day(query_date)
+    occurrences = cached_expansion(query_date, query_date, version)
+    with timing("serialize"):
+        payload = current_app.json.dumps(merge_schedule(sessions, occurrences)).encode()
+    schedule_cache.set(query_date, version, payload)
+    return payload, "MISS"
+
+@schedule_bp.route('/schedule/stream', methods=['GET'])
+@read_only
+def stream_schedule():
+    """
+    Server-Sent Events stream of one date's schedule.
+    Query parameter: ?date=DD-MM-YYYY
+    Sends the schedule as a "schedule" event when the stream opens and again after
+    every change to that date, with the date's version as the event id. A client
+    reconnecting with Last-Event-ID only gets an event if the schedule changed since.
+    Comment lines are sent as heartbeats while nothing changes.
+    """
+    query_date, message = parse_schedule_date(request.args.get("date", ""))
+    if query_date is None:
+        return jsonify({"error": message}), 400
+    last_event_id = request.headers.get("Last-Event-ID", request.args.get("last_event_id"))
+    last_version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
     try:
-        query_date = datetime.strptime(date_str, "%d-%m-%Y").date()
-    except ValueError:
-        return jsonify({"error": "Invalid date format. Use DD-MM-YYYY."}), 400
-
-    sessions = ClassSession.query.filter_by(date=query_date).all()
-    sessions_list = [{
-        "id": s.id,
-        "title": s.title,
-        "description": s.description,
-        "date": s.date.strftime("%d-%m-%Y"),
-        "start_time": s.start_time.strftime("%H:%M"),
-        "end_time": s.end_time.strftime("%H:%M"),
-        "professor_id": s.professor_id,
-        "session_type": s.session_type
-    } for s in sessions]
-    return jsonify(sessions_list), 200
+        subscription = schedule_events.subscribe(query_date)
+    except StreamLimitReached:
+        response = jsonify({"error": "Too many open schedule streams. Please try again shortly."})
+        response.headers["Retry-After"] = str(max(1, round(current_app.config["SCHEDULE_STREAM_RETRY_MS"] / 1000)))
+        return response, 503
+
+    response = current_app.response_class(
+        stream_with_context(_schedule_events(subscription, last_version)), mimetype="text/event-stream"
+    )
+    # Runs even if the stream is never iterated.
+    response.call_on_close(subscription.close)
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream.
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+def _schedule_events(subscription, last_version):
+    config = current_app.config
+    heartbeat = config["SCHEDULE_STREAM_HEARTBEAT_SECONDS"]
+    deadline = time.monotonic() + config["SCHEDULE_STREAM_MAX_SECONDS"]
+    try:
+        yield f"retry: {config['SCHEDULE_STREAM_RETRY_MS']}\n\n"
+        while True:
+            # Take the notification position before reading the version, so no change slips in between.
+            position = subscription.position()
+            version = get_schedule_version(subscription.day)
+            if last_version is None or version > last_version:
+                payload, _ = _schedule_payload(subscription.day, version)
+                data = "".join(f"data: {line}\n" for line in payload.decode().splitlines())
+                yield f"id: {version}\nevent: schedule\n{data}\n"
+                last_version = version
+            # Give the connection back to the pool while waiting.
+            db.session.close()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not subscription.wait(position, min(heartbeat, remaining)):
+                yield ": heartbeat\n\n"
+    finally:
+        subscription.close()
+
+def get_schedule_range():
+    """
+    Retrieve the schedule between 'from' and 'to' (inclusive) with one range query.
+    With group_by=day the response lists every day of the range with its sessions.
+    """
+    start_date, end_date, message = parse_date_range(
+        request.args.get("from", ""), request.args.get("to", ""), current_app.config["SCHEDULE_MAX_RANGE_DAYS"]
+    )
+    if start_date is None:
+        return jsonify({"error": message}), 400
+    group_by = request.args.get("group_by")
+    if group_by not in (None, "day"):
+        return jsonify({"error": "Invalid group_by. Use 'day'."}), 400
+
+    version = get_schedule_range_version(start_date, end_date)
+    etag = make_etag("schedule", start_date.isoformat(), end_date.isoformat(), group_by or "none", version)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    rows = get_schedule_for_range(start_date, end_date)
+    occurrences = cached_expansion(start_date, end_date, version)
+    with timing("serialize"):
+        sessions = merge_schedule(rows, occurrences)
+    if group_by == "day":
+        days = {}
+        for offset in range((end_date - start_date).days + 1):
+            days[format_date(start_date + timedelta(days=offset))] = []
+        for session in sessions:
+            days[session["date"]].append(session)
+        sessions = [{"date": day, "sessions": day_sessions} for day, day_sessions in days.items()]
+
+    response = jsonify(sessions)
+    response.set_etag(etag)
+    return response, 200
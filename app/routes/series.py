@@ -0,0 +1,53 @@
+from flask import Blueprint, request
+from flask_jwt_extended import jwt_required
+from app.controllers.series_controller import (
+    change_occurrence, create_series, delete_series, get_series, restore_occurrence, update_series
+)
+from app.utils.db_routing import read_only
+
+series_bp = Blueprint('series', __name__)
+
+@series_bp.route('/series', methods=['POST'])
+@jwt_required()
+def create():
+    """
+    Create a recurring session series: the fields of a class session with
+    start_date, end_date and optional weekdays (0 is Monday) instead of a date.
+    """
+    data = request.get_json()
+    return create_series(data)
+
+@series_bp.route('/series/<int:id>', methods=['GET'])
+@read_only
+def get(id):
+    """Retrieve a series with its cancelled and moved occurrences."""
+    return get_series(id)
+
+@series_bp.route('/series/<int:id>', methods=['PUT'])
+@jwt_required()
+def update(id):
+    """Update every occurrence of a series."""
+    data = request.get_json()
+    return update_series(id, data)
+
+@series_bp.route('/series/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete(id):
+    """Delete a series and all of its occurrences."""
+    return delete_series(id)
+
+@series_bp.route('/series/<int:id>/occurrences/<date_str>', methods=['PUT'])
+@jwt_required()
+def change(id, date_str):
+    """
+    Cancel one occurrence with {"cancelled": true}, or move it by sending the
+    fields to change (date, start_time, end_time, ...). The date is DD-MM-YYYY.
+    """
+    data = request.get_json()
+    return change_occurrence(id, date_str, data)
+
+@series_bp.route('/series/<int:id>/occurrences/<date_str>', methods=['DELETE'])
+@jwt_required()
+def restore(id, date_str):
+    """Undo the cancellation or move of one occurrence."""
+    return restore_occurrence(id, date_str)
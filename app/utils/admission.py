@@ -0,0 +1,245 @@
+"""
+Admission control: requests are turned away before the view runs.
+
+Two checks run in a before_request hook, ahead of any database or password
+hashing work:
+
+- In-flight cap: once a worker is handling MAX_IN_FLIGHT_REQUESTS requests,
+  new ones get an immediate 503 instead of queueing behind the busy ones.
+- Rate limits: endpoints listed in RATE_LIMITS get a token bucket per client
+  (the JWT subject when a valid token is sent, else the client IP). A request
+  that finds the bucket empty gets a 429.
+
+Both answers carry Retry-After. Bucket state lives in a pluggable store:
+MemoryStore keeps it per worker, SQLiteStore shares it between the workers
+of one host through a local SQLite file.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from werkzeug.utils import import_string
+from app.utils.response_formatter import error_response
+
+
+class RateLimitStore(ABC):
+    """
+    Interface for token bucket stores. A shared store (for example Redis) can
+    be plugged in by implementing consume() and pointing RATE_LIMIT_STORE at
+    the class; it is built with the app config.
+    """
+
+    def __init__(self, config):
+        pass
+
+    @abstractmethod
+    def consume(self, key, capacity, rate, now):
+        """
+        Take one token from the bucket 'key', which holds up to 'capacity' tokens and
+        refills at 'rate' tokens per second. Returns 0 if a token was taken, otherwise
+        the number of seconds until one will be available.
+        """
+
+    def stats(self):
+        return {}
+
+
+def _refill(tokens, updated, capacity, rate, now):
+    if tokens is None:
+        return capacity
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+def _take(tokens, rate):
+    """Returns (tokens left, seconds to wait): one token is taken if there is one."""
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryStore(RateLimitStore):
+    """
+    Buckets kept in this process. Once RATE_LIMIT_MAX_KEYS buckets exist, the
+    full ones are dropped (a missing bucket is a full one), then the least recently used.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_keys = config["RATE_LIMIT_MAX_KEYS"]
+        self.evictions = 0
+        # key -> (tokens, updated, time the bucket is full again)
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (None, now, now))
+            tokens, wait = _take(_refill(tokens, updated, capacity, rate, now), rate)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+            return wait
+
+    def _evict(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._buckets), "max_keys": self.max_keys, "evictions": self.evictions}
+
+
+class SQLiteStore(RateLimitStore):
+    """
+    Buckets kept in the SQLite file RATE_LIMIT_SQLITE_PATH, shared by every
+    worker on the host. Each consume() is one short write transaction; buckets
+    that have refilled are deleted every RATE_LIMIT_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.path = config["RATE_LIMIT_SQLITE_PATH"]
+        self.prune_interval = config["RATE_LIMIT_PRUNE_INTERVAL"]
+        self._last_prune = 0.0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)")
+
+    def _connect(self):
+        # Connections are not shared between threads, nor inherited across a fork.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def consume(self, key, capacity, rate, now):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, wait = _take(_refill(*(row or (None, now)), capacity, rate, now), rate)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (capacity - tokens) / rate)
+            )
+            if now - self._last_prune >= self.prune_interval:
+                self._last_prune = now
+                conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def stats(self):
+        return {"size": self._connect().execute("SELECT count(*) FROM rate_limit_buckets").fetchone()[0]}
+
+
+class _AdmissionState:
+    def __init__(self, config):
+        self.store = import_string(config["RATE_LIMIT_STORE"])(config) if config["RATE_LIMIT_ENABLED"] else None
+        self.limits = {
+            endpoint: (limit["limit"], limit["limit"] / limit["period"])
+            for endpoint, limit in config["RATE_LIMITS"].items()
+        }
+        self.max_in_flight = config["MAX_IN_FLIGHT_REQUESTS"]
+        self.exempt = frozenset(config["ADMISSION_EXEMPT_ENDPOINTS"])
+        self.retry_after = config["LOAD_SHEDDING_RETRY_AFTER"]
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.lock = threading.Lock()
+
+
+class AdmissionControl:
+    """Per-worker in-flight cap and per-client token-bucket rate limits, checked before the view runs."""
+
+    def init_app(self, app):
+        state = _AdmissionState(app.config)
+        if state.store is None and not state.max_in_flight:
+            return
+        app.extensions["admission_control"] = state
+        app.before_request(_admit_request)
+        app.teardown_request(_release_request)
+
+    @property
+    def _state(self):
+        return current_app.extensions["admission_control"]
+
+    def stats(self):
+        state = self._state
+        stats = {"in_flight": state.in_flight, "rate_limited": state.rate_limited, "shed": state.shed}
+        if state.store is not None:
+            stats["store"] = state.store.stats()
+        return stats
+
+
+def client_identity():
+    """The JWT subject when the request carries a valid token, otherwise the client IP."""
+    try:
+        verify_jwt_in_request(optional=True)
+        subject = get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        # An invalid token is rejected by the view itself; limit it by address meanwhile.
+        subject = None
+    if subject is not None:
+        return f"user:{subject}"
+    return f"ip:{request.remote_addr}"
+
+
+def _rejection(message, status, retry_after):
+    response, status = error_response(message, status)
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _admit_request():
+    state = current_app.extensions["admission_control"]
+    endpoint = request.endpoint
+    if endpoint is None or endpoint in state.exempt:
+        return None
+
+    if state.max_in_flight:
+        with state.lock:
+            if state.in_flight >= state.max_in_flight:
+                state.shed += 1
+                return _rejection("The server is busy. Please try again shortly.", 503, state.retry_after)
+            state.in_flight += 1
+        g.admission_counted = True
+
+    limit = state.limits.get(endpoint, state.limits.get("default"))
+    if state.store is None or limit is None:
+        return None
+    capacity, rate = limit
+    wait = state.store.consume(f"{endpoint}:{client_identity()}", capacity, rate, time.time())
+    if wait:
+        with state.lock:
+            state.rate_limited += 1
+        return _rejection("Too many requests. Please slow down.", 429, wait)
+    return None
+
+
+def _release_request(exc):
+    if g.pop("admission_counted", False):
+        state = current_app.extensions["admission_control"]
+        with state.lock:
+            state.in_flight -= 1
@@ -0,0 +1,133 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class CacheBackend(ABC):
+    """
+    Interface for cache stores. A shared store (for example Redis or memcached)
+    can be plugged in by implementing these methods and pointing
+    SCHEDULE_CACHE_BACKEND at the class; it is built with the app config.
+    A backend missing one of them fails when create_app builds it.
+    """
+
+    def __init__(self, config):
+        pass
+
+    @abstractmethod
+    def get(self, key):
+        """Return the cached value, or None if the key is missing."""
+
+    @abstractmethod
+    def set(self, key, value):
+        pass
+
+    @abstractmethod
+    def delete(self, *keys):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process cache that evicts the least recently used entry once full.
+    Holds max_entries entries, or SCHEDULE_CACHE_MAX_ENTRIES when built from the app config.
+    """
+
+    def __init__(self, config=None, max_entries=None):
+        super().__init__(config)
+        self.max_entries = max_entries if max_entries is not None else config["SCHEDULE_CACHE_MAX_ENTRIES"]
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class _CacheState:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class ScheduleCache:
+    """
+    Cache of serialized GET /api/schedule payloads, keyed by date.
+    Each entry remembers the schedule_days version it was built from and is
+    treated as a miss once that version moves on, so writes made by other
+    workers are never served stale. Local writes also invalidate their dates.
+    """
+
+    def init_app(self, app):
+        backend_class = import_string(app.config["SCHEDULE_CACHE_BACKEND"])
+        app.extensions["schedule_cache"] = _CacheState(backend_class(app.config))
+
+    @property
+    def _state(self):
+        return current_app.extensions["schedule_cache"]
+
+    def get(self, day, version):
+        state = self._state
+        entry = state.backend.get(day.isoformat())
+        if entry is not None and entry[0] == version:
+            state.record(hit=True)
+            return entry[1]
+        state.record(hit=False)
+        return None
+
+    def set(self, day, version, payload):
+        self._state.backend.set(day.isoformat(), (version, payload))
+
+    def invalidate(self, *days):
+        self._state.backend.delete(*{day.isoformat() for day in days})
+
+    def clear(self):
+        self._state.backend.clear()
+
+    def stats(self):
+        state = self._state
+        return dict(state.backend.stats(), hits=state.hits, misses=state.misses)
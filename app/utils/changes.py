@@ -0,0 +1,132 @@
+"""
+Change feed for GET /api/classes/changes.
+
+Every transaction that writes class sessions takes one number from the
+"class_sessions" change counter and stamps it on the rows it creates or
+updates (change_seq) and on the tombstones of the rows it deletes. The
+counter row stays locked until the writer commits, so numbers become
+visible in increasing order, and a client that has seen everything up to
+(change_seq, id) can ask for what comes after it.
+"""
+import base64
+import heapq
+import json
+import uuid
+from itertools import islice
+from sqlalchemy import and_, or_, true
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.extensions import db
+from app.models import ChangeCounter, ClassSession, ClassSessionTombstone, utcnow
+
+COUNTER = "class_sessions"
+
+
+def next_change_seq():
+    """
+    Bump the class session change counter in the current transaction and return its new value.
+    Call it as late as possible: other writers wait on the counter row until this transaction ends.
+    """
+    dialect = db.session.get_bind(mapper=ChangeCounter).dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(ChangeCounter).values(name=COUNTER, value=1)
+        stmt = stmt.on_duplicate_key_update(value=stmt.table.c.value + 1)
+    else:
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(ChangeCounter).values(name=COUNTER, value=1).on_conflict_do_update(
+            index_elements=[ChangeCounter.name],
+            set_={"value": ChangeCounter.__table__.c.value + 1}
+        )
+    db.session.execute(stmt)
+    return current_change_seq()
+
+
+def pending_change_seq():
+    """
+    A negative placeholder change_seq, unique to the current transaction. Large writes insert
+    their rows with it and call stamp_pending() just before commit, so the counter row is
+    only locked for the final UPDATE instead of the whole write.
+    """
+    return -1 - (uuid.uuid4().int >> 66)
+
+
+def stamp_pending(placeholder):
+    """Give the rows inserted with 'placeholder' the next change sequence number, and return it."""
+    change_seq = next_change_seq()
+    db.session.query(ClassSession).filter(ClassSession.change_seq == placeholder).update(
+        {"change_seq": change_seq}, synchronize_session=False
+    )
+    return change_seq
+
+
+def current_change_seq():
+    """The last change sequence number committed (or taken by the current transaction)."""
+    return db.session.query(ChangeCounter.value).filter(ChangeCounter.name == COUNTER).scalar() or 0
+
+
+def record_deletions(session_ids, change_seq):
+    """Leave tombstones for deleted sessions. A reused id replaces its older tombstone."""
+    deleted_at = utcnow()
+    for session_id in session_ids:
+        db.session.merge(ClassSessionTombstone(id=session_id, deleted_at=deleted_at, change_seq=change_seq))
+
+
+def encode_change_token(change_seq, last_id=None):
+    """
+    Encode the feed position (change_seq, id) as an opaque sync token.
+    Without last_id, the position is after every change numbered change_seq.
+    """
+    payload = json.dumps([change_seq, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_change_token(token):
+    """
+    Decode a token created by encode_change_token.
+    Returns a tuple: (change_seq, id), or None if the token is invalid.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        change_seq, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(change_seq), None if last_id is None else int(last_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _after(model, position):
+    if position is None:
+        return true()
+    change_seq, last_id = position
+    if last_id is None:
+        return model.change_seq > change_seq
+    return or_(model.change_seq > change_seq, and_(model.change_seq == change_seq, model.id > last_id))
+
+
+def get_changes(position, columns, limit, high_water):
+    """
+    Up to limit + 1 changes after 'position' (None for everything), ordered by (change_seq, id).
+    Each change is (change_seq, id, row), where row holds 'columns' of an upserted session,
+    or is None for a deleted one. Both lookups are range scans of a (change_seq, id) index.
+    Changes are capped at 'high_water', a current_change_seq() read before the lookups,
+    so a writer committing between them cannot make the feed skip over its rows.
+    """
+    sessions = (
+        db.session.query(ClassSession.change_seq, ClassSession.id, *columns)
+        .filter(_after(ClassSession, position), ClassSession.change_seq <= high_water)
+        .order_by(ClassSession.change_seq, ClassSession.id)
+        .limit(limit + 1)
+    )
+    # A first sync has nothing to delete.
+    tombstones = [] if position is None else (
+        db.session.query(ClassSessionTombstone.change_seq, ClassSessionTombstone.id)
+        .filter(_after(ClassSessionTombstone, position), ClassSessionTombstone.change_seq <= high_water)
+        .order_by(ClassSessionTombstone.change_seq, ClassSessionTombstone.id)
+        .limit(limit + 1)
+    )
+    changes = heapq.merge(
+        ((row[0], row[1], tuple(row[2:])) for row in sessions),
+        ((change_seq, session_id, None) for change_seq, session_id in tombstones),
+        key=lambda change: change[:2]
+    )
+    return list(islice(changes, limit + 1))
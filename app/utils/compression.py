@@ -0,0 +1,154 @@
+"""
+Negotiated response compression.
+
+Large JSON and text responses are gzip-compressed (brotli when the brotli
+package is installed and the client prefers it) in an after_request hook.
+Bodies below COMPRESSION_MIN_SIZE go out as they are. Compressed bodies of
+responses with an ETag are kept in a small LRU cache: ETags here are built
+from version markers, so the same ETag always means the same body, and a hot
+payload is compressed once rather than on every request.
+
+Static files are compressed once per process at the highest level and
+served with long-lived Cache-Control headers.
+"""
+import gzip
+import mimetypes
+import os
+from functools import lru_cache
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from app.utils.cache import LRUCache
+from app.utils.metrics import timing
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json", "application/x-ndjson", "application/javascript", "application/yaml",
+    "application/x-yaml", "text/yaml", "text/plain", "text/csv", "text/html", "text/css", "text/javascript",
+})
+
+
+def negotiate_encoding():
+    """Return "br", "gzip" or None for the current request's Accept-Encoding."""
+    accept = request.accept_encodings
+    gzip_quality = accept.quality("gzip")
+    if brotli is not None:
+        brotli_quality = accept.quality("br")
+        if brotli_quality and brotli_quality >= gzip_quality:
+            return "br"
+    return "gzip" if gzip_quality else None
+
+
+def compress(data, encoding, level):
+    """Compress 'data' with "gzip" (level 1-9) or "br" (quality 0-11)."""
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    # mtime=0 keeps the output identical for identical input.
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _is_compressible(response):
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE_TYPES
+    )
+
+
+class _CompressionState:
+    def __init__(self, config):
+        self.min_size = config["COMPRESSION_MIN_SIZE"]
+        self.levels = {"gzip": config["COMPRESSION_GZIP_LEVEL"], "br": config["COMPRESSION_BROTLI_QUALITY"]}
+        self.cache = LRUCache(max_entries=config["COMPRESSION_CACHE_MAX_ENTRIES"])
+        self.hits = 0
+        self.misses = 0
+
+
+class ResponseCompression:
+    """Compresses eligible responses after the view has built them."""
+
+    def init_app(self, app):
+        if not app.config["COMPRESSION_ENABLED"]:
+            return
+        app.extensions["response_compression"] = _CompressionState(app.config)
+        app.after_request(_compress_response)
+
+    @property
+    def _state(self):
+        return current_app.extensions["response_compression"]
+
+    def stats(self):
+        state = self._state
+        return dict(state.cache.stats(), hits=state.hits, misses=state.misses)
+
+
+def _compress_response(response):
+    if request.method == "HEAD" or not _is_compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding()
+    state = current_app.extensions["response_compression"]
+    if encoding is None or response.calculate_content_length() < state.min_size:
+        return response
+
+    etag, _ = response.get_etag()
+    key = (request.path, etag, encoding) if etag else None
+    body = state.cache.get(key) if key else None
+    if body is None:
+        with timing("compress"):
+            body = compress(response.get_data(), encoding, state.levels[encoding])
+        if key:
+            state.cache.set(key, body)
+            state.misses += 1
+    else:
+        state.hits += 1
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        # Compressed and identity bodies are the same resource; If-None-Match compares weakly.
+        response.set_etag(etag, weak=True)
+    return response
+
+
+@lru_cache(maxsize=64)
+def _static_body(filename, mtime_ns, encoding):
+    """A static file's bytes, compressed at the highest level when 'encoding' is given. Built once per file version."""
+    with open(filename, "rb") as handle:
+        data = handle.read()
+    if encoding is None:
+        return data
+    return compress(data, encoding, 11 if encoding == "br" else 9)
+
+
+def send_static_file(directory, path):
+    """
+    Serve a file from 'directory', precompressed for compressible types, with
+    Cache-Control max-age STATIC_MAX_AGE and ETag/Last-Modified revalidation.
+    """
+    filename = safe_join(directory, path)
+    if filename is None or not os.path.isfile(filename):
+        abort(404)
+    stat = os.stat(filename)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if path.endswith((".yaml", ".yml")):
+        mimetype = "application/yaml"
+
+    encoding = None
+    if mimetype in COMPRESSIBLE_TYPES and stat.st_size >= current_app.config["COMPRESSION_MIN_SIZE"]:
+        encoding = negotiate_encoding()
+    response = current_app.response_class(_static_body(filename, stat.st_mtime_ns, encoding), mimetype=mimetype)
+    if mimetype in COMPRESSIBLE_TYPES:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}", weak=encoding is not None)
+    response.last_modified = stat.st_mtime
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["STATIC_MAX_AGE"]
+    return response.make_conditional(request)
@@ -0,0 +1,24 @@
+import hashlib
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    """Build a strong ETag value from version markers (never from the response body)."""
+    return "-".join(str(part) for part in parts)
+
+
+def query_fingerprint():
+    """Short digest of the query string, so paged and projected reads get distinct ETags."""
+    return hashlib.sha1(request.query_string).hexdigest()[:16]
+
+
+def not_modified(etag):
+    """
+    Return a 304 Not Modified response if the request's If-None-Match matches 'etag',
+    otherwise None. The comparison is weak, so compressed responses (weak ETags) match too.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
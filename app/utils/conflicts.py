@@ -0,0 +1,133 @@
+import heapq
+from collections import defaultdict
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.extensions import db
+from app.models import ClassSession, ScheduleDay
+from app.utils.recurrence import expand_series
+
+
+def lock_schedule_day(day):
+    """
+    Bump the version row of a date, creating it if needed.
+    The row stays write-locked until the current transaction ends, so two
+    writers for the same date (in any worker process) run one after the other.
+    """
+    lock_schedule_days([day])
+
+
+def lock_schedule_days(days):
+    """
+    Bump the version rows of several dates with a single upsert.
+    Dates are locked in ascending order so concurrent writers cannot deadlock.
+    Lock before any plain read in the transaction: on MySQL/MariaDB (REPEATABLE READ)
+    the first plain read fixes the snapshot, and the conflict checks that follow would
+    miss sessions committed while this writer waited. Rows needed to find the dates
+    must be read with with_for_update(), which reads the latest committed version.
+    """
+    values = [{"date": day, "version": 1} for day in sorted(set(days))]
+    if not values:
+        return
+    dialect = db.session.get_bind(mapper=ScheduleDay).dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(ScheduleDay).values(values)
+        stmt = stmt.on_duplicate_key_update(version=stmt.table.c.version + 1)
+    else:
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(ScheduleDay).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ScheduleDay.date],
+            set_={"version": ScheduleDay.__table__.c.version + 1}
+        )
+    db.session.execute(stmt)
+
+
+def find_conflicts(day, start_time, end_time, professor_id=None, exclude_id=None):
+    """
+    Return the IDs of sessions on 'day' whose time range overlaps [start_time, end_time).
+    When professor_id is given, only that professor's sessions are considered.
+    Runs as a single range query on the (date, start_time) or (professor_id, date) index.
+    """
+    query = db.session.query(ClassSession.id).filter(
+        ClassSession.date == day,
+        ClassSession.start_time < end_time,
+        ClassSession.end_time > start_time
+    )
+    if professor_id is not None:
+        query = query.filter(ClassSession.professor_id == professor_id)
+    if exclude_id is not None:
+        query = query.filter(ClassSession.id != exclude_id)
+    return [session_id for session_id, in query.order_by(ClassSession.start_time, ClassSession.id)]
+
+
+def find_batch_conflicts(candidates, per_professor=False, exclude_series_id=None):
+    """
+    Check a batch of new sessions against each other, against stored sessions and
+    against the occurrences of session series (except exclude_series_id).
+    'candidates' is a list of (row, date, start_time, end_time, professor_id) tuples.
+    Stored sessions are loaded with one range query over the batch's dates, series
+    are expanded over the same range, then every date (or date and professor) is
+    swept in start-time order: once to pair new rows with the stored intervals they
+    overlap, once to check the remaining rows against each other.
+    Returns a dict: {row: {"session_ids": [...], "series_ids": [...], "rows": [...]}} for rejected rows.
+    A rejected row does not block the rows after it.
+    """
+    if not candidates:
+        return {}
+    days = {candidate[1] for candidate in candidates}
+    stored = db.session.query(
+        ClassSession.id, ClassSession.date, ClassSession.start_time, ClassSession.end_time, ClassSession.professor_id
+    ).filter(ClassSession.date.between(min(days), max(days)))
+
+    # Each interval: (start, kind, end, label). Stored sessions and series occurrences (kind 0)
+    # sort before new rows (kind 1); their labels are ("session", id) or ("series", id).
+    buckets = defaultdict(list)
+    for session_id, day, start_time, end_time, professor_id in stored:
+        if day in days:
+            key = (day, professor_id) if per_professor else day
+            buckets[key].append((start_time, 0, end_time, ("session", session_id)))
+    for occurrence in expand_series(min(days), max(days), exclude_series_id=exclude_series_id):
+        if occurrence.date in days:
+            key = (occurrence.date, occurrence.professor_id) if per_professor else occurrence.date
+            buckets[key].append((occurrence.start_time, 0, occurrence.end_time, ("series", occurrence.series_id)))
+    for row, day, start_time, end_time, professor_id in candidates:
+        key = (day, professor_id) if per_professor else day
+        buckets[key].append((start_time, 1, end_time, row))
+
+    conflicts = {}
+    for intervals in buckets.values():
+        intervals.sort()
+        # First sweep: every stored interval overlapping each new row, whichever starts first.
+        stored_overlaps = defaultdict(list)
+        active_stored, active_rows = [], []  # heaps of (end, label)
+        for start_time, kind, end_time, label in intervals:
+            for active in (active_stored, active_rows):
+                while active and active[0][0] <= start_time:
+                    heapq.heappop(active)
+            if kind == 1:
+                stored_overlaps[label].extend(other for _, other in active_stored)
+                heapq.heappush(active_rows, (end_time, label))
+            else:
+                for _, row in active_rows:
+                    stored_overlaps[row].append(label)
+                heapq.heappush(active_stored, (end_time, label))
+
+        # Second sweep: rows clear of stored intervals are accepted in order unless
+        # they overlap a row accepted before them.
+        accepted = []  # heap of (end, row)
+        for start_time, kind, end_time, label in intervals:
+            if kind == 0:
+                continue
+            while accepted and accepted[0][0] <= start_time:
+                heapq.heappop(accepted)
+            stored_labels = stored_overlaps.get(label)
+            if stored_labels or accepted:
+                conflicts[label] = {
+                    "session_ids": sorted({other_id for source, other_id in stored_labels or () if source == "session"}),
+                    "series_ids": sorted({other_id for source, other_id in stored_labels or () if source == "series"}),
+                    "rows": sorted(row for _, row in accepted),
+                }
+                continue
+            heapq.heappush(accepted, (end_time, label))
+    return conflicts
@@ -0,0 +1,97 @@
+import itertools
+import math
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.sql.dml import UpdateBase
+
+# Set on responses to requests that wrote: when the client wrote last (Unix time).
+STICKY_COOKIE = "db_last_write"
+
+
+def init_replicas(app):
+    """
+    Create an engine for each URI in SQLALCHEMY_REPLICA_URIS, with the
+    SQLALCHEMY_REPLICA_ENGINE_OPTIONS pool settings.
+    """
+    options = app.config["SQLALCHEMY_REPLICA_ENGINE_OPTIONS"]
+    engines = [create_engine(uri, **options) for uri in app.config["SQLALCHEMY_REPLICA_URIS"]]
+    app.extensions["replica_engines"] = engines
+    app.extensions["replica_cycle"] = itertools.cycle(engines) if engines else None
+    if engines:
+        app.after_request(_remember_write)
+
+
+def _remember_write(response):
+    """Send the writing client to the primary for SQLALCHEMY_REPLICA_STICKY_SECONDS, so it reads its own writes."""
+    if g.get("db_wrote"):
+        sticky_seconds = current_app.config["SQLALCHEMY_REPLICA_STICKY_SECONDS"]
+        response.set_cookie(STICKY_COOKIE, f"{time.time():.3f}", max_age=math.ceil(sticky_seconds),
+                            httponly=True, samesite="Lax")
+    return response
+
+
+def get_replica_engines(app=None):
+    return (app or current_app).extensions.get("replica_engines", [])
+
+
+def read_only(view):
+    """
+    Mark a view as read-only so its queries may be answered by a replica.
+    Writes, locking reads, every query after the first write of the request,
+    and reads by a client within SQLALCHEMY_REPLICA_STICKY_SECONDS of its own
+    last write (tracked with a cookie) still go to the primary.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of read-only views to a round-robin pool of replicas."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            is_write = self._flushing or isinstance(clause, UpdateBase) or (
+                clause is not None and getattr(clause, "_for_update_arg", None) is not None
+            )
+            if is_write:
+                g.db_wrote = True
+            elif g.get("db_read_only") and not g.get("db_wrote") and not self._sticky_primary():
+                replica = self._replica_engine()
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _sticky_primary():
+        """Whether this client wrote within SQLALCHEMY_REPLICA_STICKY_SECONDS."""
+        try:
+            last_write = float(request.cookies.get(STICKY_COOKIE, "-inf"))
+        except ValueError:
+            return False
+        return time.time() - last_write < current_app.config["SQLALCHEMY_REPLICA_STICKY_SECONDS"]
+
+    @staticmethod
+    def _replica_engine():
+        # One replica per request, so all of its reads see the same snapshot.
+        if "db_replica" not in g:
+            replicas = current_app.extensions.get("replica_cycle")
+            g.db_replica = next(replicas) if replicas is not None else None
+        return g.db_replica
+
+
+def dispose_engines(app):
+    """
+    Reset the primary and replica pools after a fork. close=False leaves the
+    parent's connections alone and just stops this process from reusing them.
+    """
+    from app.extensions import db
+
+    with app.app_context():
+        for engine in [*db.engines.values(), *get_replica_engines(app)]:
+            engine.dispose(close=False)
@@ -0,0 +1,185 @@
+"""
+Schedule change notifications for GET /api/schedule/stream.
+
+Writers publish the dates they changed after committing. A broker wakes the
+streams subscribed to those dates; each stream then reads the date's
+schedule_days version and sends the schedule if the version moved on, so
+duplicate or spurious notifications cost one cheap lookup.
+
+LocalBroker only sees writes made in its own process (enough for tests and a
+single worker). PollingBroker also polls schedule_days for the dates it has
+subscribers for, so writes made by other gunicorn workers reach every stream
+within SCHEDULE_EVENTS_POLL_INTERVAL, with one query per worker per interval.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class LocalBroker:
+    """
+    In-process pub/sub: a notification counter per date and one condition
+    variable. A shared pub/sub (for example Redis) can be plugged in by
+    implementing the same methods and pointing SCHEDULE_EVENTS_BACKEND at
+    the class; it is built with the app.
+    """
+
+    def __init__(self, app):
+        self._notifications = Counter()
+        self._subscribers = Counter()
+        self._condition = threading.Condition()
+
+    def publish(self, *days):
+        with self._condition:
+            for day in days:
+                if self._subscribers[day]:
+                    self._notifications[day] += 1
+            self._condition.notify_all()
+
+    def subscribe(self, day):
+        with self._condition:
+            self._subscribers[day] += 1
+
+    def unsubscribe(self, day):
+        with self._condition:
+            self._subscribers[day] -= 1
+            if self._subscribers[day] <= 0:
+                del self._subscribers[day]
+                self._notifications.pop(day, None)
+
+    def position(self, day):
+        """The number of notifications for 'day' so far; pass it to wait()."""
+        with self._condition:
+            return self._notifications[day]
+
+    def wait(self, day, position, timeout):
+        """Block until 'day' is notified after 'position', or 'timeout' seconds. Returns whether it was."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._notifications[day] != position, timeout)
+
+    def subscribed_days(self):
+        with self._condition:
+            return list(self._subscribers)
+
+
+class PollingBroker(LocalBroker):
+    """
+    LocalBroker plus a background thread per process that polls the
+    schedule_days versions of the subscribed dates and publishes the ones that changed.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.interval = app.config["SCHEDULE_EVENTS_POLL_INTERVAL"]
+        self._versions = {}
+        self._poller_pid = None
+        self._start_lock = threading.Lock()
+
+    def subscribe(self, day):
+        super().subscribe(day)
+        # Threads do not survive a fork, so every worker starts its own poller.
+        if self._poller_pid != os.getpid():
+            with self._start_lock:
+                if self._poller_pid != os.getpid():
+                    self._poller_pid = os.getpid()
+                    threading.Thread(target=self._run, name="schedule-events-poller", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                self.app.logger.exception("Polling schedule versions failed.")
+
+    def poll(self):
+        """Publish the subscribed dates whose version changed since the previous poll."""
+        from app.extensions import db
+        from app.models import ScheduleDay
+
+        days = self.subscribed_days()
+        if not days:
+            self._versions.clear()
+            return
+        with self.app.app_context():
+            try:
+                versions = dict(
+                    db.session.query(ScheduleDay.date, ScheduleDay.version).filter(ScheduleDay.date.in_(days))
+                )
+            finally:
+                db.session.remove()
+        changed = [day for day in days if day in self._versions and self._versions[day] != versions.get(day, 0)]
+        self._versions = {day: versions.get(day, 0) for day in days}
+        if changed:
+            self.publish(*changed)
+
+
+class StreamLimitReached(Exception):
+    """Raised when a worker already serves SCHEDULE_STREAM_MAX_CONNECTIONS streams."""
+
+
+class Subscription:
+    """One stream's subscription to a date. close() is idempotent."""
+
+    def __init__(self, state, day):
+        self._state = state
+        self.day = day
+        self._closed = False
+
+    def position(self):
+        return self._state.broker.position(self.day)
+
+    def wait(self, position, timeout):
+        return self._state.broker.wait(self.day, position, timeout)
+
+    def close(self):
+        with self._state.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._state.connections -= 1
+        self._state.broker.unsubscribe(self.day)
+
+
+class _EventsState:
+    def __init__(self, broker, max_connections):
+        self.broker = broker
+        self.max_connections = max_connections
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class ScheduleEvents:
+    """Publishes schedule changes and hands out per-date subscriptions, bounded per process."""
+
+    def init_app(self, app):
+        broker_class = import_string(app.config["SCHEDULE_EVENTS_BACKEND"])
+        app.extensions["schedule_events"] = _EventsState(
+            broker_class(app), app.config["SCHEDULE_STREAM_MAX_CONNECTIONS"]
+        )
+
+    @property
+    def _state(self):
+        return current_app.extensions["schedule_events"]
+
+    def publish(self, *days):
+        """Wake the streams of 'days'. Call after the write is committed."""
+        self._state.broker.publish(*set(days))
+
+    def subscribe(self, day):
+        """Return a Subscription, or raise StreamLimitReached when this process is full."""
+        state = self._state
+        with state.lock:
+            if state.connections >= state.max_connections:
+                raise StreamLimitReached()
+            state.connections += 1
+        state.broker.subscribe(day)
+        return Subscription(state, day)
+
+    def stats(self):
+        state = self._state
+        return {"connections": state.connections, "max_connections": state.max_connections}
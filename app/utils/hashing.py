@@ -0,0 +1,67 @@
+import threading
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingOverloaded(Exception):
+    """Raised when no hashing slot frees up within PASSWORD_HASH_QUEUE_TIMEOUT."""
+
+
+class _HashingPool:
+    """
+    At most 'concurrency' password hashes in flight per worker process.
+    Hashes run on the request thread; the KDF releases the GIL, so other
+    request threads keep serving cheap reads while logins are busy.
+    """
+
+    def __init__(self, concurrency, queue_timeout):
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingOverloaded()
+        try:
+            return func(*args)
+        finally:
+            self._slots.release()
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords, with a bounded number of hashes in flight per app."""
+
+    def init_app(self, app):
+        app.extensions["password_hasher"] = _HashingPool(
+            app.config["PASSWORD_HASH_CONCURRENCY"],
+            app.config["PASSWORD_HASH_QUEUE_TIMEOUT"]
+        )
+
+    @property
+    def _pool(self):
+        return current_app.extensions["password_hasher"]
+
+    def hash(self, password):
+        """Hash a password with PASSWORD_HASH_METHOD. Raises HashingOverloaded."""
+        return self._pool.run(generate_password_hash, password, current_app.config["PASSWORD_HASH_METHOD"])
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash. Raises HashingOverloaded."""
+        return self._pool.run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Return True if a stored hash was made with different parameters than PASSWORD_HASH_METHOD."""
+        return password_hash.split("$", 1)[0] != _method_prefix(current_app.config["PASSWORD_HASH_METHOD"])
+
+
+_prefixes = {}
+
+
+def _method_prefix(method):
+    """
+    The parameter prefix werkzeug writes for 'method', with its defaults filled in
+    (for example "scrypt" becomes "scrypt:32768:8:1"). Computed once per method.
+    """
+    if method not in _prefixes:
+        _prefixes[method] = generate_password_hash("", method).split("$", 1)[0]
+    return _prefixes[method]
@@ -0,0 +1,56 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, with the same output types as Flask's default
+    provider (dates, dataclasses and other extras still go through 'default').
+    Falls back to the standard library for options orjson does not support.
+    """
+
+    ensure_ascii = False  # orjson always writes UTF-8
+
+    def _options(self, sort_keys):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize to UTF-8 bytes without an intermediate str."""
+        sort_keys = kwargs.pop("sort_keys", self.sort_keys)
+        kwargs.pop("separators", None)
+        if kwargs.keys() - {"default"} or self.ensure_ascii:
+            return super().dumps(obj, sort_keys=sort_keys, **kwargs).encode()
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=self._options(sort_keys))
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """
+    Install the JSON provider selected by JSON_BACKEND: "orjson", "stdlib",
+    or "auto" (orjson when it is installed).
+    """
+    backend = app.config["JSON_BACKEND"]
+    if backend == "orjson" and orjson is None:
+        raise RuntimeError("JSON_BACKEND is 'orjson' but orjson is not installed.")
+    if backend == "orjson" or (backend == "auto" and orjson is not None):
+        app.json = FastJSONProvider(app)
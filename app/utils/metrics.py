@@ -0,0 +1,285 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from app.utils.statement_hooks import on_statement
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SQL_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+METRIC_HELP = {
+    "http_requests_total": ("counter", "Requests served, by route, method and status."),
+    "http_request_duration_seconds": ("histogram", "Request latency, by route and method."),
+    "http_response_size_bytes": ("histogram", "Response body size, by route and method."),
+    "http_request_sql_statements": ("histogram", "SQL statements executed per request, by route and method."),
+    "sql_statements_total": ("counter", "SQL statements executed, by route."),
+    "sql_duration_seconds_total": ("counter", "Time spent executing SQL, by route."),
+}
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms for one process. Histogram buckets
+    are stored per bucket (not cumulative) so snapshots from several
+    processes can be merged by plain addition.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "sum": 0}
+            histogram["counts"][index] += 1
+            histogram["sum"] += value
+
+    def snapshot(self):
+        """Return the registry as JSON-serializable data."""
+        with self.lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(h["buckets"]), list(h["counts"]), h["sum"]]
+                               for (name, labels), h in self.histograms.items()],
+            }
+
+
+def merge_snapshots(snapshots):
+    """Add up the snapshots of several processes."""
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, counts, total in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [buckets, [0] * len(counts), 0])
+            merged[1] = [a + b for a, b in zip(merged[1], counts)]
+            merged[2] += total
+    return counters, histograms
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus(counters, histograms):
+    """Render merged metrics in the Prometheus text exposition format."""
+    lines = []
+    for name, (kind, description) in METRIC_HELP.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            continue
+        for (metric, labels), (buckets, counts, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+ARCHIVE_FILE = "metrics-archive.json"
+
+
+def _write_json(path, data):
+    """
+    Write 'data' to 'path' atomically, so readers never see a partial file.
+    The temporary file is unique to the thread, so concurrent writers never share it.
+    """
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _as_snapshot(counters, histograms):
+    """Turn the output of merge_snapshots back into the snapshot format."""
+    return {
+        "counters": [[name, [list(label) for label in labels], value] for (name, labels), value in counters.items()],
+        "histograms": [[name, [list(label) for label in labels], list(buckets), counts, total]
+                       for (name, labels), (buckets, counts, total) in histograms.items()],
+    }
+
+
+class _MetricsState:
+    def __init__(self, directory, flush_interval, logger):
+        self.registry = MetricsRegistry()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.logger = logger
+        self.last_flush = 0.0
+        # One flush at a time: gthread workers finish requests on several threads.
+        self.flush_lock = threading.Lock()
+
+    def flush(self, force=False):
+        """
+        Write this process's snapshot to METRICS_DIR, at most once per flush interval.
+        A failed write is logged, never raised: it must not fail the request that triggered it.
+        """
+        if not self.directory:
+            return
+        with self.flush_lock:
+            now = time.monotonic()
+            if not force and now - self.last_flush < self.flush_interval:
+                return
+            self.last_flush = now
+            try:
+                _write_json(os.path.join(self.directory, f"metrics-{os.getpid()}.json"), self.registry.snapshot())
+            except OSError:
+                self.logger.exception("Writing the metrics file failed.")
+
+    def collect(self):
+        """Merged metrics of every worker (or just this process without METRICS_DIR)."""
+        if not self.directory:
+            return merge_snapshots([self.registry.snapshot()])
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+
+def _record_statement(statement, parameters, seconds):
+    if "metrics_started" in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_seconds += seconds
+
+
+class RequestMetrics:
+    """
+    Per-request instrumentation: latency, response size and SQL statement
+    count/time per route, exported at /metrics. With METRICS_DIR set, each
+    worker writes its totals to its own file there and /metrics adds them up.
+    SERVER_TIMING_ENABLED adds a Server-Timing header to every response.
+    """
+
+    def init_app(self, app):
+        if not app.config["METRICS_ENABLED"]:
+            return
+        directory = app.config["METRICS_DIR"]
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        app.extensions["request_metrics"] = _MetricsState(directory, app.config["METRICS_FLUSH_INTERVAL"], app.logger)
+        on_statement(_record_statement)
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+
+    @property
+    def _state(self):
+        return current_app.extensions["request_metrics"]
+
+    def collect(self):
+        return self._state.collect()
+
+    def render(self):
+        return render_prometheus(*self.collect())
+
+
+@contextmanager
+def timing(name):
+    """Time a block as its own Server-Timing entry for the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context() and "metrics_timings" in g:
+            g.metrics_timings[name] = g.metrics_timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_seconds = 0.0
+    g.metrics_timings = {}
+
+
+def _finish_request(response):
+    if "metrics_started" not in g:
+        return response
+    elapsed = time.perf_counter() - g.metrics_started
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    labels = (("route", route), ("method", request.method))
+    state = current_app.extensions["request_metrics"]
+    registry = state.registry
+
+    registry.inc("http_requests_total", labels + (("status", str(response.status_code)),))
+    registry.observe("http_request_duration_seconds", labels, elapsed, LATENCY_BUCKETS)
+    registry.observe("http_request_sql_statements", labels, g.metrics_sql_count, SQL_COUNT_BUCKETS)
+    if g.metrics_sql_count:
+        registry.inc("sql_statements_total", labels[:1], g.metrics_sql_count)
+        registry.inc("sql_duration_seconds_total", labels[:1], g.metrics_sql_seconds)
+    if not response.is_streamed:
+        registry.observe("http_response_size_bytes", labels, response.calculate_content_length() or 0, SIZE_BUCKETS)
+    state.flush()
+
+    if current_app.config["SERVER_TIMING_ENABLED"]:
+        entries = [f'db;dur={g.metrics_sql_seconds * 1000:.2f};desc="{g.metrics_sql_count} queries"']
+        entries.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in g.metrics_timings.items())
+        entries.append(f"total;dur={elapsed * 1000:.2f}")
+        response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+def flush_metrics(app):
+    """Write this worker's latest totals to METRICS_DIR (call as the worker exits)."""
+    state = app.extensions.get("request_metrics")
+    if state is not None:
+        state.flush(force=True)
+
+
+def mark_process_dead(directory, pid):
+    """
+    Fold the file of a worker that exited into metrics-archive.json and remove it,
+    so METRICS_DIR keeps one file per live worker plus the archive however often
+    workers are recycled. Call it from one process only (the gunicorn master).
+    """
+    path = os.path.join(directory, f"metrics-{pid}.json")
+    try:
+        with open(path) as f:
+            snapshots = [json.load(f)]
+    except (OSError, ValueError):
+        return
+    archive = os.path.join(directory, ARCHIVE_FILE)
+    try:
+        with open(archive) as f:
+            snapshots.append(json.load(f))
+    except (OSError, ValueError):
+        pass
+    _write_json(archive, _as_snapshot(*merge_snapshots(snapshots)))
+    os.remove(path)
+
+
+def clear_metrics_dir(directory):
+    """Remove the per-worker files left by a previous run (call once in the master, before forking)."""
+    for path in glob.glob(os.path.join(directory, "metrics-*.json*")):
+        os.remove(path)
@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import date, time
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(session_date, start_time, session_id):
+    """Encode the keyset position (date, start_time, id) as an opaque cursor."""
+    payload = json.dumps([session_date.isoformat(), start_time.isoformat(), session_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor created by encode_cursor.
+    Returns a tuple: (date, start_time, id), or None if the cursor is invalid.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        session_date, start_time, session_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(session_date), time.fromisoformat(start_time), int(session_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_after(columns, values):
+    """
+    Filter for the rows that sort after 'values' in the order of 'columns'
+    (all ascending), written as an OR of equalities so it can use a composite index.
+    """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal = [previous == previous_value for previous, previous_value in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal, column > value))
+    return or_(*clauses)
+
+
+def parse_limit(value, default, maximum):
+    """
+    Parse the 'limit' query parameter.
+    Returns a tuple: (limit, error_message).
+    """
+    if value is None:
+        return default, ""
+    try:
+        limit = int(value)
+    except ValueError:
+        return None, "Invalid limit. It must be an integer."
+    if limit < 1 or limit > maximum:
+        return None, f"Invalid limit. It must be between 1 and {maximum}."
+    return limit, ""
+
+
+def parse_fields(value, allowed):
+    """
+    Parse the comma-separated 'fields' query parameter.
+    Returns a tuple: (fields, error_message). Fields keep the order of 'allowed'.
+    """
+    if not value:
+        return list(allowed), ""
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        return None, f"Unknown fields: {', '.join(sorted(unknown))}."
+    return [field for field in allowed if field in requested], ""
@@ -0,0 +1,80 @@
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.statement_hooks import on_statement
+
+MAX_LOGGED_PARAMETERS = 500
+
+
+def _route():
+    if not has_request_context():
+        return "<no request>"
+    return f"{request.method} {request.url_rule.rule if request.url_rule is not None else request.path}"
+
+
+def _record_statement(statement, parameters, seconds):
+    if "query_counts" not in g:
+        return
+    g.query_counts[statement] += 1
+    elapsed_ms = seconds * 1000
+    if elapsed_ms >= current_app.config["SLOW_QUERY_THRESHOLD_MS"]:
+        current_app.logger.warning(
+            "Slow query (%.1f ms) on %s: %s; parameters: %.*s",
+            elapsed_ms, _route(), statement, MAX_LOGGED_PARAMETERS, repr(parameters)
+        )
+
+
+def _start_request():
+    g.query_counts = Counter()
+
+
+def _check_repeated_statements(exc):
+    counts = g.pop("query_counts", None)
+    if not counts:
+        return
+    limit = current_app.config["N_PLUS_ONE_THRESHOLD"]
+    for statement, count in counts.items():
+        if count > limit:
+            current_app.logger.warning(
+                "Possible N+1 on %s: the same statement ran %d times (limit %d): %s",
+                _route(), count, limit, statement
+            )
+
+
+def init_query_diagnostics(app):
+    """
+    With QUERY_DIAGNOSTICS_ENABLED, log statements slower than
+    SLOW_QUERY_THRESHOLD_MS and requests that run the same parameterized
+    statement more than N_PLUS_ONE_THRESHOLD times.
+    """
+    if not app.config["QUERY_DIAGNOSTICS_ENABLED"]:
+        return
+    on_statement(_record_statement)
+    app.before_request(_start_request)
+    app.teardown_request(_check_repeated_statements)
+
+
+@contextmanager
+def assert_max_queries(maximum):
+    """
+    Fail with the list of statements if the block runs more than `maximum`
+    SQL statements on any engine. Yields the list of captured statements.
+
+        with assert_max_queries(1):
+            get_schedule_for_date("25-03-2025")
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    if len(statements) > maximum:
+        listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(statements, 1))
+        raise AssertionError(f"Expected at most {maximum} queries, {len(statements)} were run:\n{listing}")
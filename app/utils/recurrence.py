@@ -0,0 +1,160 @@
+import heapq
+from collections import namedtuple
+from datetime import timedelta
+from itertools import islice
+from flask import current_app
+from app.extensions import db
+from app.models import SeriesException, SessionSeries
+from app.utils.cache import LRUCache
+from app.utils.serializers import SESSION_FIELDS, compile_session_serializer
+
+# An expanded occurrence: the fields of a ClassSession row (id is None) plus its series.
+Occurrence = namedtuple("Occurrence", SESSION_FIELDS + ("series_id",))
+
+# Expansion windows used when paging through /api/classes.
+EXPANSION_WINDOW_DAYS = 31
+
+
+def expand_series(start_date, end_date, professor_id=None, exclude_series_id=None):
+    """
+    Expand every series overlapping [start_date, end_date] into its occurrences
+    in that window, skipping cancelled and moved ones (a moved occurrence is a
+    one-off ClassSession of its own). One query: the series with their
+    exceptions in the window.
+    Returns Occurrences sorted by schedule_sort_key.
+    """
+    query = (
+        db.session.query(SessionSeries, SeriesException.occurrence_date)
+        .outerjoin(SeriesException, db.and_(
+            SeriesException.series_id == SessionSeries.id,
+            SeriesException.occurrence_date.between(start_date, end_date)
+        ))
+        .filter(SessionSeries.start_date <= end_date, SessionSeries.end_date >= start_date)
+    )
+    if professor_id is not None:
+        query = query.filter(SessionSeries.professor_id == professor_id)
+    if exclude_series_id is not None:
+        query = query.filter(SessionSeries.id != exclude_series_id)
+
+    series_by_id, skipped = {}, set()
+    for series, occurrence_date in query:
+        series_by_id[series.id] = series
+        if occurrence_date is not None:
+            skipped.add((series.id, occurrence_date))
+
+    occurrences = []
+    for series in series_by_id.values():
+        day = max(start_date, series.start_date)
+        last = min(end_date, series.end_date)
+        while day <= last:
+            if series.weekdays & (1 << day.weekday()) and (series.id, day) not in skipped:
+                occurrences.append(Occurrence(
+                    None, series.title, series.description, day, series.start_time, series.end_time,
+                    series.professor_id, series.session_type, series.id
+                ))
+            day += timedelta(days=1)
+    occurrences.sort(key=schedule_sort_key)
+    return occurrences
+
+
+def init_expansion_cache(app):
+    """Small per-process cache of expanded windows, bounded by SERIES_EXPANSION_CACHE_SIZE."""
+    app.extensions["series_expansions"] = LRUCache(max_entries=app.config["SERIES_EXPANSION_CACHE_SIZE"])
+
+
+def _expansion_cache():
+    return current_app.extensions["series_expansions"]
+
+
+def cached_expansion(start_date, end_date, version):
+    """
+    expand_series for a read path. 'version' must change whenever a series
+    touching the window changes: the sum of the window's schedule_days versions.
+    """
+    key = (start_date, end_date, version)
+    cache = _expansion_cache()
+    occurrences = cache.get(key)
+    if occurrences is None:
+        occurrences = tuple(expand_series(start_date, end_date))
+        cache.set(key, occurrences)
+    return occurrences
+
+
+def series_bounds(version):
+    """First start_date and last end_date over all series, or (None, None) without any."""
+    key = ("bounds", version)
+    cache = _expansion_cache()
+    bounds = cache.get(key)
+    if bounds is None:
+        bounds = db.session.query(db.func.min(SessionSeries.start_date), db.func.max(SessionSeries.end_date)).one()
+        bounds = tuple(bounds)
+        cache.set(key, bounds)
+    return bounds
+
+
+def iter_occurrences(start_date, version):
+    """
+    Occurrences from start_date onwards, in order, expanded one window at a time
+    so a page only pays for the windows it reaches. Windows are aligned on the
+    first series start so consecutive pages share cached windows.
+    """
+    first, last = series_bounds(version)
+    if first is None:
+        return
+    day = first
+    if start_date is not None and start_date > first:
+        day += timedelta(days=(start_date - first).days // EXPANSION_WINDOW_DAYS * EXPANSION_WINDOW_DAYS)
+    while day <= last:
+        window_end = day + timedelta(days=EXPANSION_WINDOW_DAYS - 1)
+        # Tagged so a global version never matches the key of a range version.
+        yield from cached_expansion(day, window_end, ("all", version))
+        day = window_end + timedelta(days=1)
+
+
+def schedule_sort_key(item):
+    """
+    Keyset position (date, start_time, id) of a SESSION_FIELDS row or an Occurrence.
+    Occurrences use the negated series id, so they come before the sessions that
+    start at the same time and cursors keep the same format.
+    """
+    return item[3], item[4], item[0] if item[0] is not None else -item.series_id
+
+
+def merge_schedule(rows, occurrences):
+    """
+    Serialize SESSION_FIELDS rows and Occurrences, both sorted by schedule_sort_key,
+    into one list in schedule order. Occurrences carry their series_id.
+    """
+    serialize = compile_session_serializer(SESSION_FIELDS)
+    return [
+        serialize(item) if item[0] is not None else dict(serialize(item[:-1]), series_id=item.series_id)
+        for item in heapq.merge(rows, occurrences, key=schedule_sort_key)
+    ]
+
+
+def merge_page(rows, position, fields, limit, version=None, occurrences=None):
+    """
+    Merge a page of rows ((date, start_time, id, *fields), at most limit + 1 of
+    them after 'position') with the occurrences after 'position'. 'occurrences',
+    sorted by schedule_sort_key, defaults to those of every series at 'version'.
+    Returns up to limit + 1 (keyset, values, series_id) tuples; series_id is None for sessions.
+    """
+    indexes = [SESSION_FIELDS.index(field) for field in fields]
+    sessions = ((tuple(row[:3]), tuple(row[3:]), None) for row in rows)
+    if occurrences is None:
+        occurrences = iter_occurrences(position[0] if position else None, version)
+    occurrences = (
+        (schedule_sort_key(occurrence), tuple(occurrence[i] for i in indexes), occurrence.series_id)
+        for occurrence in occurrences
+        if position is None or schedule_sort_key(occurrence) > tuple(position)
+    )
+    return list(islice(heapq.merge(sessions, occurrences, key=lambda item: item[0]), limit + 1))
+
+
+def find_series_conflicts(day, start_time, end_time, professor_id=None, exclude_series_id=None):
+    """Return the IDs of series with an occurrence on 'day' overlapping [start_time, end_time)."""
+    return sorted({
+        occurrence.series_id
+        for occurrence in expand_series(day, day, professor_id, exclude_series_id)
+        if occurrence.start_time < end_time and occurrence.end_time > start_time
+    })
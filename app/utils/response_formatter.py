@@ -8,9 +8,11 @@ def success_response(message, data, status_code):
     }
     return jsonify(response), status_code
 
-def error_response(message, status_code):
-    """Format an error response with a message."""
+def error_response(message, status_code, details=None):
+    """Format an error response with a message and optional details."""
     response = {
         "error": message
     }
+    if details is not None:
+        response["details"] = details
     return jsonify(response), status_code
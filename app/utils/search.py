@@ -0,0 +1,127 @@
+"""
+Full-text search over class session titles and descriptions.
+
+SQLite (development and tests) uses an FTS5 table, class_sessions_fts, whose
+rowid is the session id; class_controller keeps it in sync on every write.
+MySQL/MariaDB use a FULLTEXT index and PostgreSQL a GIN index on a tsvector
+expression; both are maintained by the database itself. Other databases have
+no search.
+"""
+import re
+from sqlalchemy import DDL, column, event, func, literal_column, table, text
+from sqlalchemy.dialects.mysql import match
+from app.extensions import db
+from app.models import ClassSession
+
+FTS_TABLE = "class_sessions_fts"
+# Title matches weigh more than description matches in the SQLite ranking.
+FTS_RANK = f"bm25({FTS_TABLE}, 10.0, 1.0)"
+POSTGRES_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+SEARCH_DIALECTS = ("sqlite", "mysql", "mariadb", "postgresql")
+# InnoDB does not index words shorter than innodb_ft_min_token_size or in its
+# default stopword list, so a required (+) term among them matches nothing.
+MYSQL_MIN_TOKEN_SIZE = 3
+MYSQL_STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i",
+    "in", "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when",
+    "where", "who", "will", "with", "und", "www",
+))
+
+fts_table = table(FTS_TABLE, column("rowid"), column("title"), column("description"))
+
+CREATE_SQLITE_INDEX = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+DROP_SQLITE_INDEX = DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+CREATE_MYSQL_INDEX = DDL("CREATE FULLTEXT INDEX ix_class_sessions_fulltext ON class_sessions (title, description)")
+CREATE_POSTGRES_INDEX = DDL(
+    f"CREATE INDEX IF NOT EXISTS ix_class_sessions_fulltext ON class_sessions USING gin (({POSTGRES_DOCUMENT}))"
+)
+
+event.listen(ClassSession.__table__, "after_create", CREATE_SQLITE_INDEX.execute_if(dialect="sqlite"))
+event.listen(ClassSession.__table__, "before_drop", DROP_SQLITE_INDEX.execute_if(dialect="sqlite"))
+event.listen(ClassSession.__table__, "after_create", CREATE_MYSQL_INDEX.execute_if(dialect=("mysql", "mariadb")))
+event.listen(ClassSession.__table__, "after_create", CREATE_POSTGRES_INDEX.execute_if(dialect="postgresql"))
+
+
+def _dialect():
+    return db.session.get_bind(mapper=ClassSession).dialect.name
+
+
+def search_available():
+    """Whether full-text search is implemented for the database in use."""
+    return _dialect() in SEARCH_DIALECTS
+
+
+def needs_index_sync():
+    """Whether writes must update the search index themselves (only the SQLite FTS5 table)."""
+    return _dialect() == "sqlite"
+
+
+def index_sessions(rows, replace=True):
+    """
+    Index (id, title, description) rows in the current transaction.
+    replace=False skips removing previous entries, for sessions that were just inserted.
+    """
+    rows = list(rows)
+    if not rows or not needs_index_sync():
+        return
+    if replace:
+        unindex_sessions([row[0] for row in rows])
+    db.session.execute(fts_table.insert(), [
+        {"rowid": session_id, "title": title, "description": description or ""}
+        for session_id, title, description in rows
+    ])
+
+
+def unindex_sessions(session_ids):
+    """Remove sessions from the search index in the current transaction."""
+    session_ids = list(session_ids)
+    if session_ids and needs_index_sync():
+        db.session.execute(fts_table.delete().where(fts_table.c.rowid.in_(session_ids)))
+
+
+def search_terms(query, max_terms):
+    """
+    Split a user query into lowercase word terms, keeping at most max_terms.
+    On MySQL/MariaDB, words the FULLTEXT index does not hold are left out.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if _dialect() in ("mysql", "mariadb"):
+        terms = [term for term in terms if len(term) >= MYSQL_MIN_TOKEN_SIZE and term not in MYSQL_STOPWORDS]
+    return terms[:max_terms]
+
+
+def search_sessions(terms, columns, filters, limit, offset):
+    """
+    Sessions matching every term (each as a prefix), best matches first.
+    Returns rows of 'columns' with the extra 'filters' applied.
+    """
+    dialect = _dialect()
+    query = db.session.query(*columns)
+    if dialect == "sqlite":
+        expression = " ".join(f'"{term}"*' for term in terms)
+        query = (
+            query.select_from(fts_table)
+            .join(ClassSession, ClassSession.id == fts_table.c.rowid)
+            .filter(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=expression))
+            .order_by(text(FTS_RANK))
+        )
+    elif dialect in ("mysql", "mariadb"):
+        against = match(ClassSession.title, ClassSession.description,
+                        against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+        query = query.filter(against).order_by(against.desc())
+    elif dialect == "postgresql":
+        document = literal_column(POSTGRES_DOCUMENT)
+        ts_query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        query = query.filter(document.op("@@")(ts_query)).order_by(func.ts_rank(document, ts_query).desc())
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}.")
+    return (
+        query.filter(*filters)
+        .order_by(ClassSession.date, ClassSession.start_time, ClassSession.id)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
@@ -0,0 +1,58 @@
+from functools import lru_cache
+from app.models import ClassSession
+
+# Public fields of a class session, in response order.
+SESSION_FIELDS = ("id", "title", "description", "date", "start_time", "end_time", "professor_id", "session_type")
+
+
+@lru_cache(maxsize=4096)
+def format_date(value):
+    """Format a date as DD-MM-YYYY. Schedules repeat the same dates, so results are cached."""
+    return f"{value.day:02d}-{value.month:02d}-{value.year:04d}"
+
+
+@lru_cache(maxsize=1440)
+def format_time(value):
+    """Format a time as HH:MM."""
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+
+_FORMATTERS = {"date": format_date, "start_time": format_time, "end_time": format_time}
+
+
+def session_columns(fields=SESSION_FIELDS):
+    """Return the ClassSession columns to select for 'fields', in the same order."""
+    return [getattr(ClassSession, field) for field in fields]
+
+
+@lru_cache(maxsize=64)
+def compile_session_serializer(fields=SESSION_FIELDS):
+    """
+    Build a function turning a row tuple (selected with session_columns(fields))
+    into a response dict. Only date and time columns are reformatted.
+    """
+    formatted = tuple((field, _FORMATTERS[field]) for field in fields if field in _FORMATTERS)
+
+    def serialize(row):
+        data = dict(zip(fields, row))
+        for field, format_value in formatted:
+            data[field] = format_value(data[field])
+        return data
+
+    return serialize
+
+
+def compile_session_formatter(fields=SESSION_FIELDS):
+    """Like compile_session_serializer, but returns the formatted values as a list (for CSV)."""
+    formatters = [_FORMATTERS.get(field) for field in fields]
+
+    def format_row(row):
+        return [format_value(value) if format_value else value for format_value, value in zip(formatters, row)]
+
+    return format_row
+
+
+def serialize_sessions(rows, fields=SESSION_FIELDS):
+    """Serialize an iterable of row tuples selected with session_columns(fields)."""
+    serialize = compile_session_serializer(tuple(fields))
+    return [serialize(row) for row in rows]
@@ -0,0 +1,63 @@
+"""
+Date/time SQL expressions that differ per database, compiled with @compiles
+for SQLite (development and tests), PostgreSQL and MySQL/MariaDB (production).
+"""
+from sqlalchemy import Date, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class week_start(FunctionElement):
+    """The Monday of the week containing a date."""
+    type = Date()
+    inherit_cache = True
+    name = "week_start"
+
+
+class minutes_between(FunctionElement):
+    """Whole minutes from a start time to an end time on the same day."""
+    type = Integer()
+    inherit_cache = True
+    name = "minutes_between"
+
+
+def _arguments(element, compiler, **kw):
+    return [compiler.process(argument, **kw) for argument in element.clauses]
+
+
+@compiles(week_start)
+def _week_start_default(element, compiler, **kw):
+    (day,) = _arguments(element, compiler, **kw)
+    # WEEKDAY() is 0 for Monday in MySQL/MariaDB.
+    return f"DATE_SUB({day}, INTERVAL WEEKDAY({day}) DAY)"
+
+
+@compiles(week_start, "sqlite")
+def _week_start_sqlite(element, compiler, **kw):
+    (day,) = _arguments(element, compiler, **kw)
+    # strftime('%w') is 0 for Sunday; shift it so Monday is 0.
+    return f"date({day}, '-' || ((CAST(strftime('%w', {day}) AS INTEGER) + 6) % 7) || ' days')"
+
+
+@compiles(week_start, "postgresql")
+def _week_start_postgresql(element, compiler, **kw):
+    (day,) = _arguments(element, compiler, **kw)
+    return f"CAST(date_trunc('week', {day}) AS DATE)"
+
+
+@compiles(minutes_between)
+def _minutes_between_default(element, compiler, **kw):
+    start, end = _arguments(element, compiler, **kw)
+    return f"((TIME_TO_SEC({end}) - TIME_TO_SEC({start})) DIV 60)"
+
+
+@compiles(minutes_between, "sqlite")
+def _minutes_between_sqlite(element, compiler, **kw):
+    start, end = _arguments(element, compiler, **kw)
+    return f"(CAST(strftime('%s', {end}) AS INTEGER) - CAST(strftime('%s', {start}) AS INTEGER)) / 60"
+
+
+@compiles(minutes_between, "postgresql")
+def _minutes_between_postgresql(element, compiler, **kw):
+    start, end = _arguments(element, compiler, **kw)
+    return f"CAST(EXTRACT(EPOCH FROM ({end} - {start})) / 60 AS INTEGER)"
@@ -0,0 +1,40 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Records how long each phase of application start-up takes, in order.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total(self):
+        return sum(self.phases.values())
+
+    def report(self):
+        """Return a plain-text table of the phases and their share of the total."""
+        total = self.total or 1.0
+        width = max((len(name) for name in self.phases), default=5)
+        lines = [f"{name:<{width}}  {seconds * 1000:8.1f} ms  {seconds / total:6.1%}"
+                 for name, seconds in self.phases.items()]
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def get_startup_timer(app):
+    """The StartupTimer that create_app filled in for 'app'."""
+    return app.extensions["startup_timer"]
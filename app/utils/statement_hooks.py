@@ -0,0 +1,42 @@
+"""
+One pair of SQLAlchemy engine listeners shared by request metrics and query
+diagnostics. Each statement run inside a request is timed once and handed to
+every registered callback. Listening on the Engine class covers the primary
+and every replica.
+"""
+import threading
+import time
+from flask import has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_callbacks = ()
+_lock = threading.Lock()
+
+
+def on_statement(callback):
+    """
+    Call callback(statement, parameters, seconds) after every SQL statement run
+    inside a request. Registering the same callback again has no effect.
+    """
+    global _callbacks
+    with _lock:
+        if not _callbacks:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        if callback not in _callbacks:
+            _callbacks = _callbacks + (callback,)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        context._statement_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_statement_started", None)
+    if started is None or not has_request_context():
+        return
+    seconds = time.perf_counter() - started
+    for callback in _callbacks:
+        callback(statement, parameters, seconds)
@@ -1,45 +1,307 @@
-from datetime import datetime, time
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from flask import current_app, has_app_context
+
+REQUIRED_SESSION_FIELDS = ["title", "date", "start_time", "end_time", "professor_id", "session_type"]
+REQUIRED_SERIES_FIELDS = ["title", "start_date", "end_date", "start_time", "end_time", "professor_id", "session_type"]
+
+FORMAT_ERROR = "Invalid date or time format. Please use 'DD-MM-YYYY' for dates and 'HH:MM' for times."
+
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """Parse a 'DD-MM-YYYY' string. Raises ValueError on bad input."""
+    return datetime.strptime(date_str, "%d-%m-%Y").date()
+
+
+@lru_cache(maxsize=1024)
+def parse_time(time_str):
+    """Parse an 'HH:MM' string. Raises ValueError on bad input."""
+    return datetime.strptime(time_str, "%H:%M").time()
+
+
+@dataclass(frozen=True)
+class SessionInput:
+    """
+    A class session request, parsed once and shared by validation and persistence.
+    """
+    title: str
+    description: str
+    date: object
+    start_time: object
+    end_time: object
+    professor_id: int
+    session_type: str
+
+    @classmethod
+    def from_dict(cls, data, defaults=None):
+        """
+        Parse and type-check request data. Fields missing from 'data' are taken
+        from 'defaults' (another SessionInput) when given, otherwise they are required.
+        Returns a tuple: (SessionInput, error_message).
+        """
+        if not isinstance(data, dict):
+            return None, "Each session must be a JSON object."
+        if defaults is None:
+            for field in REQUIRED_SESSION_FIELDS:
+                if field not in data:
+                    return None, f"Missing required field: {field}"
+            defaults = {"description": ""}
+        else:
+            defaults = defaults.values()
+        values = dict(defaults, **{field: data[field] for field in cls.__dataclass_fields__ if field in data})
+
+        try:
+            for field, parse in (("date", parse_date), ("start_time", parse_time), ("end_time", parse_time)):
+                if field in data:
+                    values[field] = parse(data[field])
+        except (TypeError, ValueError):
+            return None, FORMAT_ERROR
+        if not isinstance(values["professor_id"], int) or isinstance(values["professor_id"], bool):
+            return None, "professor_id must be an integer."
+        if not isinstance(values["session_type"], str):
+            return None, "session_type must be a string."
+        if not isinstance(values["title"], str) or len(values["title"]) > 100:
+            return None, "title must be a string of at most 100 characters."
+        if values["description"] is not None and (
+                not isinstance(values["description"], str) or len(values["description"]) > 200):
+            return None, "description must be a string of at most 200 characters."
+        return cls(**values), ""
+
+    @classmethod
+    def from_model(cls, session):
+        return cls(**{field: getattr(session, field) for field in cls.__dataclass_fields__})
+
+    def values(self):
+        """Column values for a ClassSession row."""
+        # A shallow copy: dataclasses.asdict would deep-copy every date and time.
+        return dict(self.__dict__)
+
+
+@dataclass(frozen=True)
+class SeriesInput:
+    """
+    A recurring session request: the fields of a SessionInput, with a date
+    range and the weekdays it runs on instead of a single date.
+    """
+    title: str
+    description: str
+    start_date: object
+    end_date: object
+    weekdays: frozenset
+    start_time: object
+    end_time: object
+    professor_id: int
+    session_type: str
+
+    @classmethod
+    def from_dict(cls, data, defaults=None, max_days=None):
+        """
+        Parse and type-check request data, like SessionInput.from_dict.
+        'weekdays' (0 is Monday) defaults to the session type's allowed weekdays, or every day.
+        Returns a tuple: (SeriesInput, error_message).
+        """
+        if not isinstance(data, dict):
+            return None, "The series must be a JSON object."
+        if defaults is None:
+            for field in REQUIRED_SERIES_FIELDS:
+                if field not in data:
+                    return None, f"Missing required field: {field}"
+        session_data = {field: data[field] for field in SessionInput.__dataclass_fields__ if field in data}
+        if "start_date" in data:
+            session_data["date"] = data["start_date"]
+        session_input, message = SessionInput.from_dict(
+            session_data, defaults=defaults.first_occurrence_input() if defaults else None
+        )
+        if session_input is None:
+            return None, message
+        values = session_input.values()
+        values["start_date"] = values.pop("date")
+
+        try:
+            values["end_date"] = parse_date(data["end_date"]) if "end_date" in data else defaults.end_date
+        except (TypeError, ValueError):
+            return None, FORMAT_ERROR
+        if values["end_date"] < values["start_date"]:
+            return None, "end_date must not be before start_date."
+        if max_days is not None and (values["end_date"] - values["start_date"]).days + 1 > max_days:
+            return None, f"A series cannot span more than {max_days} days."
+
+        weekdays = data.get("weekdays")
+        if weekdays is None:
+            if defaults is not None:
+                values["weekdays"] = defaults.weekdays
+            else:
+                values["weekdays"] = get_schedule_rules().window(values["session_type"])[0] or frozenset(range(7))
+        elif (not isinstance(weekdays, list) or not weekdays
+              or not all(isinstance(day, int) and not isinstance(day, bool) and 0 <= day <= 6 for day in weekdays)):
+            return None, "weekdays must be a non-empty list of integers from 0 (Monday) to 6 (Sunday)."
+        else:
+            values["weekdays"] = frozenset(weekdays)
+        return cls(**values), ""
+
+    @classmethod
+    def from_model(cls, series):
+        values = {field: getattr(series, field) for field in cls.__dataclass_fields__ if field != "weekdays"}
+        return cls(weekdays=frozenset(day for day in range(7) if series.weekdays & (1 << day)), **values)
+
+    def values(self):
+        """Column values for a SessionSeries row."""
+        values = dict(self.__dict__)
+        values["weekdays"] = sum(1 << day for day in self.weekdays)
+        return values
+
+    def occurrence_dates(self):
+        """Every date the series runs on, in order."""
+        day, dates = self.start_date, []
+        while day <= self.end_date:
+            if day.weekday() in self.weekdays:
+                dates.append(day)
+            day += timedelta(days=1)
+        return dates
+
+    def first_occurrence_input(self, weekday=None):
+        """
+        A SessionInput for the first occurrence (on 'weekday' if given), or None
+        if the series never runs on that weekday.
+        """
+        day = self.start_date
+        if weekday is not None:
+            day += timedelta(days=(weekday - day.weekday()) % 7)
+            if day > self.end_date:
+                return None
+        values = {field: getattr(self, field) for field in SessionInput.__dataclass_fields__ if field != "date"}
+        return SessionInput(date=day, **values)
+
+    def check_rules(self):
+        """
+        Validate every weekday of the series against the schedule rules.
+        Returns a tuple: (bool, message).
+        """
+        rules = get_schedule_rules()
+        for weekday in sorted(self.weekdays):
+            occurrence = self.first_occurrence_input(weekday)
+            if occurrence is not None:
+                valid, message = rules.check(occurrence)
+                if not valid:
+                    return False, message
+        return True, ""
+
+
+class ScheduleRules:
+    """
+    Schedule constraints per session type, compiled once from a rule table:
+
+        {"class": {"weekdays": [0, 1, 2, 3], "start": "10:00", "end": "12:00",
+                   "weekday_message": "...", "time_message": "..."}}
+
+    Weekdays use Python numbering (Monday is 0). Session types missing from the
+    table only need to end after they start.
+    """
+
+    def __init__(self, rules):
+        self._checks = {}
+        self._windows = {}
+        for session_type, rule in rules.items():
+            weekdays = frozenset(rule["weekdays"]) if "weekdays" in rule else None
+            start = parse_time(rule["start"]) if "start" in rule else None
+            end = parse_time(rule["end"]) if "end" in rule else None
+            checks = [_ends_after_start]
+            if weekdays is not None:
+                checks.append(_weekday_predicate(weekdays, rule.get(
+                    "weekday_message", f"'{session_type}' sessions cannot be scheduled on that day.")))
+            if start is not None or end is not None:
+                checks.append(_window_predicate(start or time.min, end or time.max, rule.get(
+                    "time_message", f"'{session_type}' sessions must be scheduled within their allowed hours.")))
+            self._checks[session_type.lower()] = tuple(checks)
+            self._windows[session_type.lower()] = (weekdays, start, end)
+        self._default_checks = (_ends_after_start,)
+
+    def window(self, session_type):
+        """
+        Return (weekdays, start, end) allowed for a session type.
+        Any of them is None when the rule table does not constrain it.
+        """
+        return self._windows.get(session_type.lower(), (None, None, None))
+
+    def check(self, session):
+        """
+        Validate one SessionInput.
+        Returns a tuple: (bool, message).
+        """
+        for predicate, message in self._checks.get(session.session_type.lower(), self._default_checks):
+            if not predicate(session):
+                return False, message
+        return True, ""
+
+    def check_batch(self, sessions):
+        """
+        Validate many SessionInputs in one pass.
+        Returns a list with an error message for each failing session, or "" when it passes.
+        """
+        checks_for = self._checks.get
+        default = self._default_checks
+        results = []
+        for session in sessions:
+            message = ""
+            for predicate, failure in checks_for(session.session_type.lower(), default):
+                if not predicate(session):
+                    message = failure
+                    break
+            results.append(message)
+        return results
+
+
+_ends_after_start = (lambda session: session.end_time > session.start_time, "End time must be after start time.")
+
+
+def _weekday_predicate(weekdays, message):
+    return lambda session: session.date.weekday() in weekdays, message
+
+
+def _window_predicate(start, end, message):
+    return lambda session: start <= session.start_time < end and start < session.end_time <= end, message
+
+
+def get_schedule_rules():
+    """Return the compiled rules of the current app (or of the default config outside one)."""
+    if has_app_context():
+        return current_app.extensions["schedule_rules"]
+    return _default_rules()
+
+
+@lru_cache(maxsize=1)
+def _default_rules():
+    from app.config import Config
+
+    return ScheduleRules(Config.SESSION_RULES)
+
 
 def is_valid_session_schedule(session_type, session_date_str, start_time_str, end_time_str):
     """
-    Validates the session schedule based on the session type.
+    Validates the session schedule based on the session type, using the
+    SESSION_RULES table from the config. By default:
 
     For regular classes ("class"):
       - Must be scheduled from Monday to Thursday.
       - Time must be between 10:00 and 12:00 (Chile Time).
 
-    For Q&A sessions ("qa"):
-      - Typically scheduled on Fridays.
-      - You can enforce Friday or allow flexibility based on your needs.
+    For Q&A sessions ("qa") and demo sessions ("demo"):
+      - Scheduled on Fridays.
 
-    For demo sessions ("demo"):
-      - Typically scheduled on Fridays.
-      - You can enforce Friday or allow flexibility based on your needs.
-      
     Returns a tuple: (bool, message).
     """
     try:
-        session_date = datetime.strptime(session_date_str, "%d-%m-%Y").date()
-        start_time_obj = datetime.strptime(start_time_str, "%H:%M").time()
-        end_time_obj = datetime.strptime(end_time_str, "%H:%M").time()
-    except ValueError:
-        return False, "Invalid date or time format. Please use 'DD-MM-YYYY' for dates and 'HH:MM' for times."
-    
-    session_type = session_type.lower()
-    if session_type == "class":
-        # Regular classes: Monday (0) to Thursday (3)
-        if session_date.weekday() not in [0, 1, 2, 3]:
-            return False, "Regular classes can only be scheduled from Monday to Thursday."
-        valid_start, valid_end = time(10, 0), time(12, 0)
-        if not (valid_start <= start_time_obj < valid_end and valid_start < end_time_obj <= valid_end):
-            return False, "Regular classes must be scheduled between 10:00 and 12:00 Chile Time."
-    elif session_type == "qa":
-        # Q&A sessions: for example, enforce Fridays (weekday 4)
-        if session_date.weekday() != 4:
-            return False, "Q&A sessions are typically scheduled on Fridays."
-    elif session_type == "demo":
-        # Demo sessions: for example, enforce Fridays (weekday 4)
-        if session_date.weekday() != 4:
-            return False, "Demo sessions are typically scheduled on Fridays."
-    
-    return True, ""
+        session = SessionInput(
+            title="",
+            description="",
+            date=parse_date(session_date_str),
+            start_time=parse_time(start_time_str),
+            end_time=parse_time(end_time_str),
+            professor_id=0,
+            session_type=session_type
+        )
+    except (TypeError, ValueError):
+        return False, FORMAT_ERROR
+    return get_schedule_rules().check(session)
@@ -0,0 +1,280 @@
+"""
+Load benchmark: the API hot paths against a seeded SQLite database.
+
+Seeds --sessions class sessions and --users users, then drives
+GET /api/schedule, GET /api/classes, POST /auth/login and POST /api/classes
+through the Flask test client, or through HTTP when --base-url points to a
+running server (start it against the same --database-uri, e.g.
+SQLALCHEMY_DATABASE_URI=sqlite:////tmp/bench.db JWT_SECRET_KEY=<secret> gunicorn -c gunicorn.conf.py "app:create_app()").
+--database-uri must be a SQLite file: the benchmark drops and recreates every
+table, so it only reuses a file it created itself, or a new or empty one.
+
+Reports throughput and p50/p95/p99 latency per scenario, writes them as JSON,
+and with --baseline exits with status 1 when a scenario regresses by more
+than --threshold.
+
+Usage: python benchmarks/bench_api.py [--sessions 20000] [--requests 500]
+       [--output results.json] [--baseline baseline.json] [--threshold 0.15]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as dtime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine import make_url
+from app import create_app
+from app.extensions import db, password_hasher
+from app.models import ClassSession, User
+
+SCENARIOS = ("schedule", "classes", "login", "create_class")
+FIRST_DAY = date(2025, 3, 3)
+PASSWORD = "benchmark-password"
+# Table created in every database the benchmark seeds; only such databases are wiped again.
+MARKER_TABLE = "benchmark_marker"
+
+
+def seed(sessions, users):
+    """
+    Insert `sessions` sessions (20 per day, two rooms' worth of professors) and `users` users.
+    Returns the list of seeded dates.
+    """
+    db.session.execute(ClassSession.__table__.insert(), [{
+        "title": f"Session {i}",
+        "description": "Benchmark session",
+        "date": FIRST_DAY + timedelta(days=i // 20),
+        "start_time": dtime(10 + (i % 2), 0),
+        "end_time": dtime(11 + (i % 2), 0),
+        "professor_id": i % 50,
+        "session_type": "class",
+    } for i in range(sessions)])
+    # Hashing is deliberately slow; every user shares one hash.
+    password_hash = password_hasher.hash(PASSWORD)
+    db.session.execute(User.__table__.insert(), [
+        {"email": f"user{i}@bench.local", "password_hash": password_hash} for i in range(users)
+    ])
+    db.session.commit()
+    return [FIRST_DAY + timedelta(days=day) for day in range((sessions + 19) // 20)]
+
+
+def check_disposable(database_uri):
+    """
+    Return an error message unless 'database_uri' is a SQLite file the benchmark may wipe:
+    one that does not exist yet, has no tables, or was seeded by the benchmark before.
+    """
+    url = make_url(database_uri)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return "--database-uri must be a SQLite file: the benchmark drops and recreates every table."
+    if not os.path.exists(url.database):
+        return None
+    with sqlite3.connect(url.database) as conn:
+        tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if tables and MARKER_TABLE not in tables:
+        return f"{url.database} was not created by the benchmark; refusing to drop its tables."
+    return None
+
+
+def free_slots(after):
+    """Yield (date, start, end) slots allowed by the default rules and after every seeded date."""
+    day = after + timedelta(days=1)
+    while True:
+        if day.weekday() <= 3:
+            yield day, "10:00", "11:00"
+            yield day, "11:00", "12:00"
+        day += timedelta(days=1)
+
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HTTPDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers=dict(headers or {}, **({"Content-Type": "application/json"} if data else {})))
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(driver, make_request, expected_status, requests, concurrency, warmup):
+    for i in range(warmup):
+        driver.request(*make_request(-1 - i))
+
+    def timed(i):
+        started = time.perf_counter()
+        status, _ = driver.request(*make_request(i))
+        return time.perf_counter() - started, status == expected_status
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as executor:
+            samples = list(executor.map(timed, range(requests)))
+    else:
+        samples = [timed(i) for i in range(requests)]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_rps": requests / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run.
+    Returns a list of regression messages: more errors than the baseline, or throughput below,
+    or p95 above, the baseline by more than threshold.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors vs baseline {previous.get('errors', 0)}")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {current['throughput_rps']:.0f} rps "
+                               f"vs baseline {previous['throughput_rps']:.0f} rps")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']:.2f} ms vs baseline {previous['p95_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario (login runs a tenth).")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the test client.")
+    parser.add_argument("--database-uri", help="Database to seed (default: a temporary SQLite file).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios).difference(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    database_uri = args.database_uri
+    if database_uri is None:
+        database_uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    message = check_disposable(database_uri)
+    if message:
+        sys.exit(message)
+    # Every benchmark request comes from one client: rate limits would turn most of them into 429s.
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_uri, "JWT_SECRET_KEY": "benchmark-secret-key-benchmark-secret",
+                      "RATE_LIMIT_ENABLED": False})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(db.text(f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} (id INTEGER PRIMARY KEY)"))
+        seeded_dates = seed(args.sessions, args.users)
+
+    driver = HTTPDriver(args.base_url) if args.base_url else TestClientDriver(app)
+    rng = random.Random(args.seed)
+    credentials = {"email": "user0@bench.local", "password": PASSWORD}
+    status, body = driver.request("POST", "/auth/login", credentials)
+    if status != 200:
+        sys.exit(f"Login failed with status {status}: {body[:200]!r}")
+    auth = {"Authorization": f"Bearer {json.loads(body)['token']}"}
+    slots = free_slots(seeded_dates[-1] if seeded_dates else FIRST_DAY)
+    slots_lock = threading.Lock()
+
+    def create_class_request(i):
+        # The generator is shared by the --concurrency threads.
+        with slots_lock:
+            day, start, end = next(slots)
+        return ("POST", "/api/classes", {
+            "title": f"Bench {i}", "date": day.strftime("%d-%m-%Y"), "start_time": start,
+            "end_time": end, "professor_id": 1, "session_type": "class"}, auth)
+
+    plans = {
+        "schedule": (lambda i: ("GET", f"/api/schedule?date={rng.choice(seeded_dates):%d-%m-%Y}"), 200),
+        "classes": (lambda i: ("GET", "/api/classes?limit=100"), 200),
+        "login": (lambda i: ("POST", "/auth/login",
+                             {"email": f"user{rng.randrange(args.users)}@bench.local", "password": PASSWORD}), 200),
+        "create_class": (create_class_request, 201),
+    }
+
+    results = {}
+    for name in scenarios:
+        make_request, expected = plans[name]
+        # Password hashing dominates login; fewer requests keep the run short.
+        requests = max(1, args.requests // 10) if name == "login" else args.requests
+        warmup = min(args.warmup, 2) if name == "login" else args.warmup
+        results[name] = run_scenario(driver, make_request, expected, requests, args.concurrency, warmup)
+        r = results[name]
+        print(f"{name:<13} {r['throughput_rps']:>9.1f} rps  p50 {r['p50_ms']:>8.2f} ms  "
+              f"p95 {r['p95_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms  errors {r['errors']}")
+
+    report = {
+        "meta": {
+            "target": args.base_url or "test_client",
+            "sessions": args.sessions,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "json_provider": type(app.json).__name__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: ClassSession list serialization.
+
+Compares the original path (full ORM instances, a dict comprehension with
+strftime per row, stdlib JSON) with the shared serializer (column tuples,
+cached date/time formatting, the configured JSON provider).
+
+Usage: python benchmarks/bench_serializer.py [--rows 20000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from app.models import ClassSession
+from app.utils.serializers import serialize_sessions, session_columns
+
+
+def seed(rows):
+    start = date(2025, 3, 3)
+    db.session.execute(ClassSession.__table__.insert(), [{
+        "title": f"Session {i}",
+        "description": "Benchmark session",
+        "date": start + timedelta(days=i // 20),
+        "start_time": dtime(10, 0),
+        "end_time": dtime(11, 0),
+        "professor_id": i % 50,
+        "session_type": "class",
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def original_path():
+    sessions = ClassSession.query.all()
+    sessions_list = [{
+        "id": s.id,
+        "title": s.title,
+        "description": s.description,
+        "date": s.date.strftime("%d-%m-%Y"),
+        "start_time": s.start_time.strftime("%H:%M"),
+        "end_time": s.end_time.strftime("%H:%M"),
+        "professor_id": s.professor_id,
+        "session_type": s.session_type
+    } for s in sessions]
+    db.session.expunge_all()
+    return json.dumps(sessions_list, sort_keys=True).encode()
+
+
+def shared_serializer_path(app):
+    rows = db.session.query(*session_columns()).all()
+    return app.json.response(serialize_sessions(rows)).get_data()
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        assert json.loads(original_path()) == json.loads(shared_serializer_path(app))
+
+        baseline = best_of(args.repeat, original_path)
+        current = best_of(args.repeat, lambda: shared_serializer_path(app))
+
+    print(f"JSON provider: {type(app.json).__name__}")
+    print(f"original path:     {args.rows / baseline:>12,.0f} rows/s ({baseline * 1000:.1f} ms)")
+    print(f"shared serializer: {args.rows / current:>12,.0f} rows/s ({current * 1000:.1f} ms)")
+    print(f"speedup:           {baseline / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Gunicorn settings for production: gunicorn --config gunicorn.conf.py "app:create_app()"
+
+Every setting can be overridden through the GUNICORN_* environment variables below.
+"""
+import os
+import tempfile
+
+
+def _cpu_count():
+    # Respect the CPU affinity of the container or cgroup when the platform exposes it.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+# Workers only serve requests: skip Flask-Migrate and Swagger UI unless enabled. Serve mode refuses
+# to start without SQLALCHEMY_DATABASE_URI and JWT_SECRET_KEY (from the environment or .env).
+os.environ.setdefault("APP_MODE", "serve")
+# Workers share their request metrics through per-process files so /metrics covers all of them.
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "whatsnext-metrics"))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Import the app and create it once in the master, then fork the workers.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class not in ("gthread", "gevent"):
+    raise ValueError("GUNICORN_WORKER_CLASS must be 'gthread' or 'gevent'.")
+if worker_class == "gevent":
+    # gevent is optional (requirements-optional.txt). Patch before the preloaded app is imported,
+    # so the locks, threads and sockets it creates in the master are cooperative in the workers.
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise ValueError("GUNICORN_WORKER_CLASS=gevent needs the gevent package: pip install gevent") from None
+    monkey.patch_all()
+
+workers = int(os.getenv("GUNICORN_WORKERS", 2 * _cpu_count() + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# A /api/schedule/stream connection holds a gthread thread for its whole life;
+# keep half of them for ordinary requests. gevent streams only cost a greenlet.
+if worker_class == "gthread":
+    os.environ.setdefault("SCHEDULE_STREAM_MAX_CONNECTIONS", str(max(1, threads // 2)))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# Recycle workers periodically; the jitter keeps them from restarting together.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Drop the metrics files of a previous run before the workers start."""
+    from app.utils.metrics import clear_metrics_dir
+
+    clear_metrics_dir(os.environ["METRICS_DIR"])
+
+
+def worker_exit(server, worker):
+    """Write the exiting worker's last metrics, so child_exit can archive all of them."""
+    if not server.cfg.preload_app:
+        return
+    from app.utils.metrics import flush_metrics
+
+    flush_metrics(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    """Fold a finished worker's metrics file into the archive (runs in the master)."""
+    from app.utils.metrics import mark_process_dead
+
+    mark_process_dead(os.environ["METRICS_DIR"], worker.pid)
+
+
+def post_fork(server, worker):
+    """
+    Drop the connection pools inherited from the master so each worker opens its own.
+    """
+    if not server.cfg.preload_app:
+        return
+    from app.utils.db_routing import dispose_engines
+
+    dispose_engines(server.app.wsgi())
@@ -1,9 +1,35 @@
+import gzip
 import json
+import os
+import subprocess
+import sys
 import pytest
+from contextlib import contextmanager
 from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
 from app import create_app
-from app.extensions import db
-from app.utils.validators import is_valid_session_schedule
+from app.controllers.availability_controller import find_open_slots
+from app.controllers.schedule_controller import get_schedule_for_date
+from app.extensions import admission_control, db, response_compression, schedule_cache, schedule_events
+from app.models import ClassSession, ScheduleDay, User
+from app.utils.admission import MemoryStore, SQLiteStore
+from app.utils.cache import CacheBackend, LRUCache
+from app.utils.db_routing import dispose_engines, get_replica_engines
+from app.utils.events import PollingBroker
+from app.utils.compression import brotli as compression_brotli
+from app.utils.conflicts import find_conflicts, lock_schedule_day
+from app.utils.hashing import HashingOverloaded, _HashingPool
+from app.config import Config
+from app.utils.metrics import MetricsRegistry, mark_process_dead
+from app.utils.query_diagnostics import assert_max_queries
+from app.utils import search
+from app.utils.search import search_terms
+from app.utils.json_provider import FastJSONProvider, orjson
+from app.utils.serializers import compile_session_serializer, serialize_sessions
+from app.utils.startup import get_startup_timer
+from app.utils.validators import ScheduleRules, SessionInput, is_valid_session_schedule
 
 
 @pytest.fixture(scope="module")
@@ -12,10 +38,13 @@ def test_client():
     Creates a Flask test client using an in-memory SQLite database.
     The JWT secret and testing configuration are also set here.
     """
-    app = create_app()
-    app.config["TESTING"] = True
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
-    app.config["JWT_SECRET_KEY"] = "test_secret_key"
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test_secret_key",
+        "SCHEDULE_EVENTS_BACKEND": "app.utils.events.LocalBroker",
+        "RATE_LIMIT_ENABLED": False
+    })
 
     with app.app_context():
         db.create_all()
@@ -24,6 +53,38 @@ def test_client():
         db.drop_all()
 
 
+@contextmanager
+def captured_statements():
+    """
+    Context manager that collects every (statement, parameters) pair sent to the database.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain_query_plan(statement, parameters):
+    """
+    Return the SQLite query plan details for a captured statement.
+    """
+    with db.engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def class_session_selects(statements):
+    return [(sql, params) for sql, params in statements
+            if sql.lstrip().upper().startswith("SELECT") and "FROM class_sessions" in sql]
+
+
 def get_auth_token(client):
     """
     Helper function to register a user and obtain a JWT token.
@@ -86,6 +147,64 @@ def test_login_valid(test_client):
     assert "token" in data
 
 
+def test_login_rehashes_outdated_password_hash(test_client):
+    """
+    Test that a successful login rehashes a password stored with other hash parameters.
+    """
+    user_data = {"email": "rehash@example.com", "password": "rehashpassword"}
+    test_client.post("/auth/register", json=user_data)
+    user = User.query.filter_by(email=user_data["email"]).first()
+    assert user.password_hash.startswith("scrypt:")
+
+    user.password_hash = generate_password_hash(user_data["password"], "pbkdf2:sha256:1000")
+    db.session.commit()
+    response = test_client.post("/auth/login", json=user_data)
+    assert response.status_code == 200
+
+    db.session.refresh(user)
+    assert user.password_hash.startswith(test_client.application.config["PASSWORD_HASH_METHOD"] + "$")
+    assert test_client.post("/auth/login", json=user_data).status_code == 200
+
+    # Users built from a plaintext password are hashed with PASSWORD_HASH_METHOD too.
+    config = test_client.application.config
+    method, config["PASSWORD_HASH_METHOD"] = config["PASSWORD_HASH_METHOD"], "pbkdf2:sha256:1000"
+    try:
+        user = User(email="plaintext@example.com", password="plaintextpassword")
+    finally:
+        config["PASSWORD_HASH_METHOD"] = method
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+    assert user.check_password("plaintextpassword")
+
+
+def test_login_overloaded_returns_503(test_client):
+    """
+    Test that login answers 503 with Retry-After when every hashing slot stays busy.
+    """
+    app = test_client.application
+    user_data = {"email": "overloaded@example.com", "password": "overloadedpassword"}
+    assert test_client.post("/auth/register", json=user_data).status_code == 201
+    pool = app.extensions["password_hasher"]
+    app.extensions["password_hasher"] = _HashingPool(1, 0.01)
+    try:
+        app.extensions["password_hasher"]._slots.acquire()
+        response = test_client.post("/auth/login", json=user_data)
+    finally:
+        app.extensions["password_hasher"] = pool
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+
+def test_hashing_pool_bounds_concurrency():
+    """
+    Unit test that the hashing pool rejects work once its slots stay taken past the queue timeout.
+    """
+    pool = _HashingPool(1, 0.01)
+    assert pool.run(pow, 2, 10) == 1024
+    pool._slots.acquire()
+    with pytest.raises(HashingOverloaded):
+        pool.run(pow, 2, 10)
+
+
 # -----------------------------
 # Class Sessions Endpoint Tests
 # -----------------------------
@@ -151,8 +270,8 @@ def test_get_class_by_id(test_client):
     class_data = {
         "title": "Retrieve Class Session",
         "date": "25-03-2025",
-        "start_time": "10:00",
-        "end_time": "11:00",
+        "start_time": "11:00",
+        "end_time": "12:00",
         "professor_id": 1,
         "session_type": "class"
     }
@@ -173,7 +292,7 @@ def test_update_class_session(test_client):
     headers = {"Authorization": f"Bearer {token}"}
     class_data = {
         "title": "Original Class Session",
-        "date": "25-03-2025",
+        "date": "24-03-2025",
         "start_time": "10:00",
         "end_time": "11:00",
         "professor_id": 1,
@@ -196,6 +315,32 @@ def test_update_class_session(test_client):
     assert "message" in data
 
 
+def test_partial_update_keeps_stored_values(test_client):
+    """
+    Test that an update sending only some fields validates against the stored values for the rest.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    class_data = {
+        "title": "Partially Updated Session",
+        "date": "23-04-2025",
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    session_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+
+    response = test_client.put(f"/api/classes/{session_id}", json={"title": "Only The Title"}, headers=headers)
+    assert response.status_code == 200
+    data = test_client.get(f"/api/classes/{session_id}").get_json()
+    assert data["title"] == "Only The Title"
+    assert data["date"] == "23-04-2025"
+
+    response = test_client.put(f"/api/classes/{session_id}", json={"end_time": "09:00"}, headers=headers)
+    assert response.status_code == 400
+
+
 def test_delete_class_session(test_client):
     """
     Test deletion of an existing class session.
@@ -204,7 +349,7 @@ def test_delete_class_session(test_client):
     headers = {"Authorization": f"Bearer {token}"}
     class_data = {
         "title": "Session to Delete",
-        "date": "25-03-2025",
+        "date": "27-03-2025",
         "start_time": "10:00",
         "end_time": "11:00",
         "professor_id": 1,
@@ -218,6 +363,344 @@ def test_delete_class_session(test_client):
     data = response.get_json()
     assert "message" in data
 
+
+
+def test_create_overlapping_session_conflict(test_client):
+    """
+    Test that creating a session overlapping an existing one returns 409 with the conflicting IDs.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    class_data = {
+        "title": "Booked Session",
+        "date": "01-04-2025",
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    booked_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+
+    overlapping = dict(class_data, title="Overlapping Session", start_time="10:30", end_time="11:30", professor_id=2)
+    response = test_client.post("/api/classes", json=overlapping, headers=headers)
+    assert response.status_code == 409
+    data = response.get_json()
+    assert "error" in data
+    assert data["details"]["conflicting_session_ids"] == [booked_id]
+
+    adjacent = dict(class_data, title="Adjacent Session", start_time="11:00", end_time="12:00")
+    response = test_client.post("/api/classes", json=adjacent, headers=headers)
+    assert response.status_code == 201
+
+
+def test_update_overlapping_session_conflict(test_client):
+    """
+    Test that moving a session onto a booked slot returns 409, while re-saving its own slot succeeds.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    class_data = {
+        "title": "Morning Session",
+        "date": "02-04-2025",
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    booked_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+    later = dict(class_data, title="Late Session", start_time="11:00", end_time="12:00")
+    later_id = test_client.post("/api/classes", json=later, headers=headers).get_json()["data"]["id"]
+
+    response = test_client.put(f"/api/classes/{later_id}", json=dict(later, start_time="10:30"), headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()["details"]["conflicting_session_ids"] == [booked_id]
+
+    response = test_client.put(f"/api/classes/{later_id}", json=dict(later, title="Renamed Late Session"), headers=headers)
+    assert response.status_code == 200
+
+
+def test_find_conflicts_per_professor(test_client):
+    """
+    Test that overlap checks can be restricted to one professor, and that writes bump the day version.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    session = {"title": "Professor Scope", "start_time": "10:00", "end_time": "11:00",
+               "professor_id": 1, "session_type": "class"}
+    assert test_client.post("/api/classes", json=dict(session, date="02-04-2029"), headers=headers).status_code == 201
+    assert test_client.post("/api/classes", json=dict(session, date="02-04-2029", start_time="11:00",
+                                                      end_time="12:00"), headers=headers).status_code == 201
+    day = datetime(2029, 4, 2).date()
+    start, end = datetime.strptime("10:15", "%H:%M").time(), datetime.strptime("10:45", "%H:%M").time()
+    assert find_conflicts(day, start, end)
+    assert find_conflicts(day, start, end, professor_id=1)
+    assert find_conflicts(day, start, end, professor_id=99) == []
+    assert db.session.get(ScheduleDay, day).version >= 2
+
+
+def test_bulk_create_atomic(test_client):
+    """
+    Test that an atomic bulk import creates every row, and creates nothing when one row is invalid.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = [{
+        "title": f"Bulk Session {day}",
+        "date": f"{day}-05-2025",
+        "start_time": "10:00",
+        "end_time": "12:00",
+        "professor_id": 1,
+        "session_type": "class"
+    } for day in ("05", "06", "07")]
+
+    invalid = rows + [dict(rows[0], date="10-05-2025")]  # a Saturday
+    response = test_client.post("/api/classes/bulk", json=invalid, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["details"]["errors"] == [
+        {"row": 3, "error": "Regular classes can only be scheduled from Monday to Thursday."}
+    ]
+    assert test_client.get("/api/schedule?date=05-05-2025").get_json() == []
+
+    response = test_client.post("/api/classes/bulk", json=rows, headers=headers)
+    assert response.status_code == 201
+    assert response.get_json()["data"]["created"] == 3
+    assert len(test_client.get("/api/schedule?date=05-05-2025").get_json()) == 1
+
+
+def test_bulk_create_best_effort_ndjson(test_client):
+    """
+    Test that a best-effort NDJSON import skips bad lines and overlapping rows, reporting each one.
+    """
+    token = get_auth_token(test_client)
+    existing = {"title": "NDJSON Existing", "date": "15-05-2029", "start_time": "10:00", "end_time": "12:00",
+                "professor_id": 1, "session_type": "class"}
+    response = test_client.post("/api/classes", json=existing, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201
+    existing_id = response.get_json()["data"]["id"]
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    rows = [
+        {"title": "NDJSON A", "date": "14-05-2029", "start_time": "10:00", "end_time": "11:00",
+         "professor_id": 1, "session_type": "class"},
+        {"title": "NDJSON B", "date": "14-05-2029", "start_time": "10:30", "end_time": "11:30",
+         "professor_id": 2, "session_type": "class"},
+        {"title": "NDJSON C", "date": "14-05-2029", "start_time": "11:00", "end_time": "12:00",
+         "professor_id": 1, "session_type": "class"},
+        {"title": "NDJSON D", "date": "15-05-2029", "start_time": "10:00", "end_time": "11:00",
+         "professor_id": 1, "session_type": "class"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\n{not json}\n"
+    response = test_client.post("/api/classes/bulk?mode=best_effort", data=body, headers=headers)
+    assert response.status_code == 201
+    data = response.get_json()["data"]
+    assert data["created"] == 2
+    errors = {error["row"]: error for error in data["errors"]}
+    assert set(errors) == {1, 3, 4}
+    assert errors[1]["conflicting_rows"] == [0]
+    assert errors[3]["conflicting_session_ids"] == [existing_id]
+    assert errors[4]["error"] == "Invalid JSON."
+
+    titles = {s["title"] for s in test_client.get("/api/schedule?date=14-05-2029").get_json()}
+    assert titles == {"NDJSON A", "NDJSON C"}
+
+
+def test_bulk_create_stored_session_starting_inside_row(test_client):
+    """
+    A stored session that starts inside a bulk row, after the row starts, still conflicts with it.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    base = {"date": "21-05-2029", "professor_id": 1, "session_type": "class"}
+    response = test_client.post("/api/classes", headers=headers,
+                                json=dict(base, title="Late Start", start_time="10:30", end_time="11:30"))
+    existing_id = response.get_json()["data"]["id"]
+    rows = [dict(base, title="Early Row", start_time="10:00", end_time="11:00"),
+            dict(base, title="After Row", start_time="11:30", end_time="12:00")]
+    response = test_client.post("/api/classes/bulk", json=rows, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()["details"]["errors"] == [{
+        "row": 0, "error": "The session overlaps existing class sessions.",
+        "conflicting_session_ids": [existing_id], "conflicting_series_ids": [], "conflicting_rows": []}]
+
+    # A rejected row does not block a later row that only overlaps it.
+    rows.insert(1, dict(base, title="Overlaps Rejected", start_time="10:15", end_time="10:30"))
+    response = test_client.post("/api/classes/bulk?mode=best_effort", json=rows, headers=headers)
+    assert response.status_code == 201
+    assert [error["row"] for error in response.get_json()["data"]["errors"]] == [0]
+    titles = {s["title"] for s in test_client.get("/api/schedule?date=21-05-2029").get_json()}
+    assert titles == {"Late Start", "Overlaps Rejected", "After Row"}
+
+
+def test_bulk_create_invalid_body(test_client):
+    """
+    Test that the bulk endpoint rejects bodies that are not a list of sessions, and unknown modes.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.post("/api/classes/bulk", json={"title": "x"}, headers=headers).status_code == 400
+    assert test_client.post("/api/classes/bulk", json=[], headers=headers).status_code == 400
+    assert test_client.post("/api/classes/bulk?mode=maybe", json=[], headers=headers).status_code == 400
+
+
+def test_get_class_conditional_get(test_client):
+    """
+    Test that GET /api/classes/<id> honors If-None-Match until the session is updated.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    class_data = {
+        "title": "ETag Session",
+        "date": "21-04-2025",
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    session_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+
+    first = test_client.get(f"/api/classes/{session_id}")
+    etag = first.headers["ETag"]
+    assert etag
+    revalidated = test_client.get(f"/api/classes/{session_id}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
+    test_client.put(f"/api/classes/{session_id}", json=dict(class_data, title="Renamed ETag Session"), headers=headers)
+    changed = test_client.get(f"/api/classes/{session_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.get_json()["title"] == "Renamed ETag Session"
+
+    # SQLite hands the id of a deleted last row to the next insert; the ETag must still differ.
+    class_data["date"] = "24-04-2025"
+    session_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+    etag = test_client.get(f"/api/classes/{session_id}").headers["ETag"]
+    assert test_client.delete(f"/api/classes/{session_id}", headers=headers).status_code == 200
+    response = test_client.post("/api/classes", json=dict(class_data, title="Recreated ETag Session"), headers=headers)
+    assert response.get_json()["data"]["id"] == session_id
+    recreated = test_client.get(f"/api/classes/{session_id}", headers={"If-None-Match": etag})
+    assert recreated.status_code == 200
+    assert recreated.get_json()["title"] == "Recreated ETag Session"
+
+
+def test_get_classes_and_schedule_conditional_get(test_client):
+    """
+    Test that list and schedule reads return 304 for a matching ETag and 200 after a write.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    list_etag = test_client.get("/api/classes").headers["ETag"]
+    schedule_etag = test_client.get("/api/schedule?date=22-04-2025").headers["ETag"]
+    assert test_client.get("/api/classes", headers={"If-None-Match": list_etag}).status_code == 304
+    assert test_client.get("/api/classes?limit=1", headers={"If-None-Match": list_etag}).status_code == 200
+    assert test_client.get(
+        "/api/schedule?date=22-04-2025", headers={"If-None-Match": schedule_etag}
+    ).status_code == 304
+
+    class_data = {
+        "title": "Invalidating Session",
+        "date": "22-04-2025",
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    test_client.post("/api/classes", json=class_data, headers=headers)
+    assert test_client.get("/api/classes", headers={"If-None-Match": list_etag}).status_code == 200
+    assert test_client.get(
+        "/api/schedule?date=22-04-2025", headers={"If-None-Match": schedule_etag}
+    ).status_code == 200
+
+
+def test_get_classes_keyset_pagination(test_client):
+    """
+    Test that walking GET /api/classes with a cursor returns every session exactly once, in order.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for day in ("07-04-2025", "08-04-2025", "09-04-2025"):
+        class_data = {
+            "title": f"Paginated Session {day}",
+            "date": day,
+            "start_time": "10:00",
+            "end_time": "11:00",
+            "professor_id": 1,
+            "session_type": "class"
+        }
+        test_client.post("/api/classes", json=class_data, headers=headers)
+
+    all_sessions = test_client.get("/api/classes?limit=500").get_json()
+    seen = []
+    cursor = None
+    while True:
+        url = "/api/classes?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        response = test_client.get(url)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= 2
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [s["id"] for s in seen] == [s["id"] for s in all_sessions]
+    assert len({s["id"] for s in seen}) == len(seen)
+
+
+def test_get_classes_field_projection(test_client):
+    """
+    Test that the 'fields' parameter limits the keys returned for each session.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    # The earliest date in the suite, so the session is on the first page.
+    created = test_client.post("/api/classes", headers=headers, json={
+        "title": "Projected", "date": "06-01-2020", "start_time": "10:00", "end_time": "11:00",
+        "professor_id": 1, "session_type": "class"})
+    assert created.status_code == 201
+    response = test_client.get("/api/classes?fields=id,title")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert {"id": created.get_json()["data"]["id"], "title": "Projected"} in data
+    assert all(set(s) == {"id", "title"} for s in data)
+
+
+def test_get_classes_invalid_pagination_params(test_client):
+    """
+    Test that invalid limit, cursor or fields values are rejected.
+    """
+    for query in ("limit=0", "limit=abc", "cursor=not-a-cursor", "fields=id,password"):
+        response = test_client.get(f"/api/classes?{query}")
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+
+def test_export_classes_ndjson(test_client):
+    """
+    Test that the NDJSON export streams one JSON object per session, matching GET /api/classes.
+    """
+    response = test_client.get("/api/classes/export?format=ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert exported == test_client.get("/api/classes?limit=500").get_json()
+
+
+def test_export_classes_csv(test_client):
+    """
+    Test that the CSV export starts with a header row and contains one line per session.
+    """
+    response = test_client.get("/api/classes/export?format=csv")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == "id,title,description,date,start_time,end_time,professor_id,session_type"
+    assert len(lines) - 1 == len(test_client.get("/api/classes?limit=500").get_json())
+
+
+def test_export_classes_invalid_format(test_client):
+    """
+    Test that unsupported export formats are rejected.
+    """
+    response = test_client.get("/api/classes/export?format=xml")
+    assert response.status_code == 400
     
 # -----------------------------
 # Schedule Endpoint Tests
@@ -249,7 +732,7 @@ def test_get_schedule_valid(test_client):
     """
     token = get_auth_token(test_client)
     headers = {"Authorization": f"Bearer {token}"}
-    session_date = "25-03-2025"
+    session_date = "31-03-2025"
     class_data = {
         "title": "Schedule Test Session",
         "date": session_date,
@@ -266,6 +749,208 @@ def test_get_schedule_valid(test_client):
     assert len(data) >= 1
 
 
+def test_get_schedule_cache_hits_and_invalidation(test_client):
+    """
+    Test that repeated schedule reads are served from the cache until a write touches the date,
+    and that moving a session invalidates both its old and new dates.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    old_date, new_date = "14-04-2025", "15-04-2025"
+    first = test_client.get(f"/api/schedule?date={old_date}")
+    assert first.headers["X-Cache"] == "MISS"
+    test_client.get(f"/api/schedule?date={new_date}")
+    hits_before = schedule_cache.stats()["hits"]
+    second = test_client.get(f"/api/schedule?date={old_date}")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json() == first.get_json()
+    assert schedule_cache.stats()["hits"] == hits_before + 1
+
+    class_data = {
+        "title": "Cached Session",
+        "date": old_date,
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "professor_id": 1,
+        "session_type": "class"
+    }
+    session_id = test_client.post("/api/classes", json=class_data, headers=headers).get_json()["data"]["id"]
+    response = test_client.get(f"/api/schedule?date={old_date}")
+    assert response.headers["X-Cache"] == "MISS"
+    assert [s["id"] for s in response.get_json()] == [session_id]
+    assert test_client.get(f"/api/schedule?date={new_date}").headers["X-Cache"] == "HIT"
+
+    test_client.put(f"/api/classes/{session_id}", json={"date": new_date}, headers=headers)
+    old_response = test_client.get(f"/api/schedule?date={old_date}")
+    new_response = test_client.get(f"/api/schedule?date={new_date}")
+    assert old_response.headers["X-Cache"] == new_response.headers["X-Cache"] == "MISS"
+    assert old_response.get_json() == []
+    assert [s["id"] for s in new_response.get_json()] == [session_id]
+
+
+def test_get_schedule_cache_follows_version_changes(test_client):
+    """
+    Test that a cached schedule is not served once another worker has written to that date.
+    """
+    test_client.get("/api/schedule?date=16-04-2025")
+    assert test_client.get("/api/schedule?date=16-04-2025").headers["X-Cache"] == "HIT"
+
+    # Simulate a write committed by another worker: the version moves, the local cache is untouched.
+    lock_schedule_day(datetime(2025, 4, 16).date())
+    db.session.commit()
+    assert test_client.get("/api/schedule?date=16-04-2025").headers["X-Cache"] == "MISS"
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """
+    Unit test for the in-process LRU cache backend.
+    """
+    cache = LRUCache(max_entries=2)
+    with pytest.raises(TypeError):
+        type("Incomplete", (CacheBackend,), {"get": lambda self, key: None})({})
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_schedule_range_grouped_by_day(test_client):
+    """
+    Test that a week view returns every day of the range, with sessions sorted by start time.
+    """
+    token = get_auth_token(test_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for day, start, end in (("29-04-2025", "11:00", "12:00"), ("29-04-2025", "10:00", "11:00"),
+                            ("01-05-2025", "10:00", "12:00")):
+        class_data = {
+            "title": f"Week Session {day} {start}",
+            "date": day,
+            "start_time": start,
+            "end_time": end,
+            "professor_id": 1,
+            "session_type": "class"
+        }
+        test_client.post("/api/classes", json=class_data, headers=headers)
+
+    single = test_client.get("/api/schedule?date=29-04-2025").get_json()
+    assert [s["start_time"] for s in single] == ["10:00", "11:00"]
+
+    flat = test_client.get("/api/schedule?from=28-04-2025&to=04-05-2025").get_json()
+    assert [(s["date"], s["start_time"]) for s in flat] == [
+        ("29-04-2025", "10:00"), ("29-04-2025", "11:00"), ("01-05-2025", "10:00")
+    ]
+
+    grouped = test_client.get("/api/schedule?from=28-04-2025&to=04-05-2025&group_by=day").get_json()
+    assert [day["date"] for day in grouped] == [
+        "28-04-2025", "29-04-2025", "30-04-2025", "01-05-2025", "02-05-2025", "03-05-2025", "04-05-2025"
+    ]
+    assert [len(day["sessions"]) for day in grouped] == [0, 2, 0, 1, 0, 0, 0]
+
+
+def test_get_schedule_range_invalid(test_client):
+    """
+    Test that invalid, reversed or oversized date ranges are rejected.
+    """
+    for query in ("from=01-05-2025", "from=01-05-2025&to=bad", "from=10-05-2025&to=01-05-2025",
+                  "from=01-01-2025&to=01-03-2025", "from=01-05-2025&to=02-05-2025&group_by=week"):
+        response = test_client.get(f"/api/schedule?{query}")
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_get_schedule_range_uses_date_index(test_client):
+    """
+    Test that the range view is answered by one query on the (date, start_time) index.
+    """
+    with captured_statements() as statements:
+        response = test_client.get("/api/schedule?from=28-04-2025&to=04-05-2025")
+    assert response.status_code == 200
+
+    selects = class_session_selects(statements)
+    assert len(selects) == 1
+    plan = " ".join(explain_query_plan(*selects[0]))
+    assert "USING INDEX ix_class_sessions_date_start_time" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_get_schedule_uses_date_index(test_client):
+    """
+    Test that GET /api/schedule looks sessions up through the (date, start_time) index.
+    """
+    schedule_cache.clear()
+    with captured_statements() as statements:
+        response = test_client.get("/api/schedule?date=25-03-2025")
+    assert response.status_code == 200
+
+    selects = class_session_selects(statements)
+    assert selects, "Expected the schedule route to query class_sessions"
+    for sql, params in selects:
+        plan = " ".join(explain_query_plan(sql, params))
+        assert "USING INDEX ix_class_sessions_date_start_time" in plan, plan
+
+
+def test_get_schedule_for_date_uses_date_index(test_client):
+    """
+    Test that schedule_controller.get_schedule_for_date looks sessions up through the (date, start_time) index.
+    """
+    with captured_statements() as statements:
+        sessions, message = get_schedule_for_date("25-03-2025")
+    assert sessions is not None, message
+
+    selects = class_session_selects(statements)
+    assert selects
+    for sql, params in selects:
+        plan = " ".join(explain_query_plan(sql, params))
+        assert "USING INDEX ix_class_sessions_date_start_time" in plan, plan
+
+
+def test_schedule_query_count_is_pinned(test_client):
+    """
+    get_schedule_for_date is one SELECT; the route adds the version lookup and the series
+    expansion, and a cache hit skips both of those.
+    """
+    with assert_max_queries(1):
+        get_schedule_for_date("26-03-2025")
+    schedule_cache.clear()
+    with assert_max_queries(3):
+        assert test_client.get("/api/schedule?date=26-03-2025").status_code == 200
+    with assert_max_queries(1):
+        assert test_client.get("/api/schedule?date=26-03-2025").headers["X-Cache"] == "HIT"
+    with pytest.raises(AssertionError, match="Expected at most 0 queries"):
+        with assert_max_queries(0):
+            get_schedule_for_date("26-03-2025")
+
+
+def test_query_diagnostics_logs_slow_and_repeated_statements(caplog):
+    """
+    Diagnostics mode logs slow statements with their route and statements repeated past the N+1 threshold.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                      "QUERY_DIAGNOSTICS_ENABLED": True, "SLOW_QUERY_THRESHOLD_MS": 0,
+                      "N_PLUS_ONE_THRESHOLD": 1})
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    with caplog.at_level("WARNING"):
+        client.get("/api/schedule?date=24-03-2025")
+        client.get("/api/schedule?date=24-03-2025")
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(m.startswith("Slow query") and "GET /api/schedule" in m for m in messages)
+    assert not any(m.startswith("Possible N+1") for m in messages)
+
+    caplog.clear()
+    with caplog.at_level("WARNING"), app.test_request_context("/api/classes"):
+        app.preprocess_request()
+        for _ in range(3):
+            db.session.execute(db.text("SELECT 1"))
+        app.do_teardown_request()
+    assert any("Possible N+1" in record.getMessage() and "ran 3 times" in record.getMessage()
+               for record in caplog.records)
+
+
 # -----------------------------
 # Main Route Test
 # -----------------------------
@@ -315,3 +1000,737 @@ def test_invalid_schedule_qa_wrong_day():
     """
     valid, message = is_valid_session_schedule("qa", "25-03-2025", "10:00", "11:00")
     assert not valid, "Expected invalid QA session schedule due to wrong day"
+
+
+# -----------------------------
+# Unit Tests for Serialization
+# -----------------------------
+
+def test_serialize_sessions_matches_strftime():
+    """
+    Unit test for the shared ClassSession serializer, including field projection.
+    """
+    row = (7, "Title", None, datetime(2025, 3, 5).date(), datetime(2025, 3, 5, 9, 5).time(),
+           datetime(2025, 3, 5, 10, 30).time(), 3, "class")
+    assert serialize_sessions([row]) == [{
+        "id": 7,
+        "title": "Title",
+        "description": None,
+        "date": "05-03-2025",
+        "start_time": "09:05",
+        "end_time": "10:30",
+        "professor_id": 3,
+        "session_type": "class"
+    }]
+    assert compile_session_serializer(("id", "date"))((7, row[3])) == {"id": 7, "date": "05-03-2025"}
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_fast_json_provider_matches_default(test_client):
+    """
+    Unit test that the orjson provider produces the same JSON values as Flask's default provider.
+    """
+    app = test_client.application
+    provider = FastJSONProvider(app)
+    value = {"b": [1, 2.5, None, True], "a": "ñandú", "when": datetime(2025, 3, 5).date()}
+    assert json.loads(provider.dumps(value)) == json.loads(DefaultJSONProvider(app).dumps(value))
+    assert provider.loads(provider.dumps({"x": 1})) == {"x": 1}
+
+
+def test_invalid_schedule_end_before_start():
+    """
+    Unit test that a session must end after it starts, whatever its type.
+    """
+    valid, message = is_valid_session_schedule("qa", "04-04-2025", "11:00", "10:00")
+    assert not valid
+
+
+def test_schedule_rules_from_table_and_batch():
+    """
+    Unit test for a custom rule table, checked one session at a time and as a batch.
+    """
+    rules = ScheduleRules({"lab": {"weekdays": [2], "start": "14:00", "end": "18:00"}})
+    base = {"title": "Lab", "professor_id": 1, "session_type": "lab",
+            "date": "02-04-2025", "start_time": "14:00", "end_time": "16:00"}
+    sessions = [SessionInput.from_dict(dict(base, **changes))[0] for changes in (
+        {},                                            # Wednesday afternoon: valid
+        {"date": "03-04-2025"},                        # Thursday: wrong day
+        {"start_time": "13:00"},                       # starts before the window
+        {"session_type": "class", "date": "05-04-2025"}  # no rule for 'class' in this table
+    )]
+    assert rules.check(sessions[0]) == (True, "")
+    results = rules.check_batch(sessions)
+    assert results[0] == ""
+    assert results[1] and results[2]
+    assert results[3] == ""
+    assert rules.window("LAB")[1:] == (datetime(1, 1, 1, 14).time(), datetime(1, 1, 1, 18).time())
+
+
+def test_session_input_parses_once():
+    """
+    Unit test for the typed session input: parsing, defaults from an existing session and type errors.
+    """
+    data = {"title": "T", "date": "25-03-2025", "start_time": "10:00", "end_time": "11:00",
+            "professor_id": 1, "session_type": "class"}
+    session_input, message = SessionInput.from_dict(data)
+    assert message == ""
+    assert session_input.date == datetime(2025, 3, 25).date()
+    assert session_input.description == ""
+
+    moved, _ = SessionInput.from_dict({"start_time": "11:00", "end_time": "12:00"}, defaults=session_input)
+    assert moved.date == session_input.date and moved.start_time.hour == 11
+
+    assert SessionInput.from_dict(dict(data, professor_id="1"))[0] is None
+    assert SessionInput.from_dict(dict(data, date=20250325))[0] is None
+    assert SessionInput.from_dict({"title": "T"})[1] == "Missing required field: date"
+
+
+def test_read_only_routes_use_replica(tmp_path):
+    """
+    GET routes read from the replica; writes, and reads right after a write, use the primary.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+        "SQLALCHEMY_REPLICA_URIS": [f"sqlite:///{tmp_path / 'replica.db'}"],
+        "SQLALCHEMY_REPLICA_STICKY_SECONDS": 0,
+        "JWT_SECRET_KEY": "test_secret_key"
+    })
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        replica = get_replica_engines()[0]
+        db.metadata.create_all(replica)
+        with replica.begin() as conn:
+            conn.execute(ClassSession.__table__.insert(), {
+                "title": "Replica Only", "date": datetime(2025, 3, 24).date(),
+                "start_time": datetime(1, 1, 1, 10).time(), "end_time": datetime(1, 1, 1, 11).time(),
+                "professor_id": 1, "session_type": "class"})
+
+    assert [c["title"] for c in client.get("/api/classes").get_json()] == ["Replica Only"]
+
+    headers = {"Authorization": f"Bearer {get_auth_token(client)}"}
+    class_data = {"title": "Primary Only", "date": "25-03-2025", "start_time": "10:00",
+                  "end_time": "11:00", "professor_id": 1, "session_type": "class"}
+    assert client.post("/api/classes", json=class_data, headers=headers).status_code == 201
+    assert [c["title"] for c in client.get("/api/classes").get_json()] == ["Replica Only"]
+
+    app.config["SQLALCHEMY_REPLICA_STICKY_SECONDS"] = 60
+    assert client.post("/api/classes", json=dict(class_data, date="26-03-2025"), headers=headers).status_code == 201
+    assert [c["title"] for c in client.get("/api/classes").get_json()] == ["Primary Only", "Primary Only"]
+    # Only the client that wrote is kept on the primary.
+    assert [c["title"] for c in app.test_client().get("/api/classes").get_json()] == ["Replica Only"]
+
+    with app.app_context():
+        db.session.remove()
+        for engine in [*db.engines.values(), *get_replica_engines()]:
+            engine.dispose()
+
+
+def test_dispose_engines_replaces_pools(tmp_path):
+    """
+    After a fork each worker gets fresh connection pools instead of the master's.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}"})
+    with app.app_context():
+        db.create_all()
+        pool = db.engine.pool
+    dispose_engines(app)
+    with app.app_context():
+        assert db.engine.pool is not pool
+    assert app.test_client().get("/api/classes").status_code == 200
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_serve_mode_skips_migrate_and_swagger():
+    """
+    In serve mode Flask-Migrate and the Swagger UI blueprint are not registered.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                      "MIGRATE_ENABLED": False, "SWAGGER_ENABLED": False})
+    assert "migrate" not in app.extensions
+    assert "swagger_ui" not in app.blueprints
+    phases = get_startup_timer(app).phases
+    assert {"imports", "extensions", "blueprints"} <= set(phases)
+    assert "migrate" not in phases and "swagger" not in phases
+
+
+def test_startup_time_budget():
+    """
+    Importing the app package and creating the app in serve mode stays within STARTUP_TIME_BUDGET.
+    """
+    script = (
+        "import sys, time\n"
+        "started = time.perf_counter()\n"
+        "from app import create_app\n"
+        "create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})\n"
+        "print(time.perf_counter() - started)\n"
+        "print('flask_migrate' in sys.modules, 'flask_swagger_ui' in sys.modules)\n"
+    )
+    env = dict(os.environ, APP_MODE="serve", SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+               JWT_SECRET_KEY="startup-test-secret-key-startup-test")
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), check=True)
+    elapsed, loaded = result.stdout.splitlines()
+    assert loaded == "False False"
+    assert float(elapsed) < Config.STARTUP_TIME_BUDGET
+
+
+def test_serve_mode_requires_secrets(tmp_path):
+    """
+    Serve mode reads .env, and refuses to start on the default database or JWT secret.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = "from app.config import Config\nprint(Config.JWT_SECRET_KEY)\n"
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("SQLALCHEMY_DATABASE_URI", "JWT_SECRET_KEY")}
+    env.update(APP_MODE="serve", PYTHONPATH=root)
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode != 0
+    assert "SQLALCHEMY_DATABASE_URI must be defined" in result.stderr
+
+    (tmp_path / ".env").write_text("SQLALCHEMY_DATABASE_URI=sqlite:///serve.db\nJWT_SECRET_KEY=from-dotenv\n")
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, cwd=tmp_path)
+    assert result.stdout.strip() == "from-dotenv"
+
+
+def test_request_metrics_and_server_timing(tmp_path):
+    """
+    Requests are measured per route; /metrics adds up the files of every worker.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                      "METRICS_ENABLED": True, "METRICS_DIR": str(tmp_path), "SERVER_TIMING_ENABLED": True})
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+
+    response = client.get("/api/schedule?date=25-03-2025")
+    assert response.status_code == 200
+    timings = response.headers["Server-Timing"]
+    assert 'desc="3 queries"' in timings and "serialize;dur=" in timings and "total;dur=" in timings
+
+    # Another worker's totals, as written by its own process.
+    other = MetricsRegistry()
+    other.inc("http_requests_total", (("route", "/api/schedule"), ("method", "GET"), ("status", "200")))
+    other.inc("sql_statements_total", (("route", "/api/schedule"),), 5)
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{route="/api/schedule",method="GET",status="200"} 2' in text
+    assert 'sql_statements_total{route="/api/schedule"} 8' in text
+    assert 'http_request_duration_seconds_count{route="/api/schedule",method="GET"} 1' in text
+    assert 'http_response_size_bytes_bucket{route="/api/schedule",method="GET",le="+Inf"} 1' in text
+
+    # When that worker exits its file is folded into the archive; the totals stay the same.
+    mark_process_dead(str(tmp_path), 1)
+    mark_process_dead(str(tmp_path), 1)
+    assert {path.name for path in tmp_path.glob("metrics-*.json")} == {
+        "metrics-archive.json", f"metrics-{os.getpid()}.json"}
+    assert client.get("/metrics").get_data(as_text=True).count(
+        'http_requests_total{route="/api/schedule",method="GET",status="200"} 2') == 1
+
+    # A metrics file that cannot be written does not fail the request that flushes it.
+    app.extensions["request_metrics"].directory = str(tmp_path / "missing")
+    assert client.get("/metrics").status_code == 200
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_professor_sessions_and_stats(test_client):
+    """
+    Professor timetable (date bounded, paginated) and weekly stats from one GROUP BY, both on the (professor_id, date) index.
+    """
+    def session(day, start, end, session_type="class", professor_id=77):
+        return {"title": "Prof", "date": datetime.strptime(day, "%d-%m-%Y").date(),
+                "start_time": datetime.strptime(start, "%H:%M").time(),
+                "end_time": datetime.strptime(end, "%H:%M").time(),
+                "professor_id": professor_id, "session_type": session_type}
+
+    db.session.execute(ClassSession.__table__.insert(), [
+        session("07-04-2031", "10:00", "12:00"),          # Monday, week of 07-04
+        session("09-04-2031", "10:00", "11:30"),
+        session("11-04-2031", "10:00", "11:00", "qa"),    # Friday, same week
+        session("14-04-2031", "10:00", "12:00"),          # next week
+        session("08-04-2031", "10:00", "12:00", professor_id=78),
+    ])
+    db.session.commit()
+
+    response = test_client.get("/api/professors/77/sessions?from=01-04-2031&to=30-04-2031&limit=2")
+    assert response.status_code == 200
+    assert [s["date"] for s in response.get_json()] == ["07-04-2031", "09-04-2031"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = test_client.get(f"/api/professors/77/sessions?from=01-04-2031&to=30-04-2031&limit=2&cursor={cursor}")
+    assert [s["date"] for s in response.get_json()] == ["11-04-2031", "14-04-2031"]
+    assert "X-Next-Cursor" not in response.headers
+    assert test_client.get("/api/professors/77/sessions?from=01-04-2031").status_code == 400
+
+    with captured_statements() as statements:
+        response = test_client.get("/api/professors/77/stats?from=01-04-2031&to=30-04-2031")
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert (stats["sessions"], stats["minutes"]) == (4, 390)
+    assert [w["week_start"] for w in stats["weeks"]] == ["07-04-2031", "14-04-2031"]
+    assert stats["weeks"][0]["session_types"] == {"class": {"sessions": 2, "minutes": 210},
+                                                  "qa": {"sessions": 1, "minutes": 60}}
+
+    selects = class_session_selects(statements)
+    assert len(selects) == 1 and "GROUP BY" in selects[0][0]
+    plan = " ".join(explain_query_plan(*selects[0]))
+    assert "ix_class_sessions_professor_id_date" in plan, plan
+
+    # The professor's series occurrences are part of the timetable and the load.
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    term = {"title": "Prof Term", "start_date": "01-04-2031", "end_date": "30-04-2031", "weekdays": [3],
+            "start_time": "10:00", "end_time": "11:00", "professor_id": 77, "session_type": "class"}
+    series_id = test_client.post("/api/series", json=term, headers=headers).get_json()["data"]["id"]
+    assert test_client.put(f"/api/series/{series_id}/occurrences/24-04-2031", json={"cancelled": True},
+                           headers=headers).status_code == 200
+    timetable = test_client.get("/api/professors/77/sessions?from=01-04-2031&to=30-04-2031").get_json()
+    assert [(s["date"], s.get("series_id")) for s in timetable] == [
+        ("03-04-2031", series_id), ("07-04-2031", None), ("09-04-2031", None), ("10-04-2031", series_id),
+        ("11-04-2031", None), ("14-04-2031", None), ("17-04-2031", series_id)]
+    paged, cursor = [], None
+    while True:
+        response = test_client.get("/api/professors/77/sessions?from=01-04-2031&to=30-04-2031&limit=2"
+                                   + (f"&cursor={cursor}" if cursor else ""))
+        paged.extend(response.get_json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paged == timetable
+    stats = test_client.get("/api/professors/77/stats?from=01-04-2031&to=30-04-2031").get_json()
+    assert (stats["sessions"], stats["minutes"]) == (7, 570)
+    assert [w["week_start"] for w in stats["weeks"]] == ["31-03-2031", "07-04-2031", "14-04-2031"]
+    assert stats["weeks"][1]["session_types"]["class"] == {"sessions": 3, "minutes": 270}
+
+
+def test_search_classes(test_client):
+    """
+    Full-text search: ranked, prefix matching, filters, and an index kept in sync by create, update, delete and bulk.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    base = {"start_time": "10:00", "end_time": "11:00", "professor_id": 1, "session_type": "class"}
+    ids = {}
+    for key, title, description, day in (
+        ("title", "Photosynthesis basics", "Plants and light", "03-05-2032"),
+        ("description", "Biology lab", "Hands-on photosynthesis experiments", "04-05-2032"),
+        ("other", "Algebra", "Linear equations", "05-05-2032"),
+    ):
+        response = test_client.post("/api/classes", headers=headers,
+                                    json=dict(base, title=title, description=description, date=day))
+        ids[key] = response.get_json()["data"]["id"]
+    bulk = [dict(base, title="Photon physics", description="Light as particles", date="06-05-2032"),
+            dict(base, title="Qa on photosynthesis", session_type="qa", date="07-05-2032")]
+    assert test_client.post("/api/classes/bulk", json=bulk, headers=headers).status_code == 201
+
+    def titles(query):
+        response = test_client.get(f"/api/classes/search?{query}")
+        assert response.status_code == 200, response.get_json()
+        return [session["title"] for session in response.get_json()]
+
+    # Title matches rank above description matches; "photo" is a prefix of all three words.
+    ranked = titles("q=photosynthesis")
+    assert set(ranked[:2]) == {"Photosynthesis basics", "Qa on photosynthesis"} and ranked[2] == "Biology lab"
+    assert set(titles("q=photo")) == {"Photosynthesis basics", "Biology lab", "Photon physics", "Qa on photosynthesis"}
+    assert set(titles("q=photo light")) == {"Photon physics", "Photosynthesis basics"}
+    assert titles("q=photosynthesis&session_type=qa") == ["Qa on photosynthesis"]
+    assert titles("q=photo&from=04-05-2032&to=06-05-2032&limit=5") == ["Photon physics", "Biology lab"]
+
+    test_client.put(f"/api/classes/{ids['other']}", json={"title": "Photosynthesis revision"}, headers=headers)
+    assert "Photosynthesis revision" in titles("q=revision")
+    assert titles("q=algebra") == []
+    test_client.delete(f"/api/classes/{ids['title']}", headers=headers)
+    assert "Photosynthesis basics" not in titles("q=photosynthesis")
+
+    assert test_client.get("/api/classes/search?q=").status_code == 400
+    assert test_client.get("/api/classes/search?q=x&offset=-1").status_code == 400
+
+
+def test_search_other_databases(test_client, monkeypatch):
+    """
+    MySQL leaves out the words its FULLTEXT index skips; unsupported databases answer 501.
+    """
+    app = test_client.application
+    monkeypatch.setattr(search, "_dialect", lambda: "mysql")
+    with app.app_context():
+        assert search_terms("The cell of photo ab", 8) == ["cell", "photo"]
+    assert test_client.get("/api/classes/search?q=of+ab").status_code == 400
+
+    monkeypatch.setattr(search, "_dialect", lambda: "oracle")
+    response = test_client.get("/api/classes/search?q=photo")
+    assert response.status_code == 501
+    assert "not available" in response.get_json()["error"]
+
+
+def test_availability_sweep(test_client):
+    """
+    Open slots come from the session type's rule window minus booked sessions, in one range query.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    base = {"title": "Booked", "professor_id": 3, "session_type": "class", "date": "02-05-2033"}
+    for start, end in (("10:00", "10:30"), ("11:00", "11:15")):
+        assert test_client.post("/api/classes", json=dict(base, start_time=start, end_time=end),
+                                headers=headers).status_code == 201
+
+    with captured_statements() as statements:
+        response = test_client.get("/api/availability?from=02-05-2033&to=06-05-2033&session_type=class&duration=30")
+    assert response.status_code == 200
+    assert len(class_session_selects(statements)) == 1
+    slots = response.get_json()
+    assert slots[:3] == [
+        {"date": "02-05-2033", "start": "10:30", "end": "11:00"},
+        {"date": "02-05-2033", "start": "11:15", "end": "12:00"},
+        {"date": "03-05-2033", "start": "10:00", "end": "12:00"},
+    ]
+    assert [slot["date"] for slot in slots[3:]] == ["04-05-2033", "05-05-2033"]  # no Friday for classes
+
+    response = test_client.get("/api/availability?from=02-05-2033&to=02-05-2033&session_type=class&duration=45")
+    assert response.get_json() == [{"date": "02-05-2033", "start": "11:15", "end": "12:00"}]
+    assert test_client.get("/api/availability?from=06-05-2033&to=06-05-2033&session_type=qa").get_json() == [
+        {"date": "06-05-2033", "start": "00:00", "end": "23:59"}]
+    assert test_client.get("/api/availability?from=02-05-2033&to=06-05-2033").status_code == 400
+    assert test_client.get(
+        "/api/availability?from=02-05-2033&to=06-05-2033&session_type=class&duration=0").status_code == 400
+
+
+def test_find_open_slots_overlapping_bookings():
+    """
+    Unit test for the sweep: overlapping and out-of-window bookings, and an unconstrained window.
+    """
+    day = datetime(2033, 5, 2).date()
+    at = lambda value: datetime.strptime(value, "%H:%M").time()
+    booked = [(day, at("09:00"), at("10:15")), (day, at("10:10"), at("10:40")), (day, at("10:30"), at("10:50")),
+              (day, at("11:50"), at("13:00"))]
+    window = (frozenset([0]), at("10:00"), at("12:00"))
+    assert find_open_slots(day, day, window, 30, booked) == [{"date": "02-05-2033", "start": "10:50", "end": "11:50"}]
+    assert find_open_slots(day, day, window, 61, booked) == []
+    assert find_open_slots(day, day, (None, None, None), 300, booked) == [
+        {"date": "02-05-2033", "start": "00:00", "end": "09:00"}, {"date": "02-05-2033", "start": "13:00", "end": "23:59"}]
+
+
+def test_session_series_expansion(test_client):
+    """
+    A term of weekly sessions is one request and one row; its occurrences show up in
+    schedules, class listings and conflict checks, and single occurrences can be cancelled or moved.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    term = {"title": "Algebra", "start_date": "02-01-2034", "end_date": "30-06-2034", "weekdays": [0, 2],
+            "start_time": "10:00", "end_time": "11:00", "professor_id": 9, "session_type": "class"}
+    assert test_client.post("/api/series", json=dict(term, weekdays=[4]), headers=headers).status_code == 400
+    response = test_client.post("/api/series", json=term, headers=headers)
+    assert response.status_code == 201
+    series_id, occurrences = response.get_json()["data"]["id"], response.get_json()["data"]["occurrences"]
+    assert occurrences == 52
+    assert db.session.query(ClassSession).filter(ClassSession.date >= datetime(2034, 1, 1).date()).count() == 0
+
+    schedule = test_client.get("/api/schedule?date=04-01-2034").get_json()
+    assert [(s["title"], s["start_time"], s["series_id"]) for s in schedule] == [("Algebra", "10:00", series_id)]
+
+    clash = {"title": "Clash", "date": "09-01-2034", "start_time": "10:30", "end_time": "11:30",
+             "professor_id": 1, "session_type": "class"}
+    response = test_client.post("/api/classes", json=clash, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()["details"]["conflicting_series_ids"] == [series_id]
+    response = test_client.post("/api/series", json=dict(term, start_time="10:30", end_time="11:30"), headers=headers)
+    assert response.status_code == 409
+    assert len(response.get_json()["details"]["conflicts"]) == occurrences
+
+    # Cancel one occurrence, move another to Thursday.
+    assert test_client.put(f"/api/series/{series_id}/occurrences/09-01-2034", json={"cancelled": True},
+                           headers=headers).status_code == 200
+    assert test_client.post("/api/classes", json=clash, headers=headers).status_code == 201
+    response = test_client.put(f"/api/series/{series_id}/occurrences/11-01-2034",
+                               json={"date": "12-01-2034", "start_time": "11:00", "end_time": "12:00"}, headers=headers)
+    assert response.status_code == 200
+    moved_id = response.get_json()["data"]["session_id"]
+    assert test_client.get("/api/schedule?date=11-01-2034").get_json() == []
+    moved = test_client.get("/api/schedule?date=12-01-2034").get_json()
+    assert [(s["id"], s["title"], s["start_time"]) for s in moved] == [(moved_id, "Algebra", "11:00")]
+    series = test_client.get(f"/api/series/{series_id}").get_json()["data"]
+    assert series["occurrences"] == occurrences - 2
+    assert series["exceptions"] == [{"date": "09-01-2034", "moved_to_session_id": None},
+                                    {"date": "11-01-2034", "moved_to_session_id": moved_id}]
+
+    # Keyset pages over sessions and occurrences match a single listing.
+    listed = test_client.get("/api/classes?limit=500").get_json()
+    paged, cursor = [], None
+    while True:
+        response = test_client.get("/api/classes?limit=7" + (f"&cursor={cursor}" if cursor else ""))
+        paged.extend(response.get_json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paged == listed
+    assert sum(1 for s in listed if s.get("series_id") == series_id) == occurrences - 2
+    term_days = [s for s in listed if s["date"].endswith("01-2034")][:4]
+    assert [(s["date"], s["title"]) for s in term_days] == [
+        ("02-01-2034", "Algebra"), ("04-01-2034", "Algebra"), ("09-01-2034", "Clash"), ("12-01-2034", "Algebra")]
+
+    slots = test_client.get("/api/availability?from=16-01-2034&to=16-01-2034&session_type=class&duration=30")
+    assert slots.get_json() == [{"date": "16-01-2034", "start": "11:00", "end": "12:00"}]
+
+    # Renaming checks only the occurrences that still belong to the series: the cancelled
+    # slot is now Clash's, and a moved one overlaps the session that replaced it.
+    assert test_client.put(f"/api/series/{series_id}/occurrences/16-01-2034",
+                           json={"start_time": "10:30", "end_time": "11:30"}, headers=headers).status_code == 200
+    response = test_client.put(f"/api/series/{series_id}", json={"title": "Algebra I"}, headers=headers)
+    assert response.status_code == 200
+    assert test_client.put(f"/api/series/{series_id}/occurrences/2034-01-16", json={"cancelled": True},
+                           headers=headers).status_code == 400
+    assert test_client.put(f"/api/series/{series_id}/occurrences/17-01-2034", json={"cancelled": True},
+                           headers=headers).status_code == 404
+
+    assert test_client.delete(f"/api/series/{series_id}/occurrences/11-01-2034", headers=headers).status_code == 200
+    assert db.session.get(ClassSession, moved_id) is None
+    assert test_client.delete(f"/api/series/{series_id}", headers=headers).status_code == 200
+    assert test_client.get("/api/schedule?date=04-01-2034").get_json() == []
+    assert test_client.get(f"/api/series/{series_id}").status_code == 404
+
+
+def test_series_conflicts_with_later_starting_session(test_client):
+    """
+    A series is rejected over sessions that start inside one of its occurrences, and the 409 lists all of them.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    base = {"date": "06-03-2035", "professor_id": 1, "session_type": "class"}
+    first = test_client.post("/api/classes", json=dict(base, title="Inside", start_time="10:15", end_time="10:45"),
+                             headers=headers).get_json()["data"]["id"]
+    second = test_client.post("/api/classes", json=dict(base, title="Tail", start_time="10:45", end_time="11:30"),
+                              headers=headers).get_json()["data"]["id"]
+    term = {"title": "Geometry", "start_date": "05-03-2035", "end_date": "16-03-2035", "weekdays": [1],
+            "start_time": "10:00", "end_time": "11:00", "professor_id": 9, "session_type": "class"}
+    response = test_client.post("/api/series", json=term, headers=headers)
+    assert response.status_code == 409
+    assert response.get_json()["details"]["conflicts"] == [
+        {"date": "06-03-2035", "conflicting_session_ids": [first, second], "conflicting_series_ids": []}]
+
+
+def test_changes_feed(test_client):
+    """
+    The change feed returns only what was created, updated or deleted after a token,
+    in commit order, using the (change_seq, id) index.
+    """
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    token, has_more = None, True
+    while has_more:
+        body = test_client.get("/api/classes/changes?limit=100" + (f"&since={token}" if token else "")).get_json()
+        token, has_more = body["next_token"], body["has_more"]
+    assert test_client.get(f"/api/classes/changes?since={token}").get_json()["changes"] == []
+
+    base = {"professor_id": 5, "session_type": "class", "start_time": "10:00", "end_time": "10:30"}
+    first = test_client.post("/api/classes", json=dict(base, title="A", date="03-04-2035"), headers=headers)
+    first_id = first.get_json()["data"]["id"]
+    assert test_client.put(f"/api/classes/{first_id}", json={"title": "A2"}, headers=headers).status_code == 200
+    second = test_client.post("/api/classes", json=dict(base, title="B", date="04-04-2035"), headers=headers)
+    second_id = second.get_json()["data"]["id"]
+    assert test_client.delete(f"/api/classes/{second_id}", headers=headers).status_code == 200
+    assert test_client.post("/api/classes/bulk", headers=headers, json=[
+        dict(base, title="C", date="09-04-2035"), dict(base, title="D", date="10-04-2035")]).status_code == 201
+    # Bulk rows are inserted with a placeholder and stamped right before commit.
+    assert db.session.query(ClassSession).filter(ClassSession.change_seq < 0).count() == 0
+
+    with captured_statements() as statements:
+        response = test_client.get(f"/api/classes/changes?since={token}")
+    body = response.get_json()
+    assert [(c["title"] if not c["deleted"] else ("deleted", c["id"])) for c in body["changes"]] == [
+        "A2", ("deleted", second_id), "C", "D"]
+    assert body["changes"][0]["updated_at"].endswith("Z") and body["has_more"] is False
+    selects = class_session_selects(statements)
+    assert len(selects) == 1
+    for sql, params in selects:
+        assert any("ix_class_sessions_change_seq_id" in detail for detail in explain_query_plan(sql, params))
+
+    paged, since = [], token
+    while True:
+        page = test_client.get(f"/api/classes/changes?since={since}&limit=1").get_json()
+        paged.extend(page["changes"])
+        since = page["next_token"]
+        if not page["has_more"]:
+            break
+    assert paged == body["changes"]
+    assert test_client.get(f"/api/classes/changes?since={body['next_token']}").get_json()["changes"] == []
+
+    etag = response.headers["ETag"]
+    assert test_client.get(f"/api/classes/changes?since={token}", headers={"If-None-Match": etag}).status_code == 304
+    assert test_client.get("/api/classes/changes?since=not-a-token").status_code == 400
+
+
+def test_schedule_stream(test_client):
+    """
+    The schedule stream sends the schedule on connect and after each write to its date,
+    heartbeats in between, resumes from Last-Event-ID and is capped per process.
+    """
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_auth_token(test_client)}"}
+    url = "/api/schedule/stream?date=07-05-2036"
+    app.config.update(SCHEDULE_STREAM_HEARTBEAT_SECONDS=0.05)
+    try:
+        response = test_client.get(url, buffered=False)
+        assert response.mimetype == "text/event-stream"
+        chunks = iter(response.response)
+        assert next(chunks) == b"retry: 3000\n\n"
+        assert next(chunks) == b"id: 0\nevent: schedule\ndata: []\n\n"
+        assert next(chunks) == b": heartbeat\n\n"
+
+        class_data = {"title": "Streamed", "date": "07-05-2036", "start_time": "10:00", "end_time": "11:00",
+                      "professor_id": 1, "session_type": "class"}
+        assert test_client.post("/api/classes", json=class_data, headers=headers).status_code == 201
+        event = next(chunks).decode()
+        assert event.startswith("id: 1\nevent: schedule\ndata: [") and '"title":"Streamed"' in event.replace(" ", "")
+        response.close()
+        assert schedule_events.stats()["connections"] == 0
+
+        response = test_client.get(url, headers={"Last-Event-ID": "1"}, buffered=False)
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry:")
+        assert next(chunks) == b": heartbeat\n\n"
+        response.close()
+
+        state = app.extensions["schedule_events"]
+        state.max_connections = 1
+        held = test_client.get(url, buffered=False)
+        rejected = test_client.get(url)
+        assert rejected.status_code == 503 and rejected.headers["Retry-After"] == "3"
+        held.close()
+        assert test_client.get("/api/schedule/stream?date=2036-05-07").status_code == 400
+    finally:
+        app.config.update(SCHEDULE_STREAM_HEARTBEAT_SECONDS=Config.SCHEDULE_STREAM_HEARTBEAT_SECONDS)
+        app.extensions["schedule_events"].max_connections = Config.SCHEDULE_STREAM_MAX_CONNECTIONS
+
+
+def test_polling_broker_sees_other_workers_writes(tmp_path):
+    """
+    PollingBroker wakes subscribers when a date's version changes without a local publish.
+    """
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'events.db'}",
+                      "SCHEDULE_EVENTS_POLL_INTERVAL": 0.01})
+    day = datetime(2036, 5, 7).date()
+    broker = PollingBroker(app)
+    with app.app_context():
+        db.create_all()
+        broker.subscribe(day)
+        broker.poll()
+        position = broker.position(day)
+        lock_schedule_day(day)
+        db.session.commit()
+        assert broker.wait(day, position, timeout=5)
+        broker.unsubscribe(day)
+        db.engine.dispose()
+
+
+def test_response_compression(test_client):
+    """
+    Large responses are gzip-compressed when the client accepts it, once per ETag;
+    small ones are left alone, and the Swagger spec is served precompressed.
+    """
+    app = test_client.application
+    db.session.execute(ClassSession.__table__.insert(), [
+        {"title": f"Compressed {i}", "date": datetime(2037, 1, 1 + i).date(), "start_time": datetime(1, 1, 1, 10).time(),
+         "end_time": datetime(1, 1, 1, 11).time(), "professor_id": 1, "session_type": "class"} for i in range(30)
+    ])
+    lock_schedule_day(datetime(2037, 1, 1).date())
+    db.session.commit()
+    accept = {"Accept-Encoding": "gzip"}
+    plain = test_client.get("/api/classes?limit=200")
+    assert plain.headers.get("Content-Encoding") is None and "Accept-Encoding" in plain.headers["Vary"]
+    assert len(plain.data) >= app.config["COMPRESSION_MIN_SIZE"]
+
+    stats = response_compression.stats()
+    compressed = test_client.get("/api/classes?limit=200", headers=accept)
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data)
+    assert compressed.headers["ETag"] == "W/" + plain.headers["ETag"]
+    again = test_client.get("/api/classes?limit=200", headers=accept)
+    assert again.data == compressed.data
+    assert response_compression.stats()["hits"] == stats["hits"] + 1
+    revalidated = test_client.get("/api/classes?limit=200",
+                                  headers=dict(accept, **{"If-None-Match": compressed.headers["ETag"]}))
+    assert revalidated.status_code == 304
+
+    small = test_client.get(f"/api/classes/{plain.get_json()[0]['id']}", headers=accept)
+    assert small.status_code == 200 and small.headers.get("Content-Encoding") is None
+    expected = "br" if compression_brotli is not None else None
+    assert test_client.get("/api/classes?limit=200", headers={"Accept-Encoding": "br"}).headers.get(
+        "Content-Encoding") == expected
+
+    spec = test_client.get("/static/swagger.yaml", headers=accept)
+    assert spec.headers["Content-Encoding"] == "gzip"
+    assert spec.headers["Cache-Control"] == f"public, max-age={app.config['STATIC_MAX_AGE']}"
+    with open(os.path.join(app.root_path, "static", "swagger.yaml"), "rb") as handle:
+        assert gzip.decompress(spec.data) == handle.read()
+    assert test_client.get("/static/swagger.yaml",
+                           headers=dict(accept, **{"If-None-Match": spec.headers["ETag"]})).status_code == 304
+    assert test_client.get("/static/missing.yaml").status_code == 404
+
+
+def test_admission_control(tmp_path):
+    """
+    Rate-limited endpoints answer 429 per client once their bucket is empty, and a worker at
+    MAX_IN_FLIGHT_REQUESTS answers 503; both before any query or hash, with Retry-After.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'admission.db'}",
+        "JWT_SECRET_KEY": "test_secret_key",
+        "SCHEDULE_EVENTS_BACKEND": "app.utils.events.LocalBroker",
+        "RATE_LIMIT_ENABLED": True,
+        "RATE_LIMITS": {"auth.login": {"limit": 2, "period": 60}, "classes.create_class": {"limit": 1, "period": 60}},
+        "MAX_IN_FLIGHT_REQUESTS": 4,
+        "METRICS_ENABLED": True
+    })
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        token = get_auth_token(client)
+        credentials = {"email": "testuser@example.com", "password": "securepassword"}
+        assert client.post("/auth/login", json=credentials).status_code == 200
+
+        with captured_statements() as statements:
+            response = client.post("/auth/login", json=credentials)
+        assert response.status_code == 429
+        assert 1 <= int(response.headers["Retry-After"]) <= 30
+        assert statements == []
+        # Another client has its own bucket; unlisted endpoints are not limited.
+        assert client.post("/auth/login", json=credentials, environ_base={"REMOTE_ADDR": "10.0.0.2"}).status_code == 200
+        assert client.get("/api/classes").status_code == 200
+
+        # Authenticated requests are limited by JWT subject, whatever their address.
+        headers = {"Authorization": f"Bearer {token}"}
+        class_data = {"title": "Limited", "date": "02-03-2037", "start_time": "10:00",
+                      "end_time": "11:00", "professor_id": 1, "session_type": "class"}
+        assert client.post("/api/classes", json=class_data, headers=headers).status_code == 201
+        response = client.post("/api/classes", json=dict(class_data, date="03-03-2037"), headers=headers,
+                               environ_base={"REMOTE_ADDR": "10.0.0.3"})
+        assert response.status_code == 429
+
+        state = app.extensions["admission_control"]
+        state.in_flight = state.max_in_flight
+        response = client.get("/api/classes")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert client.get("/metrics").status_code == 200
+        state.in_flight = 0
+        assert client.get("/api/classes").status_code == 200
+        assert admission_control.stats()["in_flight"] == 0
+        assert admission_control.stats()["rate_limited"] == 2
+        assert admission_control.stats()["shed"] == 1
+        db.session.remove()
+        db.engine.dispose()
+
+    # Workers sharing the SQLite store share their buckets.
+    config = {"RATE_LIMIT_SQLITE_PATH": str(tmp_path / "buckets.db"), "RATE_LIMIT_PRUNE_INTERVAL": 0}
+    first, second = SQLiteStore(config), SQLiteStore(config)
+    assert first.consume("login:ip:1", 2, 1.0, 100.0) == 0
+    assert second.consume("login:ip:1", 2, 1.0, 100.0) == 0
+    assert first.consume("login:ip:1", 2, 1.0, 100.0) == pytest.approx(1.0)
+    assert second.consume("login:ip:1", 2, 1.0, 101.5) == 0
+    # Buckets that have refilled are pruned.
+    assert second.consume("login:ip:2", 2, 1.0, 200.0) == 0
+    assert first.stats() == {"size": 1}
+
+    memory = MemoryStore({"RATE_LIMIT_MAX_KEYS": 2})
+    for key in ("a", "b", "c"):
+        assert memory.consume(key, 1, 0.5, 0.0) == 0
+    assert memory.consume("c", 1, 0.5, 1.0) == pytest.approx(1.0)
+    assert memory.stats() == {"size": 2, "max_keys": 2, "evictions": 1}